@@ -14,9 +14,25 @@ import subprocess
 import os
 import re
 import threading
+import time
 import sys
 import shlex
 import json
+import shutil
+import tempfile
+from bisect import bisect_right
+
+from srt_io import format_time
+from subtitle_time import parse_timestamp, format_timestamp
+from subtitle_track import SubtitleTrack
+from subtitle_index import IntervalIndex
+from cpu_budget import ThreadBudget
+from ffmpeg_jobs import FfmpegJob, FfmpegPool, ProgressTracker, format_progress
+from job_control import JobControl
+from segment_plan import plan_segments, format_stats as format_plan_stats
+from keyframe_index import KeyframeIndex, SMART_CUT_ENCODERS, hybrid_seek_args
+import media_probe
+from log_sink import LogSink
 
 # 如果需要实际调用 DeepSeek API，需要安装：pip install requests
 try:
@@ -30,26 +46,10 @@ def time_to_seconds(time_str):
     """将 HH:MM:SS,mmm 或 H:MM:SS.mmm 等格式时间转为秒(float)"""
     if not time_str:
         return 0.0
-    s = time_str.strip().replace('.', ',')
-    m = re.match(r'(\d+):(\d{1,2}):(\d{1,2})([.,](\d{1,3}))?$', s)
-    if not m:
-        raise ValueError(f"时间格式错误: {time_str}")
-    H = int(m.group(1))
-    M = int(m.group(2))
-    S = int(m.group(3))
-    ms = int((m.group(5) or '0').ljust(3, '0'))
-    return H * 3600 + M * 60 + S + ms / 1000.0
+    return parse_timestamp(time_str)
 
 def seconds_to_time_str(seconds):
-    if seconds <= 0:
-        return "00:00:00,000"
-    total_ms = int(round(seconds * 1000))
-    ms = total_ms % 1000
-    total_seconds = total_ms // 1000
-    H = total_seconds // 3600
-    M = (total_seconds % 3600) // 60
-    S = total_seconds % 60
-    return f"{H:02}:{M:02}:{S:02},{ms:03}"
+    return format_timestamp(seconds)
 
 def format_time_for_filename(t_str):
     if not t_str:
@@ -58,33 +58,24 @@ def format_time_for_filename(t_str):
     return t.replace(':', '_')
 
 # ---------- SRT 解析 ----------
+def load_srt_track(srt_path):
+    """读取 SRT 为字幕轨（去掉时长无效的条目）"""
+    return SubtitleTrack.from_srt(srt_path, errors='ignore').valid()
+
+def track_to_segments(track):
+    """字幕轨 -> [{'start_str','end_str','start_sec','end_sec','duration','text'}, ...]"""
+    return [{
+        'start_str': format_time(start),
+        'end_str': format_time(end),
+        'start_sec': start / 1000.0,
+        'end_sec': end / 1000.0,
+        'duration': (end - start) / 1000.0,
+        'text': text.replace('\n', ' ')
+    } for start, end, text in track.rows()]
+
 def parse_srt_file(srt_path):
     """解析 SRT，返回 [{'start_str','end_str','start_sec','end_sec','duration','text'}, ...]"""
-    with open(srt_path, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-    pattern = re.compile(r'(\d+)\s*\n\s*([0-9:,.\- >]+)\s*-->\s*([0-9:,.\- >]+)\s*\n(.*?)(?=\n\s*\n|\Z)', re.DOTALL)
-    segments = []
-    for m in pattern.finditer(content):
-        idx = m.group(1)
-        start_str = m.group(2).strip()
-        end_str = m.group(3).strip()
-        text = m.group(4).strip().replace('\n', ' ')
-        try:
-            start_sec = time_to_seconds(start_str)
-            end_sec = time_to_seconds(end_str)
-        except Exception:
-            continue
-        if end_sec <= start_sec:
-            continue
-        segments.append({
-            'start_str': start_str,
-            'end_str': end_str,
-            'start_sec': start_sec,
-            'end_sec': end_sec,
-            'duration': end_sec - start_sec,
-            'text': text
-        })
-    return segments
+    return track_to_segments(load_srt_track(srt_path))
 
 # ---------- DeepSeek API 调用 ----------
 def call_deepseek_api(api_key, instruction, media_info, append_log_cb):
@@ -187,27 +178,346 @@ def call_deepseek_api(api_key, instruction, media_info, append_log_cb):
 
 # ---------- 获取视频信息 ----------
 def get_media_duration(file_path):
-    """使用 ffprobe 获取视频时长"""
+    """获取视频时长（media_probe 缓存，同一文件只运行一次 ffprobe）"""
+    duration_sec = media_probe.duration(file_path)
+    return seconds_to_time_str(duration_sec) if duration_sec is not None else "unknown"
+
+# ---------- 单次调用批量切割 ----------
+# 按音频处理的扩展名：流复制可在任意位置切开，可以单次调用导出
+AUDIO_EXTS = ('.mp3', '.wav', '.flac', '.aac', '.m4a', '.ogg')
+# 组内相邻片段的间隔超过此秒数时另起一次调用（用输入端 -ss 直接跳过，不读写中间部分）
+SINGLE_PASS_MAX_GAP = 30.0
+# 清单中小文件的起止时间与片段相差不超过此秒数才视为该片段（强制关键帧/音频帧的对齐误差）
+SINGLE_PASS_TOLERANCE = 0.1
+
+
+def plan_single_pass_groups(entries, max_gap=SINGLE_PASS_MAX_GAP):
+    """
+    把片段分组，每组一次 ffmpeg 调用：组内按开始时间排序、互不重叠，且相邻间隔不超过 max_gap 秒。
+    重叠的片段放进不同的组（贪心：放进第一个已经结束的组）
+    """
+    groups, open_groups = [], []
+    for entry in sorted(entries, key=lambda e: e['start_sec']):
+        start = entry['start_sec']
+        # 间隔已超过 max_gap 的组不会再接收片段（后续片段开始得更晚）
+        open_groups = [g for g in open_groups if start <= g[-1]['start_sec'] + g[-1]['duration'] + max_gap]
+        for g in open_groups:
+            if g[-1]['start_sec'] + g[-1]['duration'] <= start:
+                g.append(entry)
+                break
+        else:
+            groups.append([entry])
+            open_groups.append(groups[-1])
+    return groups
+
+
+def build_single_pass_command(input_path, group, piece_pattern, compress_output, is_audio):
+    """
+    一组片段 -> (ffmpeg 命令, 切点毫秒列表)。
+    输入端 -ss 定位到组内第一个片段，segment 封装器在所有起止点处切开，片段之间的空档
+    也会成为单独的小文件（随后删除）。只用于切点准确的情况（音频，或重新编码并强制关键帧）：
+    视频流复制只能在关键帧处切开，多个切点落在同一 GOP 内时小文件会错位
+    """
+    base = group[0]['start_sec']
+    cuts = sorted({round((t - base) * 1000)
+                   for e in group for t in (e['start_sec'], e['start_sec'] + e['duration'])} - {0})
+    times = ','.join('%.3f' % (ms / 1000) for ms in cuts[:-1])
+    command = ['ffmpeg', '-y', '-ss', str(base), '-i', input_path, '-t', '%.3f' % (cuts[-1] / 1000)]
+    if compress_output:
+        if is_audio:
+            command += ['-vn', '-acodec', 'aac', '-b:a', '128k']
+        else:
+            command += ['-vcodec', 'libx264', '-crf', '23', '-preset', 'medium',
+                        '-acodec', 'aac', '-b:a', '128k']
+            if times:
+                # 重新编码时在切点强制关键帧，segment 才能在准确位置切开
+                command += ['-force_key_frames', times]
+    else:
+        command += ['-c', 'copy']
+    # 空的小文件也写出，编号与切点一一对应
+    command += ['-f', 'segment', '-reset_timestamps', '1', '-write_empty_segments', '1',
+                '-segment_list', 'pipe:1', '-segment_list_type', 'csv']
+    if times:
+        command += ['-segment_times', times]
+    command.append(piece_pattern)
+    return command, cuts[:-1]
+
+
+def _run_single_pass_group(pool, input_path, output_dir, group, compress_output, is_audio, input_ext,
+                           append_log_cb, on_segment_done):
+    """
+    执行一组片段的单次调用（进程由 pool 管理，可被取消）。segment 封装器每写完一个小文件就向
+    stdout 输出一行 CSV 清单（文件名,起点,终点），按起止时间（而不是编号）找到对应的片段，
+    把小文件移动到最终文件名并逐段报告进度；起止时间对不上的片段按失败报告。返回成功导出的片段数
+    """
+    tmp_dir = tempfile.mkdtemp(prefix='.cut_', dir=output_dir)
     try:
-        cmd = [
-            'ffprobe', '-v', 'error',
-            '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1',
-            file_path
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            duration_sec = float(result.stdout.strip())
-            return seconds_to_time_str(duration_sec)
+        command, times = build_single_pass_command(
+            input_path, group, os.path.join(tmp_dir, 'piece_%05d' + input_ext), compress_output, is_audio)
+        base = group[0]['start_sec']
+        pending = list(group)
+        # 按编号推算的文件名，只在没有清单输出时（如旧版 ffmpeg）使用
+        expected = {}
+        for entry in group:
+            k = bisect_right(times, round((entry['start_sec'] - base) * 1000))
+            expected['piece_%05d%s' % (k, input_ext)] = entry
+
+        append_log_cb("命令: " + " ".join(shlex.quote(c) for c in command))
+        done = 0
+        listed = False
+
+        def match(start, end):
+            for entry in pending:
+                rel = entry['start_sec'] - base
+                if (abs(start - rel) <= SINGLE_PASS_TOLERANCE
+                        and abs(end - (rel + entry['duration'])) <= SINGLE_PASS_TOLERANCE):
+                    return entry
+            return None
+
+        def finish(name, entry):
+            pending.remove(entry)
+            os.replace(os.path.join(tmp_dir, name), entry['output_path'])
+            on_segment_done(entry)
+
+        with pool.process(command, stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT) as process:
+            if process is None:
+                return 0
+            while True:
+                line = process.stdout.readline()
+                if not line:
+                    break
+                # stderr 的进度行以 \r 刷新，清单行可能接在它后面
+                decoded = line.decode('utf-8', errors='ignore').split('\r')[-1].strip()
+                fields = decoded.split(',')
+                name = os.path.basename(fields[0])
+                if len(fields) == 3 and name.startswith('piece_'):
+                    try:
+                        start, end = float(fields[1]), float(fields[2])
+                    except ValueError:
+                        continue
+                    listed = True
+                    entry = match(start, end)
+                    if entry is not None:
+                        finish(name, entry)
+                        done += 1
+                elif 'error' in decoded.lower():
+                    append_log_cb(decoded)
+            ret = process.wait()
+
+        if ret == 0 and not listed:
+            for name, entry in expected.items():
+                if entry in pending and os.path.exists(os.path.join(tmp_dir, name)):
+                    finish(name, entry)
+                    done += 1
+        for entry in pending:
+            name = os.path.basename(entry['output_path'])
+            if pool.cancelled:
+                append_log_cb(f"⏹ 已取消: {name}")
+            elif ret == 0:
+                append_log_cb(f"✗ 导出失败（切割结果与片段起止时间不符）: {name}")
+            else:
+                append_log_cb(f"✗ 导出失败（返回码 {ret}）: {name}")
+        return done
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# ---------- 智能切割（首尾重新编码，中间流复制） ----------
+# libx264 / libx265 的 profile 名称（ffprobe 报告的是显示名）
+_ENCODER_PROFILES = {
+    'libx264': {'baseline': 'baseline', 'constrained baseline': 'baseline', 'main': 'main',
+                'high': 'high', 'high 10': 'high10', 'high 4:2:2': 'high422', 'high 4:4:4 predictive': 'high444'},
+    'libx265': {'main': 'main', 'main 10': 'main10', 'rext': None},
+}
+
+
+def smart_cut_encode_args(stream):
+    """按源视频流参数选择首尾重新编码的参数，使其能与流复制的部分直接拼接"""
+    encoder = SMART_CUT_ENCODERS[stream['codec_name']]
+    args = ['-c:v', encoder, '-crf', '18', '-preset', 'fast']
+    if stream.get('pix_fmt'):
+        args += ['-pix_fmt', stream['pix_fmt']]
+    profile = _ENCODER_PROFILES[encoder].get((stream.get('profile') or '').lower())
+    if profile:
+        args += ['-profile:v', profile]
+    return args
+
+
+def _concat_list_line(path):
+    return "file '" + path.replace("'", "'\\''") + "'\n"
+
+
+def build_smart_cut_jobs(input_path, entry, index, encode_args, tmp_dir, output_ext):
+    """
+    一个片段 -> (分段任务列表, 拼接任务)。
+    分段只含视频流（中间段 -ss 正好落在关键帧上，流复制从该关键帧开始）；
+    拼接时用 concat 分离器把各段接起来，音频从原文件按片段区间直接复制
+    """
+    start = entry['start_sec']
+    end = start + entry['duration']
+    piece_jobs, pieces = [], []
+    for k, (kind, a, b) in enumerate(index.plan(start, end)):
+        piece = os.path.join(tmp_dir, f"piece_{entry['idx']:04d}_{k}.ts")
+        codec = encode_args if kind == 'encode' else ['-c', 'copy']
+        command = ['ffmpeg', '-y', '-ss', '%.6f' % a, '-i', input_path, '-t', '%.6f' % (b - a),
+                   '-map', '0:v:0', '-an', '-sn', *codec, piece]
+        piece_jobs.append(FfmpegJob(command, piece, label=f"{kind} {a:.3f}-{b:.3f}", data=entry))
+        pieces.append(piece)
+
+    list_path = os.path.join(tmp_dir, f"list_{entry['idx']:04d}.txt")
+    with open(list_path, 'w', encoding='utf-8') as f:
+        f.writelines(_concat_list_line(p) for p in pieces)
+    command = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', list_path,
+               '-ss', '%.6f' % start, '-t', '%.6f' % entry['duration'], '-i', input_path,
+               '-map', '0:v', '-map', '1:a?', '-c', 'copy']
+    if output_ext in ('.mp4', '.mov', '.m4v'):
+        command += ['-movflags', '+faststart']
+    command.append(entry['output_path'])
+    return piece_jobs, FfmpegJob(command, entry['output_path'], data=entry)
+
+
+def _run_smart_cut(pool, input_path, output_dir, entries, index, stream, input_ext,
+                   append_log_cb, set_status_cb, on_clip_done):
+    """
+    两轮并发：先并行导出所有片段的首/中/尾分段，再逐个片段拼接。
+    某个片段的任一分段失败时跳过它的拼接；on_clip_done(entry, ok) 按片段顺序调用
+    """
+    encode_args = smart_cut_encode_args(stream)
+    tmp_dir = tempfile.mkdtemp(prefix='.smartcut_', dir=output_dir)
+    try:
+        plans = [build_smart_cut_jobs(input_path, e, index, encode_args, tmp_dir, input_ext) for e in entries]
+        piece_jobs = [job for pieces, _ in plans for job in pieces]
+        encoded = sum(1 for job in piece_jobs if job.label.startswith('encode'))
+        append_log_cb(f"智能切割：{len(entries)} 个片段，{encoded} 段重新编码、"
+                      f"{len(piece_jobs) - encoded} 段流复制")
+
+        failed = set()
+        finished = 0
+
+        def on_piece_done(job):
+            nonlocal finished
+            finished += 1
+            if not job.ok:
+                failed.add(job.data['idx'])
+                if not job.cancelled:
+                    append_log_cb(f"✗ 分段失败（返回码 {job.returncode}）: 第 {job.data['idx']} 段 {job.label}")
+                    for line in job.tail:
+                        append_log_cb("    " + line)
+            set_status_cb(f"智能切割运行中：分段 {finished}/{len(piece_jobs)}")
+
+        pool.run(piece_jobs, on_done=on_piece_done)
+
+        concat_jobs = [job for _, job in plans if job.data['idx'] not in failed]
+        for entry in entries:
+            if entry['idx'] in failed:
+                on_clip_done(entry, False)
+
+        def on_concat_done(job):
+            if not job.ok and not job.cancelled:
+                append_log_cb(f"✗ 拼接失败（返回码 {job.returncode}）: {job.label}")
+                for line in job.tail:
+                    append_log_cb("    " + line)
+            on_clip_done(job.data, job.ok)
+
+        pool.run(concat_jobs, on_done=on_concat_done)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _output_path_for(output_dir, name_tmpl, input_base, input_ext, idx, entry, reserved):
+    """按命名模板生成输出路径，与已有文件及本次任务已分配的路径都不重名"""
+    start_name = format_time_for_filename(entry['start_str'])
+    end_name = format_time_for_filename(entry['end_str'])
+    try:
+        output_stem = name_tmpl.format(
+            base=input_base,
+            ext=input_ext.lstrip('.'),
+            idx=idx,
+            start=start_name,
+            end=end_name,
+        )
     except Exception:
-        pass
-    return "unknown"
+        output_stem = f"{input_base}_{start_name}-{end_name}"
+
+    output_path = os.path.join(output_dir, f"{output_stem}{input_ext}")
+
+    # 避免重名
+    base_output = output_path
+    counter = 1
+    while os.path.exists(output_path) or output_path in reserved:
+        output_path = os.path.splitext(base_output)[0] + f"_{counter}" + input_ext
+        counter += 1
+    reserved.add(output_path)
+    return output_path
+
+
+# ---------- 逐段导出 ----------
+def build_segment_command(source, start, duration, output_path, compress_output, ss_before, is_audio,
+                          kf_index=None):
+    """
+    单个片段的 ffmpeg 命令（线程参数由并发池按核心预算插入）。
+    source 可以是输入文件，也可以是合并区间的中间文件（start 为相对中间文件的时间）
+    """
+    if compress_output:
+        # 混合定位：输入端快速跳到起点附近，输出端精确丢弃剩余的一小段
+        input_seek, output_seek = hybrid_seek_args(start, duration, kf_index)
+        if is_audio:
+            command = [
+                'ffmpeg', '-y', *input_seek, '-i', source,
+                *output_seek,
+                '-vn', '-acodec', 'aac', '-b:a', '128k',
+                output_path
+            ]
+        else:
+            command = [
+                'ffmpeg', '-y', *input_seek, '-i', source,
+                *output_seek,
+                '-vcodec', 'libx264', '-crf', '23', '-preset', 'medium',
+                '-acodec', 'aac', '-b:a', '128k',
+                output_path
+            ]
+    else:
+        if ss_before:
+            command = [
+                'ffmpeg', '-y', '-ss', str(start), '-i', source,
+                '-t', str(duration), '-c', 'copy', output_path
+            ]
+        else:
+            command = [
+                'ffmpeg', '-y', '-i', source,
+                '-ss', str(start), '-t', str(duration),
+                '-c', 'copy', output_path
+            ]
+    return command
+
+
+def build_span_command(input_path, span_start, span_end, output_path, kf_index=None):
+    """
+    合并区间 -> 中间文件（流复制，只顺序读取一次）。返回 (命令, 中间文件 0 秒对应的输入时间)。
+    有关键帧索引时从区间起点前的关键帧开始复制，中间文件的时间与输入文件只差一个固定偏移
+    """
+    anchor = kf_index.at_or_before(span_start) if kf_index is not None and len(kf_index) else None
+    anchor = span_start if anchor is None else min(anchor, span_start)
+    command = ['ffmpeg', '-y', '-ss', '%.6f' % anchor, '-i', input_path,
+               '-t', '%.6f' % (span_end - anchor), '-c', 'copy', output_path]
+    return command, anchor
+
 
 # ---------- 后台切割逻辑 ----------
-def run_cutting_logic(input_path, output_dir, segment_entries, append_log_cb, 
+def run_cutting_logic(input_path, output_dir, segment_rows, append_log_cb, 
                       update_progress_cb, enable_button_cb, set_status_cb, 
-                      compress_output, ss_before, name_tmpl):
-    """执行实际的视频切割任务"""
+                      compress_output, ss_before, name_tmpl, single_pass=False, pool=None,
+                      smart_cut=False, merge_gap=None):
+    """
+    执行实际的视频切割任务；segment_rows 为 [(起始, 结束, 描述), ...]（界面表格的快照）。
+    single_pass=True 时同一输入只启动少量 ffmpeg 进程导出全部片段，
+    否则逐段导出的 ffmpeg 由并发池 pool 并行运行（调用 pool.cancel() 可中止）。
+    smart_cut=True 时（仅视频流复制）按关键帧索引只重新编码片段首尾，得到帧精确的切点。
+    merge_gap 不为 None 时先规划：去重、合并重叠或间隔不超过 merge_gap 秒的片段，每个区间只读取一次
+    """
+    if pool is None:
+        pool = FfmpegPool(encode=compress_output)
     append_log_cb("—— 开始任务 ——")
     if not os.path.exists(input_path):
         append_log_cb("输入文件不存在: " + input_path)
@@ -219,10 +529,8 @@ def run_cutting_logic(input_path, output_dir, segment_entries, append_log_cb,
 
     # 读取并校验时间段
     valid_entries = []
-    for i, e in enumerate(segment_entries):
-        s = e['start'].get().strip()
-        t = e['end'].get().strip()
-        text_preview = e['text'].get().strip() if e.get('text') else ''
+    for i, (s, t, text_preview) in enumerate(segment_rows):
+        s, t, text_preview = s.strip(), t.strip(), (text_preview or '').strip()
         if not s and not t:
             continue
         try:
@@ -251,96 +559,179 @@ def run_cutting_logic(input_path, output_dir, segment_entries, append_log_cb,
 
     input_base = os.path.splitext(os.path.basename(input_path))[0]
     input_ext = os.path.splitext(input_path)[1].lower()
-    is_audio = input_ext in ['.mp3', '.wav', '.flac', '.aac', '.m4a', '.ogg']
+    is_audio = input_ext in AUDIO_EXTS
 
+    reserved = set()
     for idx, entry in enumerate(valid_entries, start=1):
-        start_name = format_time_for_filename(entry['start_str'])
-        end_name = format_time_for_filename(entry['end_str'])
-        
-        try:
-            output_stem = name_tmpl.format(
-                base=input_base,
-                ext=input_ext.lstrip('.'),
-                idx=idx,
-                start=start_name,
-                end=end_name,
-            )
-        except Exception:
-            output_stem = f"{input_base}_{start_name}-{end_name}"
-        
-        output_filename = f"{output_stem}{input_ext}"
-        output_path = os.path.join(output_dir, output_filename)
-
-        # 避免重名
-        base_output = output_path
-        counter = 1
-        while os.path.exists(output_path):
-            output_path = os.path.splitext(base_output)[0] + f"_{counter}" + input_ext
-            counter += 1
-
-        # 构建 FFmpeg 命令
-        if compress_output:
-            if is_audio:
-                command = [
-                    'ffmpeg', '-y', '-i', input_path,
-                    '-ss', str(entry['start_sec']),
-                    '-t', str(entry['duration']),
-                    '-vn', '-acodec', 'aac', '-b:a', '128k',
-                    output_path
-                ]
-            else:
-                command = [
-                    'ffmpeg', '-y', '-i', input_path,
-                    '-ss', str(entry['start_sec']),
-                    '-t', str(entry['duration']),
-                    '-vcodec', 'libx264', '-crf', '23', '-preset', 'medium',
-                    '-acodec', 'aac', '-b:a', '128k',
-                    output_path
-                ]
+        entry['idx'] = idx
+        entry['output_path'] = _output_path_for(output_dir, name_tmpl, input_base, input_ext,
+                                                idx, entry, reserved)
+
+    mode = 'single' if single_pass else 'each'
+    if merge_gap is not None and mode == 'single':
+        append_log_cb("已启用片段规划，按区间逐段导出（单次调用选项不生效）")
+        mode = 'each'
+    if mode == 'single' and not (is_audio or compress_output):
+        # 流复制只能在关键帧处切开，单次调用的切点会错位；逐段导出从起点前的关键帧开始
+        append_log_cb("视频流复制无法在准确位置切开，单次调用只用于音频或压缩输出，本次逐段导出")
+        mode = 'each'
+    kf_index = None
+    if smart_cut:
+        stream = None if (compress_output or is_audio) else media_probe.video_stream(input_path)
+        if stream is None:
+            append_log_cb("智能切割只用于视频的流复制，本次按普通模式导出")
+        elif stream.get('codec_name') not in SMART_CUT_ENCODERS:
+            append_log_cb(f"智能切割暂不支持 {stream.get('codec_name')} 编码，本次按普通模式导出")
         else:
-            if ss_before:
-                command = [
-                    'ffmpeg', '-y', '-ss', str(entry['start_sec']), '-i', input_path,
-                    '-t', str(entry['duration']), '-c', 'copy', output_path
-                ]
-            else:
-                command = [
-                    'ffmpeg', '-y', '-i', input_path,
-                    '-ss', str(entry['start_sec']), '-t', str(entry['duration']),
-                    '-c', 'copy', output_path
-                ]
-
-        append_log_cb(f"[{idx}/{total}] 开始导出: {os.path.basename(output_path)}")
-        append_log_cb("命令: " + " ".join(shlex.quote(c) for c in command))
+            try:
+                append_log_cb("🔑 读取关键帧索引...")
+                t0 = time.perf_counter()
+                kf_index = KeyframeIndex.for_file(input_path)
+                append_log_cb(f"🔑 关键帧 {len(kf_index)} 个（{time.perf_counter() - t0:.1f} 秒）")
+                mode = 'smart' if len(kf_index) else mode
+            except Exception as e:
+                append_log_cb(f"读取关键帧失败，本次按普通模式导出: {e}")
+
+    if mode == 'smart' and merge_gap is not None:
+        append_log_cb("智能切割按片段逐个规划首尾编码，不做片段合并")
+
+    if mode == 'smart':
+        def on_clip_done(entry, ok):
+            nonlocal success_count
+            if ok:
+                success_count += 1
+                append_log_cb(f"✓ [{entry['idx']}/{total}] 已完成: {os.path.basename(entry['output_path'])}")
+            update_progress_cb(success_count, total)
 
         try:
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, 
-                                     stderr=subprocess.PIPE, bufsize=1)
-            while True:
-                line = process.stderr.readline()
-                if not line:
-                    break
-                try:
-                    decoded = line.decode('utf-8', errors='ignore').rstrip()
-                    # 只显示关键信息，避免日志过长
-                    if 'time=' in decoded or 'error' in decoded.lower():
-                        append_log_cb(decoded)
-                except:
-                    pass
-            
-            ret = process.wait()
-            if ret == 0:
-                success_count += 1
-                append_log_cb(f"✓ 已完成: {os.path.basename(output_path)}")
-            else:
-                append_log_cb(f"✗ 导出失败（返回码 {ret}）: {os.path.basename(output_path)}")
+            _run_smart_cut(pool, input_path, output_dir, valid_entries, kf_index, stream, input_ext,
+                           append_log_cb, set_status_cb, on_clip_done)
         except Exception as e:
             append_log_cb(f"执行 FFmpeg 时出错: {e}")
+    elif mode == 'single':
+        groups = plan_single_pass_groups(valid_entries)
+        append_log_cb(f"单次调用模式：{total} 个片段分 {len(groups)} 次 ffmpeg 调用导出")
+
+        def on_segment_done(entry):
+            nonlocal success_count
+            success_count += 1
+            append_log_cb(f"✓ [{entry['idx']}/{total}] 已完成: {os.path.basename(entry['output_path'])}")
+            update_progress_cb(success_count, total)
+
+        for g_idx, group in enumerate(groups, start=1):
+            if pool.cancelled:
+                break
+            append_log_cb(f"[调用 {g_idx}/{len(groups)}] {len(group)} 个片段，"
+                          f"{group[0]['start_str']} 起")
+            try:
+                _run_single_pass_group(pool, input_path, output_dir, group, compress_output, is_audio,
+                                       input_ext, append_log_cb, on_segment_done)
+            except Exception as e:
+                append_log_cb(f"执行 FFmpeg 时出错: {e}")
+    else:
+        if (compress_output or merge_gap is not None) and not is_audio and kf_index is None:
+            # 重新编码时输入端定位到起点前的关键帧，不必从文件开头解码；合并区间从关键帧开始复制
+            try:
+                kf_index = KeyframeIndex.for_file(input_path)
+            except Exception as e:
+                append_log_cb(f"读取关键帧失败，按固定提前量定位: {e}")
+
+        ranges = [(e['start_sec'], e['start_sec'] + e['duration']) for e in valid_entries]
+        if merge_gap is not None:
+            spans, plan_stats = plan_segments(ranges, merge_gap)
+            append_log_cb(format_plan_stats(plan_stats))
+        else:
+            # 不规划：每个片段单独读取
+            spans = [{'start': a, 'end': b, 'clips': [i], 'copies': {}} for i, (a, b) in enumerate(ranges)]
+
+        tmp_dir = None
+        jobs, member_jobs = [], []
+        for span in spans:
+            for i in span['clips']:
+                valid_entries[i]['copies'] = [valid_entries[j] for j in span['copies'].get(i, [])]
+            if len(span['clips']) == 1:
+                entry = valid_entries[span['clips'][0]]
+                command = build_segment_command(input_path, entry['start_sec'], entry['duration'],
+                                                entry['output_path'], compress_output, ss_before,
+                                                is_audio, kf_index)
+                jobs.append(FfmpegJob(command, entry['output_path'], data=entry, duration=entry['duration']))
+                continue
+            # 多个片段共用一个区间：先导出中间文件，再从中间文件裁出各片段
+            if tmp_dir is None:
+                tmp_dir = tempfile.mkdtemp(prefix='.span_', dir=output_dir)
+            span_path = os.path.join(tmp_dir, f"span_{len(jobs):04d}{input_ext}")
+            command, anchor = build_span_command(input_path, span['start'], span['end'], span_path, kf_index)
+            span_job = FfmpegJob(command, span_path,
+                                 label=f"读取区间 {seconds_to_time_str(span['start'])}-{seconds_to_time_str(span['end'])}",
+                                 duration=span['end'] - anchor)
+            jobs.append(span_job)
+            for i in span['clips']:
+                entry = valid_entries[i]
+                command = build_segment_command(span_path, entry['start_sec'] - anchor, entry['duration'],
+                                                entry['output_path'], compress_output, ss_before, is_audio)
+                member_jobs.append((span_job, FfmpegJob(command, entry['output_path'], data=entry,
+                                                        duration=entry['duration'])))
+
+        def on_start(job):
+            entry = job.data
+            head = f"[{entry['idx']}/{total}] 开始导出" if entry else "开始"
+            append_log_cb(f"{head}（{job.threads} 线程）: {job.label}")
+            append_log_cb("命令: " + " ".join(shlex.quote(c) for c in job.argv))
+
+        def on_line(job, line):
+            # 只显示关键信息，避免日志过长
+            if 'error' in line.lower():
+                append_log_cb(f"[{job.data['idx'] if job.data else job.label}] {line}")
+
+        def on_done(job):
+            nonlocal success_count
+            entry = job.data
+            if job.ok:
+                append_log_cb(f"✓ 已完成: {job.label}")
+                if entry is None:
+                    return
+                success_count += 1
+                # 完全相同的请求直接复制导出结果
+                for dup in entry['copies']:
+                    try:
+                        shutil.copyfile(entry['output_path'], dup['output_path'])
+                        success_count += 1
+                        append_log_cb(f"✓ 已完成（与第 {entry['idx']} 段相同，复制）: "
+                                      f"{os.path.basename(dup['output_path'])}")
+                    except OSError as e:
+                        append_log_cb(f"✗ 复制失败: {os.path.basename(dup['output_path'])}: {e}")
+            elif job.cancelled:
+                append_log_cb(f"⏹ 已取消: {job.label}")
+            elif job.error is not None:
+                append_log_cb(f"执行 FFmpeg 时出错: {job.error}")
+            else:
+                append_log_cb(f"✗ 导出失败（返回码 {job.returncode}）: {job.label}")
+                for line in job.tail:
+                    append_log_cb("    " + line)
 
-        update_progress_cb(success_count, total)
+        # 进度条按已处理的媒体时长计算（两轮共用），状态栏显示速度与剩余时间
+        def on_progress(snapshot):
+            update_progress_cb(round(snapshot['percent'], 1), 100)
+            set_status_cb(f"切割运行中：{format_progress(snapshot)}")
+
+        progress = ProgressTracker(sum(job.duration for job in jobs) +
+                                   sum(job.duration for _, job in member_jobs), on_progress)
+        try:
+            # 第一轮按时间顺序读取输入（单独的片段与合并区间），第二轮从中间文件裁出片段
+            pool.run(jobs, on_start=on_start, on_done=on_done, on_line=on_line, progress=progress)
+            for span_job, job in member_jobs:
+                if not span_job.ok and not span_job.cancelled:
+                    append_log_cb(f"✗ 导出失败（所在区间未能导出）: {job.label}")
+            pool.run([job for span_job, job in member_jobs if span_job.ok],
+                     on_start=on_start, on_done=on_done, on_line=on_line, progress=progress)
+        finally:
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
 
     append_log_cb("—— 任务结束 ——")
-    if success_count == total:
+    if pool.cancelled:
+        set_status_cb(f"已取消：导出 {success_count}/{total} 个片段")
+    elif success_count == total:
         set_status_cb(f"完成：成功导出 {success_count}/{total} 个片段")
     elif success_count > 0:
         set_status_cb(f"部分完成：{success_count}/{total}")
@@ -348,6 +739,252 @@ def run_cutting_logic(input_path, output_dir, segment_entries, append_log_cb,
         set_status_cb("全部失败")
     enable_button_cb(True, "开始执行")
 
+# ---------- 片段表格（虚拟化） ----------
+SEGMENT_COLUMNS = ('start', 'end', 'text')
+
+
+class SegmentModel:
+    """片段表格的数据：每列一个列表（起始、结束、描述），另记每行上次自动填入的字幕文本"""
+
+    def __init__(self):
+        self.columns = {col: [] for col in SEGMENT_COLUMNS}
+        self.auto_text = []
+
+    def __len__(self):
+        return len(self.auto_text)
+
+    def get(self, row, col):
+        return self.columns[col][row]
+
+    def set(self, row, col, value):
+        self.columns[col][row] = value
+
+    def append(self, start='', end='', text=''):
+        for col, value in zip(SEGMENT_COLUMNS, (start, end, text)):
+            self.columns[col].append(value)
+        self.auto_text.append(None)
+
+    def pop(self):
+        for values in self.columns.values():
+            values.pop()
+        self.auto_text.pop()
+
+    def load(self, starts, ends, texts, auto=False):
+        """整体替换为新数据（三个等长序列）；auto=True 时描述视为自动填入的字幕文本"""
+        self.columns = {'start': list(starts), 'end': list(ends), 'text': list(texts)}
+        self.auto_text = list(self.columns['text']) if auto else [None] * len(self.columns['start'])
+
+    def clear_values(self):
+        """清空所有内容，保留行数"""
+        n = len(self)
+        self.columns = {col: [''] * n for col in SEGMENT_COLUMNS}
+        self.auto_text = [None] * n
+
+    def rows(self):
+        """[(起始, 结束, 描述), ...] 快照，供工作线程读取"""
+        return list(zip(*(self.columns[col] for col in SEGMENT_COLUMNS)))
+
+
+class SegmentGrid(tk.Frame):
+    """
+    片段表格：只为可见的几行创建输入框，滚动时复用同一组控件显示 SegmentModel 中对应的行，
+    编辑内容随输入写回模型。行数不受控件数量限制，导入上万条字幕也只重绘一屏
+    """
+
+    def __init__(self, master, model, on_time_edited=None, height=280):
+        super().__init__(master, borderwidth=1, relief='sunken', height=height)
+        # 高度由布局决定，不随可见行数变化
+        self.pack_propagate(False)
+        self.model = model
+        self.on_time_edited = on_time_edited
+        self.top = 0
+        self.slots = []
+        self.row_height = None
+        self._rendering = False
+        # 正在编辑的 (行, 列)：在获得焦点时记录，滚动后控件显示别的行也不会改错行
+        self._editing = None
+
+        self.v_scroll = tk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.v_scroll.pack(side='right', fill='y')
+        self.body = tk.Frame(self)
+        self.body.pack(side='left', fill='both', expand=True)
+
+        self.body.grid_columnconfigure(0, weight=0, minsize=40)
+        self.body.grid_columnconfigure(1, weight=0, minsize=180)
+        self.body.grid_columnconfigure(2, weight=0, minsize=180)
+        self.body.grid_columnconfigure(3, weight=1, minsize=300)
+
+        # 表头
+        self.header = tk.Frame(self.body, bg='#34495e', relief='ridge', borderwidth=1)
+        self.header.grid(row=0, column=0, columnspan=4, sticky='ew', pady=(0,2))
+        tk.Label(self.header, text="#", width=5, bg='#34495e', fg='white',
+                font=('Arial', 10, 'bold'), anchor='w').pack(side='left', padx=(5,0))
+        tk.Label(self.header, text="起始时间 (HH:MM:SS,mmm)", width=24, bg='#34495e',
+                fg='white', font=('Arial', 10, 'bold'), anchor='w').pack(
+                    side='left', padx=(10,0))
+        tk.Label(self.header, text="结束时间 (HH:MM:SS,mmm)", width=24, bg='#34495e',
+                fg='white', font=('Arial', 10, 'bold'), anchor='w').pack(
+                    side='left', padx=(10,0))
+        tk.Label(self.header, text="片段描述 / 字幕预览", bg='#34495e', fg='white',
+                font=('Arial', 10, 'bold'), anchor='w').pack(
+                    side='left', padx=(10,0), fill='x', expand=True)
+
+        self.body.bind('<Configure>', self._on_resize)
+
+    # ---- 控件行 ----
+    def _add_slot(self):
+        k = len(self.slots)
+        slot = {'row': None, 'shown': True, 'label': tk.Label(self.body, width=5, anchor='w')}
+        slot['label'].grid(row=k + 1, column=0, padx=(5,2), pady=2, sticky='w')
+        for c, col in enumerate(SEGMENT_COLUMNS, start=1):
+            var = tk.StringVar()
+            entry = tk.Entry(self.body, textvariable=var, width=24 if col != 'text' else 20)
+            entry.grid(row=k + 1, column=c, padx=2, pady=2, sticky='ew')
+            var.trace_add('write', lambda *_, col=col: self._on_write(slot, col))
+            entry.bind('<FocusIn>', lambda e, col=col: self._on_focus_in(slot, col))
+            entry.bind('<FocusOut>', lambda e: self._on_focus_out())
+            entry.bind('<Up>', lambda e, col=col: self._move_focus(slot, col, -1))
+            entry.bind('<Down>', lambda e, col=col: self._move_focus(slot, col, 1))
+            slot[col] = entry
+            slot[col + '_var'] = var
+        self.slots.append(slot)
+        if self.row_height is None:
+            self.row_height = slot['start'].winfo_reqheight() + 4
+
+    def _drop_slot(self):
+        slot = self.slots.pop()
+        for key in ('label',) + SEGMENT_COLUMNS:
+            slot[key].destroy()
+
+    def _on_resize(self, event):
+        """按可用高度增减控件行"""
+        if not self.slots:
+            self._add_slot()
+        room = event.height - self.header.winfo_reqheight() - 2
+        want = max(1, room // self.row_height)
+        if want == len(self.slots):
+            return
+        self._finish_edit()
+        while len(self.slots) < want:
+            self._add_slot()
+        while len(self.slots) > want:
+            self._drop_slot()
+        self.refresh()
+
+    # ---- 绘制 ----
+    def _render(self, slot, row):
+        self._rendering = True
+        try:
+            slot['row'] = row
+            slot['label'].config(text=str(row + 1))
+            for col in SEGMENT_COLUMNS:
+                value = self.model.get(row, col)
+                var = slot[col + '_var']
+                if var.get() != value:
+                    var.set(value)
+        finally:
+            self._rendering = False
+
+    def refresh(self):
+        """按当前滚动位置重绘全部可见行（数据变化后调用）"""
+        n = len(self.model)
+        visible = len(self.slots)
+        self.top = max(0, min(self.top, n - visible))
+        for k, slot in enumerate(self.slots):
+            row = self.top + k
+            if row < n:
+                self._render(slot, row)
+            else:
+                slot['row'] = None
+            # 数据不足一屏时隐藏多余的控件行
+            if slot['shown'] != (row < n):
+                slot['shown'] = row < n
+                for key in ('label',) + SEGMENT_COLUMNS:
+                    if slot['shown']:
+                        slot[key].grid()
+                    else:
+                        slot[key].grid_remove()
+        if n > visible:
+            self.v_scroll.set(self.top / n, (self.top + visible) / n)
+        else:
+            self.v_scroll.set(0, 1)
+
+    def refresh_row(self, row):
+        """只重绘一行（不可见时忽略）"""
+        k = row - self.top
+        if 0 <= k < len(self.slots) and row < len(self.model):
+            self._render(self.slots[k], row)
+
+    def reset(self):
+        """整体替换数据后回到顶部"""
+        self._editing = None
+        self.top = 0
+        self.refresh()
+
+    # ---- 滚动 ----
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.model) - len(self.slots)))
+        if top == self.top:
+            return
+        # 先结束编辑：输入框即将显示别的行
+        if self._editing is not None:
+            self._finish_edit()
+            self.body.focus_set()
+        self.top = top
+        self.refresh()
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+
+    def see(self, row):
+        """滚动到 row 可见并重绘（控件行尚未创建时由首次布局绘制）"""
+        if not self.slots:
+            return
+        visible = len(self.slots)
+        if row < self.top:
+            self.scroll_to(row)
+        elif row >= self.top + visible:
+            self.scroll_to(row - visible + 1)
+        self.refresh()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self.model)))
+        elif action == 'scroll':
+            step = max(1, len(self.slots) - 1) if unit == 'pages' else 1
+            self.scroll(int(value) * step)
+
+    # ---- 编辑 ----
+    def _on_write(self, slot, col):
+        if not self._rendering and slot['row'] is not None:
+            self.model.set(slot['row'], col, slot[col + '_var'].get())
+
+    def _on_focus_in(self, slot, col):
+        self._editing = (slot['row'], col) if slot['row'] is not None else None
+
+    def _on_focus_out(self):
+        self._finish_edit()
+
+    def _finish_edit(self):
+        """时间列编辑结束时回调 on_time_edited(行, 列)（格式化、刷新字幕文本）"""
+        editing, self._editing = self._editing, None
+        if editing is None or editing[1] == 'text' or self.on_time_edited is None:
+            return
+        if editing[0] < len(self.model):
+            self.on_time_edited(*editing)
+
+    def _move_focus(self, slot, col, step):
+        """上下方向键在行间移动，到达可见区边缘时滚动"""
+        if slot['row'] is None:
+            return 'break'
+        row = max(0, min(slot['row'] + step, len(self.model) - 1))
+        self.see(row)
+        target = self.slots[row - self.top][col]
+        target.focus_set()
+        target.icursor(tk.END)
+        return 'break'
+
+
 # ---------- GUI 主类 ----------
 class CutterApp:
     def __init__(self, master):
@@ -355,8 +992,14 @@ class CutterApp:
         master.title("音视频无损批量切割工具（含 AI 辅助）")
         master.geometry("1100x800")
 
-        self.max_segments = 50
-        self.time_entries = []
+        # 片段表格数据（行数不限，界面只为可见行创建控件）
+        self.segments = SegmentModel()
+        # ffmpeg 线程预算与当前任务的并发池（取消按钮终止其中的进程）
+        self.budget = ThreadBudget()
+        self.ffmpeg_pool = None
+        self.job_control = None
+        # 导入的 SRT 区间索引：按任意剪辑区间取字幕文本
+        self.srt_index = None
 
         # DeepSeek API 变量
         self.deepseek_enabled_var = tk.BooleanVar(value=False)
@@ -415,6 +1058,20 @@ class CutterApp:
             font=('Arial', 13, 'bold'), padx=22, pady=8
         )
         self.run_button.pack(anchor='ne')
+        self.cancel_button = tk.Button(
+            top_ops,
+            text="⏹ 取消",
+            command=self._cancel_cutting,
+            state=tk.DISABLED, padx=10
+        )
+        self.cancel_button.pack(anchor='ne', pady=(4, 0))
+        self.pause_button = tk.Button(
+            top_ops,
+            text="⏸ 暂停",
+            command=self._toggle_pause,
+            state=tk.DISABLED, padx=10
+        )
+        self.pause_button.pack(anchor='ne', pady=(4, 0))
         path_frame.grid_columnconfigure(3, weight=0)
 
         # DeepSeek AI 功能区
@@ -466,51 +1123,20 @@ class CutterApp:
             side='left', padx=4)
         tk.Button(left_ops, text="↓ 导入 SRT", command=self._import_srt_file, 
                  bg='#9b59b6', fg='white').pack(side='left', padx=4)
+        tk.Button(left_ops, text="📝 按时间填入字幕", command=self._fill_texts_from_srt).pack(
+            side='left', padx=4)
         tk.Button(left_ops, text="🗑 清空全部", command=self._clear_all_rows,
                  bg='#e74c3c', fg='white').pack(side='left', padx=4)
 
-        # 中间滚动区（时间行）
-        canvas_frame = tk.Frame(self.main_frame)
-        canvas_frame.pack(fill='both', expand=True)
+        # 中间表格区（时间行，只渲染可见行）
+        self.segment_grid = SegmentGrid(self.main_frame, self.segments,
+                                        on_time_edited=self._on_time_edited, height=280)
+        self.segment_grid.pack(fill='both', expand=True)
 
-        self.canvas = tk.Canvas(canvas_frame, borderwidth=1, relief='sunken', height=280)
-        self.canvas.pack(side='left', fill='both', expand=True)
-        self.v_scroll = tk.Scrollbar(canvas_frame, orient='vertical', 
-                                    command=self.canvas.yview)
-        self.v_scroll.pack(side='right', fill='y')
-        self.canvas.configure(yscrollcommand=self.v_scroll.set)
-
-        self.rows_frame = tk.Frame(self.canvas)
-        self.canvas.create_window((0,0), window=self.rows_frame, anchor='nw')
-
-        self.rows_frame.bind("<Configure>", 
-                           lambda e: self.canvas.configure(
-                               scrollregion=self.canvas.bbox("all")))
-        
         # 鼠标滚轮支持
-        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
-        self.canvas.bind_all("<Button-4>", self._on_mousewheel)
-        self.canvas.bind_all("<Button-5>", self._on_mousewheel)
-
-        # 表头
-        self.rows_frame.grid_columnconfigure(0, weight=0, minsize=40)
-        self.rows_frame.grid_columnconfigure(1, weight=0, minsize=180)
-        self.rows_frame.grid_columnconfigure(2, weight=0, minsize=180)
-        self.rows_frame.grid_columnconfigure(3, weight=1, minsize=300)
-
-        hdr = tk.Frame(self.rows_frame, bg='#34495e', relief='ridge', borderwidth=1)
-        hdr.grid(row=0, column=0, columnspan=4, sticky='ew', pady=(0,2))
-        tk.Label(hdr, text="#", width=5, bg='#34495e', fg='white',
-                font=('Arial', 10, 'bold'), anchor='w').pack(side='left', padx=(5,0))
-        tk.Label(hdr, text="起始时间 (HH:MM:SS,mmm)", width=24, bg='#34495e', 
-                fg='white', font=('Arial', 10, 'bold'), anchor='w').pack(
-                    side='left', padx=(10,0))
-        tk.Label(hdr, text="结束时间 (HH:MM:SS,mmm)", width=24, bg='#34495e', 
-                fg='white', font=('Arial', 10, 'bold'), anchor='w').pack(
-                    side='left', padx=(10,0))
-        tk.Label(hdr, text="片段描述 / 字幕预览", bg='#34495e', fg='white',
-                font=('Arial', 10, 'bold'), anchor='w').pack(
-                    side='left', padx=(10,0), fill='x', expand=True)
+        self.segment_grid.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.segment_grid.bind_all("<Button-4>", self._on_mousewheel)
+        self.segment_grid.bind_all("<Button-5>", self._on_mousewheel)
 
         # 初始化行
         for i in range(6):
@@ -526,8 +1152,26 @@ class CutterApp:
         tk.Checkbutton(toggles, text="快速切割（-ss 前置）", 
                       variable=self.ss_before_var).pack(side='left', padx=8)
         self.compress_var = tk.BooleanVar(value=False)
-        tk.Checkbutton(toggles, text="压缩输出", 
-                      variable=self.compress_var).pack(side='left')
+        tk.Checkbutton(toggles, text="压缩输出", variable=self.compress_var,
+                      command=self._update_single_pass_state).pack(side='left')
+        # 只对音频或压缩输出可用；视频流复制时禁用（见 _update_single_pass_state）
+        self.single_pass_var = tk.BooleanVar(value=False)
+        self.single_pass_check = tk.Checkbutton(toggles, text="单次调用导出全部片段（音频/压缩输出）",
+                                                variable=self.single_pass_var)
+        self.single_pass_check.pack(side='left', padx=8)
+        self.input_path_entry.bind('<KeyRelease>', self._update_single_pass_state)
+        self.input_path_entry.bind('<FocusOut>', self._update_single_pass_state)
+        self._update_single_pass_state()
+        self.smart_cut_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(toggles, text="智能切割（帧精确，只重编码首尾）",
+                      variable=self.smart_cut_var).pack(side='left')
+        self.merge_plan_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(toggles, text="合并重叠/相邻片段，间隔≤",
+                      variable=self.merge_plan_var).pack(side='left', padx=(8, 0))
+        self.merge_gap_entry = tk.Entry(toggles, width=4)
+        self.merge_gap_entry.insert(0, "1")
+        self.merge_gap_entry.pack(side='left')
+        tk.Label(toggles, text="秒").pack(side='left')
 
         # 执行按钮已移动到顶部路径区域，此处不再重复放置
 
@@ -553,6 +1197,8 @@ class CutterApp:
                                command=self.log_text.xview)
         h_scroll.pack(fill='x')
         self.log_text.configure(xscrollcommand=h_scroll.set)
+        # 日志与状态栏按批刷新（窗口保留最近的行，完整日志另存磁盘）
+        self.log_sink = LogSink(self.log_text, on_status=self._show_status, name='video_cutter')
 
         # 状态栏
         self.status_label = tk.Label(self.main_frame, text="状态: 就绪", 
@@ -628,44 +1274,31 @@ class CutterApp:
         
         self._append_log("=" * 50)
 
-    def _clear_and_fill_time_entries(self, segments):
-        """清空并填充时间行"""
+    def _clear_and_fill_time_entries(self, segments, from_srt=False):
+        """清空并填充时间行；from_srt=True 时文本来自字幕，修改时间后随区间自动刷新"""
         def _do():
-            needed = min(len(segments), self.max_segments)
-            while len(self.time_entries) < needed:
-                self._add_row()
-            
-            # 清空所有行
-            for e in self.time_entries:
-                e['start'].delete(0, tk.END)
-                e['end'].delete(0, tk.END)
-                e['text'].delete(0, tk.END)
-            
-            # 填入新数据
-            for i, seg in enumerate(segments[:self.max_segments]):
-                self.time_entries[i]['start'].insert(0, seg['start_str'])
-                self.time_entries[i]['end'].insert(0, seg['end_str'])
-                text_content = seg.get('text', f"片段 {i+1}")[:200]
-                self.time_entries[i]['text'].insert(0, text_content)
-            
-            # 滚动到顶部
-            self.canvas.yview_moveto(0)
+            # 整体替换表格数据，只重绘可见行并滚动到顶部
+            self.segments.load([seg['start_str'] for seg in segments],
+                               [seg['end_str'] for seg in segments],
+                               [seg.get('text', f"片段 {i+1}")[:200] for i, seg in enumerate(segments)],
+                               auto=from_srt)
+            self.segment_grid.reset()
         
         self.master.after(0, _do)
 
     def _on_mousewheel(self, event):
         if event.num == 4:
-            self.canvas.yview_scroll(-1, "units")
+            self.segment_grid.scroll(-1)
         elif event.num == 5:
-            self.canvas.yview_scroll(1, "units")
+            self.segment_grid.scroll(1)
         else:
             delta = 0
             if hasattr(event, 'delta'):
                 delta = int(event.delta)
             if sys.platform == 'darwin':
-                self.canvas.yview_scroll(int(-1 * delta), "units")
+                self.segment_grid.scroll(int(-1 * delta))
             else:
-                self.canvas.yview_scroll(int(-1 * (delta / 120)), "units")
+                self.segment_grid.scroll(int(-1 * (delta / 120)))
 
     def _browse_input_file(self):
         filetypes = [
@@ -676,6 +1309,16 @@ class CutterApp:
         if filename:
             self.input_path_entry.delete(0, tk.END)
             self.input_path_entry.insert(0, filename)
+            self._update_single_pass_state()
+
+    def _update_single_pass_state(self, *_):
+        """单次调用只能在音频或压缩输出时准确切开：视频流复制时取消勾选并禁用该选项"""
+        ext = os.path.splitext(self.input_path_entry.get().strip())[1].lower()
+        if self.compress_var.get() or ext in AUDIO_EXTS:
+            self.single_pass_check.config(state='normal')
+        else:
+            self.single_pass_var.set(False)
+            self.single_pass_check.config(state='disabled')
 
     def _browse_save_path(self):
         dirname = filedialog.askdirectory()
@@ -684,44 +1327,68 @@ class CutterApp:
             self.save_path_entry.insert(0, dirname)
 
     def _add_row(self, init=False):
-        current = len(self.time_entries)
-        if current >= self.max_segments:
-            messagebox.showwarning("限制", f"已达到最大段数 {self.max_segments}")
-            return
-        
-        row = len(self.time_entries) + 1
-        r = row
-        
-        lbl = tk.Label(self.rows_frame, text=str(row), width=5, anchor='w')
-        lbl.grid(row=r, column=0, padx=(5,2), pady=2, sticky='w')
-        
-        start = tk.Entry(self.rows_frame, width=24)
-        start.grid(row=r, column=1, padx=2, pady=2, sticky='ew')
-        
-        end = tk.Entry(self.rows_frame, width=24)
-        end.grid(row=r, column=2, padx=2, pady=2, sticky='ew')
-        
-        text_preview = tk.Entry(self.rows_frame)
-        text_preview.grid(row=r, column=3, padx=2, pady=2, sticky='ew')
-        
         if init:
-            start.insert(0, "00:00:00,000")
-            end.insert(0, "00:00:10,000")
-            text_preview.insert(0, "示例片段（手动修改或使用 AI 生成）")
-
-        # 失焦自动格式化
-        start.bind('<FocusOut>', lambda e: self._normalize_time_entry(start))
-        end.bind('<FocusOut>', lambda e: self._normalize_time_entry(end))
-        
-        self.time_entries.append({
-            'label': lbl, 'start': start, 'end': end, 'text': text_preview
-        })
-
-    def _normalize_time_entry(self, entry):
-        """格式化时间输入"""
-        val = entry.get().strip()
+            self.segments.append("00:00:00,000", "00:00:10,000", "示例片段（手动修改或使用 AI 生成）")
+        else:
+            self.segments.append()
+        self.segment_grid.see(len(self.segments) - 1)
+
+    def _on_time_edited(self, row, col):
+        """时间输入框失焦：格式化时间，并按新的时间区间刷新字幕文本"""
+        self.segments.set(row, col, self._normalize_time(self.segments.get(row, col)))
+        if self.srt_index is not None:
+            self._fill_row_text(row, overwrite=False)
+        self.segment_grid.refresh_row(row)
+
+    def _row_range_ms(self, row):
+        """行的起止时间（毫秒）；无效时返回 None"""
+        try:
+            start = time_to_seconds(self.segments.get(row, 'start'))
+            end = time_to_seconds(self.segments.get(row, 'end'))
+        except Exception:
+            return None
+        if end <= start:
+            return None
+        return int(round(start * 1000)), int(round(end * 1000))
+
+    def _fill_row_text(self, row, overwrite=True):
+        """用区间索引取出本行时间范围内的字幕文本；overwrite=False 时只替换空文本或上次自动填入的文本"""
+        rng = self._row_range_ms(row)
+        if rng is None:
+            return False
+        current = self.segments.get(row, 'text')
+        if not overwrite and current and current != self.segments.auto_text[row]:
+            return False
+        text = self.srt_index.text_between(*rng)[:200]
+        self.segments.set(row, 'text', text)
+        self.segments.auto_text[row] = text
+        return True
+
+    def _fill_texts_from_srt(self):
+        """按每行的剪辑区间从 SRT 取字幕文本（未导入过 SRT 时先选择文件，只建索引不改动时间行）"""
+        if self.srt_index is None:
+            srt_path = filedialog.askopenfilename(
+                title="选择 SRT 文件",
+                filetypes=[("SRT", "*.srt"), ("所有文件", "*.*")]
+            )
+            if not srt_path:
+                return
+            try:
+                self.srt_index = IntervalIndex(load_srt_track(srt_path))
+            except Exception as e:
+                messagebox.showerror("导入错误", f"SRT 读取失败: {e}")
+                return
+            self._append_log(f"✓ 已建立字幕区间索引: {os.path.basename(srt_path)} ({len(self.srt_index)} 条)")
+        filled = sum(1 for row in range(len(self.segments)) if self._fill_row_text(row))
+        self.segment_grid.refresh()
+        self._append_log(f"✓ 已按时间区间填入 {filled} 行字幕文本")
+        self._set_status(f"已填入 {filled} 行字幕文本")
+
+    def _normalize_time(self, val):
+        """格式化时间输入；无法识别时原样返回"""
+        val = val.strip()
         if not val:
-            return
+            return val
         try:
             v = val.replace('。', '.').replace('，', ',').replace('：', ':')
             v = v.replace('.', ',')
@@ -735,28 +1402,22 @@ class CutterApp:
             ms = (ms + '000')[:3]
             norm = f"{hms[0]}:{hms[1]}:{hms[2]},{ms}"
             _ = time_to_seconds(norm)
-            entry.delete(0, tk.END)
-            entry.insert(0, norm)
+            return norm
         except Exception:
-            pass
+            return val
 
     def _remove_last_row(self):
-        if not self.time_entries:
+        if not len(self.segments):
             return
-        e = self.time_entries.pop()
-        e['label'].destroy()
-        e['start'].destroy()
-        e['end'].destroy()
-        e['text'].destroy()
+        self.segments.pop()
+        self.segment_grid.refresh()
 
     def _clear_all_rows(self):
         """清空所有时间输入"""
         if not messagebox.askyesno("确认", "确定要清空所有时间输入吗？"):
             return
-        for e in self.time_entries:
-            e['start'].delete(0, tk.END)
-            e['end'].delete(0, tk.END)
-            e['text'].delete(0, tk.END)
+        self.segments.clear_values()
+        self.segment_grid.refresh()
         self._append_log("已清空所有时间输入")
 
     def _import_srt_file(self):
@@ -774,36 +1435,33 @@ class CutterApp:
             return
         
         try:
-            segments = parse_srt_file(srt_path)
+            track = load_srt_track(srt_path)
+            segments = track_to_segments(track)
             if not segments:
                 messagebox.showwarning("警告", "SRT 中未找到有效段落")
                 return
             
-            self._clear_and_fill_time_entries(segments)
-            self._append_log(f"✓ 从 SRT 导入 {min(len(segments), self.max_segments)} 个片段")
-            self._set_status(f"成功导入 {min(len(segments), self.max_segments)} 个片段")
+            self.srt_index = IntervalIndex(track)
+            self._clear_and_fill_time_entries(segments, from_srt=True)
+            self._append_log(f"✓ 从 SRT 导入 {len(segments)} 个片段")
+            self._set_status(f"成功导入 {len(segments)} 个片段")
         except Exception as e:
             messagebox.showerror("导入错误", f"SRT 导入失败: {e}")
             self._append_log(f"✗ SRT 导入失败: {e}")
 
     def _clear_log(self):
-        self.log_text.config(state='normal')
-        self.log_text.delete('1.0', 'end')
-        self.log_text.config(state='disabled')
+        self.log_sink.clear()
 
     def _append_log(self, text):
-        """线程安全的日志追加"""
-        def _do():
-            self.log_text.configure(state='normal')
-            self.log_text.insert('end', text + '\n')
-            self.log_text.see('end')
-            self.log_text.configure(state='disabled')
-        self.master.after(0, _do)
+        """线程安全的日志追加（按批刷新到界面）"""
+        self.log_sink.write(text)
 
     def _enable_button(self, enabled, text):
         """线程安全的按钮状态控制"""
         def _do():
             state = tk.NORMAL if enabled else tk.DISABLED
+            self.cancel_button.config(state=tk.DISABLED if enabled else tk.NORMAL)
+            self.pause_button.config(state=tk.DISABLED if enabled else tk.NORMAL, text="⏸ 暂停")
             if enabled:
                 self.run_button.config(state=state, text="🚀 开始执行", bg='#27ae60', fg='white', cursor='')
             else:
@@ -812,22 +1470,24 @@ class CutterApp:
         self.master.after(0, _do)
 
     def _set_status(self, text):
-        """线程安全的状态栏更新"""
-        def _do():
-            fg = 'gray'
-            bg = self.main_frame.cget('bg')
-            if any(k in text for k in ("运行", "进行", "切割", "分析")):
-                fg, bg = ('white', '#2980b9')
-            if any(k in text for k in ("完成", "成功")):
-                fg, bg = ('white', '#27ae60')
-            if any(k in text for k in ("部分",)):
-                fg, bg = ('#2c3e50', '#f39c12')
-            if any(k in text for k in ("失败", "错误")):
-                fg, bg = ('white', '#c0392b')
-            if any(k in text for k in ("就绪",)):
-                fg, bg = ('#555', '#ecf0f1')
-            self.status_label.config(text="状态: " + text, fg=fg, bg=bg)
-        self.master.after(0, _do)
+        """线程安全的状态栏更新（连续的更新合并，每次刷新只显示最后一条）"""
+        self.log_sink.status(text)
+
+    def _show_status(self, text):
+        """由日志刷新在主线程中调用"""
+        fg = 'gray'
+        bg = self.main_frame.cget('bg')
+        if any(k in text for k in ("运行", "进行", "切割", "分析")):
+            fg, bg = ('white', '#2980b9')
+        if any(k in text for k in ("完成", "成功")):
+            fg, bg = ('white', '#27ae60')
+        if any(k in text for k in ("部分",)):
+            fg, bg = ('#2c3e50', '#f39c12')
+        if any(k in text for k in ("失败", "错误")):
+            fg, bg = ('white', '#c0392b')
+        if any(k in text for k in ("就绪",)):
+            fg, bg = ('#555', '#ecf0f1')
+        self.status_label.config(text="状态: " + text, fg=fg, bg=bg)
 
     def _update_progress(self, value, maximum):
         """线程安全的进度条更新"""
@@ -839,6 +1499,31 @@ class CutterApp:
                 pass
         self.master.after(0, _do)
 
+    def _cancel_cutting(self):
+        """终止正在运行的 ffmpeg（暂停中的先恢复再终止），尚未开始的片段不再导出，未写完的文件删除"""
+        if self.job_control is not None and not self.job_control.cancelled:
+            self.job_control.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.pause_button.config(state=tk.DISABLED, text="⏸ 暂停")
+            self._append_log("⏹ 正在取消，终止运行中的 ffmpeg...")
+            self._set_status("正在取消")
+
+    def _toggle_pause(self):
+        """暂停：挂起运行中的 ffmpeg、排队的片段不再启动；再次点击继续"""
+        control = self.job_control
+        if control is None or control.cancelled:
+            return
+        if control.paused:
+            control.resume()
+            self.pause_button.config(text="⏸ 暂停")
+            self._append_log("▶ 已继续")
+            self._set_status("切割运行中")
+        else:
+            control.pause()
+            self.pause_button.config(text="▶ 继续")
+            self._append_log("⏸ 已暂停（运行中的 ffmpeg 已挂起）")
+            self._set_status("已暂停")
+
     def _start_cutting_threaded(self):
         """启动切割任务"""
         input_path = self.input_path_entry.get().strip()
@@ -856,6 +1541,10 @@ class CutterApp:
         if not name_template:
             name_template = "{base}_{idx:03d}_{start}-{end}"
 
+        # 表格数据快照（工作线程不访问界面控件）
+        rows = self.segments.rows()
+        has_time = any((start.strip() or end.strip()) for start, end, _ in rows)
+
         # 检查是否启用 AI 且未分析
         if self.deepseek_enabled_var.get():
             # 如果启用了 AI 但没有 requests 库
@@ -864,8 +1553,6 @@ class CutterApp:
                                      "已启用 AI 但缺少 requests 库\n"
                                      "将使用手动输入的时间进行切割")
             else:
-                has_time = any((e['start'].get().strip() or e['end'].get().strip()) 
-                              for e in self.time_entries)
                 if not has_time:
                     if messagebox.askyesno("AI 分析", 
                                           "启用了 AI 但未生成时间点。\n是否先运行 AI 分析？"):
@@ -873,13 +1560,22 @@ class CutterApp:
                         return
         
         # 常规模式检查
-        has_time = any((e['start'].get().strip() or e['end'].get().strip()) 
-                      for e in self.time_entries)
         if not has_time:
             messagebox.showwarning("警告", "请先输入时间或导入 SRT 或运行 AI 分析")
             return
 
+        merge_gap = None
+        if self.merge_plan_var.get():
+            try:
+                merge_gap = max(0.0, float(self.merge_gap_entry.get().strip() or 0))
+            except ValueError:
+                messagebox.showwarning("警告", "合并间隔请输入秒数，例如 1 或 0.5")
+                return
+
         # 启动切割
+        self.job_control = JobControl()
+        self.ffmpeg_pool = FfmpegPool(self.budget, encode=self.compress_var.get() or self.smart_cut_var.get(),
+                                      control=self.job_control)
         self._enable_button(False, "执行中...")
         self._update_progress(0, 1)
         self._set_status("切割运行中")
@@ -887,11 +1583,12 @@ class CutterApp:
         thread = threading.Thread(
             target=run_cutting_logic,
             args=(
-                input_path, save_path, self.time_entries,
+                input_path, save_path, rows,
                 self._append_log, self._update_progress,
                 self._enable_button, self._set_status,
                 self.compress_var.get(), self.ss_before_var.get(),
-                name_template
+                name_template, self.single_pass_var.get(), self.ffmpeg_pool,
+                self.smart_cut_var.get(), merge_gap
             ),
             daemon=True
         )
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+双语对齐基准：按时间重叠合并（subtitle_align）在大字幕轨上的耗时与覆盖率
+
+用法：
+    python benchmarks/bench_align.py --cues 100000
+
+译文分段与源字幕的切分方式不同（时长略长、整体有漂移），模拟 Whisper translate
+输出与原始转录段落数不一致的情况；同时给出按下标一一对应时错位的条数作对比。
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subtitle_track import SubtitleTrack
+from subtitle_align import merge_bilingual, format_stats
+
+
+def make_tracks(n, seed=0):
+    rng = random.Random(seed)
+    src, t = [], 0.0
+    for i in range(n):
+        dur = rng.uniform(1.0, 4.0)
+        src.append({'start': t, 'end': t + dur, 'text': f"第{i}句原文"})
+        t += dur + rng.uniform(0.0, 0.8)
+    translated, t, i = [], 0.0, 0
+    while t < src[-1]['end']:
+        dur = rng.uniform(1.5, 6.0)
+        translated.append({'start': t, 'end': t + dur, 'text': f"translated segment number {i}"})
+        t += dur + rng.uniform(0.0, 0.5)
+        i += 1
+    return SubtitleTrack.from_segments(src), translated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="双语对齐基准")
+    parser.add_argument('--cues', type=int, default=100000)
+    args = parser.parse_args()
+
+    source, translated = make_tracks(args.cues)
+    t0 = time.perf_counter()
+    merged, stats = merge_bilingual(source, translated)
+    elapsed = time.perf_counter() - t0
+
+    # 按下标一一对应时：第 i 条译文与第 i 条源字幕不重叠即视为错位
+    starts, ends = source.starts, source.ends
+    misaligned = sum(1 for i, seg in enumerate(translated[:len(source)])
+                     if min(ends[i], seg['end'] * 1000) <= max(starts[i], seg['start'] * 1000))
+
+    print(f"源字幕 {len(source)} 条，译文 {len(translated)} 段")
+    print(f"时间对齐合并耗时 {elapsed:.3f} 秒")
+    print(f"覆盖率: {format_stats(stats)}")
+    print(f"按下标对应时不重叠（错位）: {misaligned} 条")
+
+
+if __name__ == "__main__":
+    main()
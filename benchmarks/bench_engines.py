@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+识别引擎基准：比较加载耗时、识别耗时、实时率（RTF）、峰值内存和准确度差异
+
+用法：
+    python benchmarks/bench_engines.py 样例.wav --model small --engines openai,openai-int8,faster,onnx
+
+每个引擎在独立子进程中加载和识别，互不影响内存统计。
+准确度以第一个引擎（或 --reference 指定的文本文件）为参照，计算字符错误率（CER）。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 引擎名 -> (whisper_models.load_model 的 engine, 额外参数)
+ENGINES = {
+    'openai': ('openai', {}),
+    'openai-int8': ('openai', {'quantize': True}),
+    'faster': ('faster', {}),
+    'onnx': ('onnx', {}),
+    'onnx-int8': ('onnx', {'quantize': True}),
+}
+
+
+def peak_rss_mb():
+    """当前进程峰值常驻内存（MB）"""
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except Exception:
+            return float('nan')
+
+
+def audio_duration(path):
+    try:
+        out = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                              '-of', 'default=noprint_wrappers=1:nokey=1', path],
+                             capture_output=True, text=True, timeout=30)
+        return float(out.stdout.strip())
+    except Exception:
+        return 0.0
+
+
+def run_worker(name, args):
+    """子进程：加载并识别一次，结果以 JSON 打印到 stdout"""
+    import whisper_models
+    engine, extra = ENGINES[name]
+    t0 = time.perf_counter()
+    model = whisper_models.load_model(engine, args.model, threads=args.threads, **extra)
+    load_s = time.perf_counter() - t0
+    rss_after_load = peak_rss_mb()
+    t0 = time.perf_counter()
+    result = whisper_models.transcribe(model, args.audio, language=args.language)
+    transcribe_s = time.perf_counter() - t0
+    print(json.dumps({
+        'engine': name,
+        'load_s': load_s,
+        'transcribe_s': transcribe_s,
+        'rss_load_mb': rss_after_load,
+        'rss_peak_mb': peak_rss_mb(),
+        'segments': len(result['segments']),
+        'text': ''.join(seg['text'].strip() for seg in result['segments']),
+    }, ensure_ascii=False))
+
+
+def edit_distance(a, b):
+    """Levenshtein 距离（两行滚动数组）"""
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def cer(ref, hyp):
+    ref = ''.join(ref.split())
+    hyp = ''.join(hyp.split())
+    return edit_distance(ref, hyp) / max(1, len(ref))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper 引擎基准")
+    parser.add_argument('audio')
+    parser.add_argument('--model', default='small')
+    parser.add_argument('--engines', default='openai,openai-int8,faster,onnx')
+    parser.add_argument('--language', default=None)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--reference', help="参考文本文件（默认以第一个引擎输出为参照）")
+    parser.add_argument('--json', help="把结果写入 JSON 文件")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args)
+        return
+
+    names = [n.strip() for n in args.engines.split(',') if n.strip()]
+    unknown = [n for n in names if n not in ENGINES]
+    if unknown:
+        parser.error(f"未知引擎: {', '.join(unknown)}（可选: {', '.join(ENGINES)}）")
+
+    duration = audio_duration(args.audio)
+    results = []
+    for name in names:
+        cmd = [sys.executable, os.path.abspath(__file__), args.audio, '--model', args.model, '--worker', name]
+        if args.language:
+            cmd += ['--language', args.language]
+        if args.threads:
+            cmd += ['--threads', str(args.threads)]
+        print(f"▶ {name} ...", flush=True)
+        proc = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
+        if proc.returncode != 0:
+            print(f"✗ {name} 失败:\n{proc.stderr[-2000:]}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    if not results:
+        return
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as f:
+            ref_text = f.read()
+    else:
+        ref_text = results[0]['text']
+    for r in results:
+        r['cer'] = cer(ref_text, r['text'])
+        r['rtf'] = r['transcribe_s'] / duration if duration else float('nan')
+
+    base = results[0]['transcribe_s']
+    print(f"\n音频时长 {duration:.1f} 秒，模型 {args.model}，参照: {args.reference or results[0]['engine']}")
+    print(f"{'引擎':<14}{'加载(s)':>9}{'识别(s)':>9}{'RTF':>7}{'加速':>7}{'峰值内存(MB)':>14}{'CER':>8}")
+    for r in results:
+        print(f"{r['engine']:<14}{r['load_s']:>9.2f}{r['transcribe_s']:>9.2f}{r['rtf']:>7.3f}"
+              f"{base / r['transcribe_s']:>6.2f}x{r['rss_peak_mb']:>14.0f}{r['cer'] * 100:>7.2f}%")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
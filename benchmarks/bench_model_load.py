@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+模型冷启动基准：比较原始检查点加载与内存映射加载的耗时和每个进程的内存
+
+用法：
+    python benchmarks/bench_model_load.py --model small --workers 4
+
+依次以 checkpoint（whisper.load_model 反序列化）和 mmap 两种方式同时启动 --workers 个子进程，
+全部加载完成后再统一采样内存：
+- RSS：常驻内存（包含与其他进程共享的页）
+- USS：进程独占内存；PSS：共享页按进程数均摊后的内存（需要 psutil，Linux 最准确）
+首次运行 mmap 模式前会先完成一次权重转换（不计入结果）。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def memory_mb():
+    """返回 (rss, uss, pss)，单位 MB；拿不到的项为 nan"""
+    nan = float('nan')
+    try:
+        import psutil
+        proc = psutil.Process()
+        try:
+            full = proc.memory_full_info()
+            return (full.rss / 2 ** 20, full.uss / 2 ** 20, getattr(full, 'pss', nan) / 2 ** 20)
+        except Exception:
+            return proc.memory_info().rss / 2 ** 20, nan, nan
+    except ImportError:
+        pass
+    try:
+        # Linux 无 psutil：从 /proc 读取
+        fields = {}
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':'):
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+        uss = fields.get('Private_Clean', nan) + fields.get('Private_Dirty', nan)
+        return fields.get('Rss', nan), uss, fields.get('Pss', nan)
+    except OSError:
+        return nan, nan, nan
+
+
+def run_worker(mode, model_name):
+    """子进程：加载一次模型，报告耗时，等父进程通知后再采样内存（此时所有 worker 都已加载）"""
+    import torch
+    import whisper_models
+    torch.set_num_threads(1)
+    t0 = time.perf_counter()
+    model = whisper_models.load_openai_model(model_name, mmap=(mode == 'mmap'))
+    load_s = time.perf_counter() - t0
+    print(json.dumps({'event': 'loaded', 'load_s': load_s}), flush=True)
+    sys.stdin.readline()
+    rss, uss, pss = memory_mb()
+    print(json.dumps({'event': 'memory', 'rss_mb': rss, 'uss_mb': uss, 'pss_mb': pss}), flush=True)
+    del model
+
+
+def run_mode(mode, args):
+    cmd = [sys.executable, os.path.abspath(__file__), '--model', args.model, '--worker', mode]
+    procs = [subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+             for _ in range(args.workers)]
+    rows = []
+    for p in procs:
+        rows.append(json.loads(p.stdout.readline()))
+    for p in procs:
+        p.stdin.write("\n")
+        p.stdin.flush()
+    for p, row in zip(procs, rows):
+        row.update(json.loads(p.stdout.readline()))
+        p.wait()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模型冷启动与多进程内存基准")
+    parser.add_argument('--model', default='small')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--json', help="把结果写入 JSON 文件")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.model)
+        return
+
+    import whisper_models
+    if not whisper_models.mmap_cache_path(args.model).exists():
+        print("首次运行：转换 mmap 权重 ...", flush=True)
+        whisper_models.load_openai_model(args.model, mmap=True, log_func=print)
+
+    results = {}
+    for mode in ('checkpoint', 'mmap'):
+        print(f"▶ {mode} × {args.workers} ...", flush=True)
+        results[mode] = run_mode(mode, args)
+
+    print(f"\n模型 {args.model}，同时运行 {args.workers} 个进程")
+    print(f"{'方式':<12}{'加载均值(s)':>12}{'加载最大(s)':>12}{'RSS/进程':>10}{'USS/进程':>10}{'PSS/进程':>10}{'PSS合计':>10}")
+    for mode, rows in results.items():
+        n = len(rows)
+        load = [r['load_s'] for r in rows]
+        print(f"{mode:<12}{sum(load) / n:>12.2f}{max(load):>12.2f}"
+              f"{sum(r['rss_mb'] for r in rows) / n:>10.0f}{sum(r['uss_mb'] for r in rows) / n:>10.0f}"
+              f"{sum(r['pss_mb'] for r in rows) / n:>10.0f}{sum(r['pss_mb'] for r in rows):>10.0f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
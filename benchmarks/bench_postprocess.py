@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+字幕后处理基准：subtitle_postprocess 在大字幕轨上的耗时与切分/合并统计
+
+用法：
+    python benchmarks/bench_postprocess.py --cues 100000
+
+模拟 Whisper 输出：大部分分段长度正常，约 10% 是 20 秒以上的长段，约 15% 只有几个字；
+中文与英文各占一半。
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subtitle_postprocess import postprocess, format_stats, text_width, DEFAULT_RULES
+
+ZH = "今天我们来讲一下这个项目的整体架构首先是数据层然后是服务层最后是界面层每一层都有自己的职责"
+EN = ("the quick brown fox jumps over the lazy dog while the speaker keeps talking about "
+      "architecture layers services and interfaces").split()
+
+
+def make_segments(n, seed=0):
+    rng = random.Random(seed)
+    segs, t = [], 0.0
+    for i in range(n):
+        kind = rng.random()
+        zh = i % 2 == 0
+        if kind < 0.10:
+            dur, size = rng.uniform(20, 30), rng.randint(60, 120)
+        elif kind < 0.25:
+            dur, size = rng.uniform(0.2, 0.8), rng.randint(1, 3)
+        else:
+            dur, size = rng.uniform(2, 6), rng.randint(8, 20)
+        if zh:
+            text = ''.join(rng.choice(ZH) for _ in range(size)) + '。'
+        else:
+            text = ' '.join(rng.choice(EN) for _ in range(max(1, size // 2))) + '.'
+        segs.append({'start': t, 'end': t + dur, 'text': text})
+        t += dur + rng.uniform(0.0, 0.6)
+    return segs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕后处理基准")
+    parser.add_argument('--cues', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    segments = make_segments(args.cues)
+    elapsed = None
+    for _ in range(max(1, args.repeat)):
+        t0 = time.perf_counter()
+        track, stats = postprocess(segments)
+        t = time.perf_counter() - t0
+        elapsed = t if elapsed is None else min(elapsed, t)
+    print(f"{args.cues} 个分段，后处理耗时 {elapsed:.3f} 秒（{args.repeat} 次取最快）")
+    print(format_stats(stats))
+    # 约束检查：测试数据里没有超过行宽的单词，换行后每一行都必须放得下
+    max_width = DEFAULT_RULES['max_width']
+    over = [line for text in track.texts for line in text.split('\n') if text_width(line) > max_width]
+    if over:
+        sys.exit(f"{len(over)} 行超过 {max_width} 列，例如: {over[0]!r}")
+    print(f"所有行都不超过 {max_width} 列")
+
+
+if __name__ == "__main__":
+    main()
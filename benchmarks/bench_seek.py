@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+重新编码导出的定位基准：输出端定位（-i 之后 -ss，从头解码）与混合定位
+（输入端跳到起点前的关键帧 + 输出端精确丢弃）在不同片段位置上的单片段耗时
+
+用法：
+    python benchmarks/bench_seek.py                       # 生成 20 分钟的测试视频
+    python benchmarks/bench_seek.py --input 长视频.mp4 --clip 5
+    python benchmarks/bench_seek.py --audio --duration 3600
+
+编码结果写入 null 封装器，只统计定位与编码耗时，不含写盘。
+混合定位的耗时应与片段在文件中的位置无关，输出端定位随位置线性增长。
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyframe_index import KeyframeIndex, hybrid_seek_args
+
+
+def make_input(path, duration, audio_only):
+    """用 lavfi 生成测试文件：视频每 10 秒一个关键帧（GOP 250），音频为正弦波"""
+    if audio_only:
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+               '-c:a', 'aac', '-b:a', '128k', path]
+    else:
+        cmd = ['ffmpeg', '-y', '-v', 'error',
+               '-f', 'lavfi', '-i', f'testsrc2=size=640x360:rate=25:duration={duration}',
+               '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+               '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '250',
+               '-c:a', 'aac', '-b:a', '128k', '-shortest', path]
+    subprocess.run(cmd, check=True)
+
+
+def media_duration(path):
+    out = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                          '-of', 'default=noprint_wrappers=1:nokey=1', path],
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+
+def encode_args(audio_only):
+    if audio_only:
+        return ['-vn', '-acodec', 'aac', '-b:a', '128k']
+    return ['-vcodec', 'libx264', '-crf', '23', '-preset', 'medium', '-acodec', 'aac', '-b:a', '128k']
+
+
+def run_clip(path, start, clip, strategy, index, audio_only):
+    if strategy == 'output':
+        seek_in, seek_out = [], ['-ss', '%.6f' % start, '-t', '%.6f' % clip]
+    else:
+        seek_in, seek_out = hybrid_seek_args(start, clip, index)
+    cmd = ['ffmpeg', '-y', '-v', 'error', *seek_in, '-i', path, *seek_out,
+           *encode_args(audio_only), '-f', 'null', '-']
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重新编码导出的定位基准")
+    parser.add_argument('--input', help="测试文件（省略时用 lavfi 生成）")
+    parser.add_argument('--duration', type=float, default=1200, help="生成测试文件的时长（秒）")
+    parser.add_argument('--audio', action='store_true', help="生成纯音频测试文件（无关键帧索引，按固定提前量定位）")
+    parser.add_argument('--clip', type=float, default=5.0, help="片段时长（秒）")
+    parser.add_argument('--positions', default='0.05,0.25,0.5,0.75,0.95', help="片段起点占全长的比例")
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.input
+        if not path:
+            path = os.path.join(tmp, 'bench.m4a' if args.audio else 'bench.mp4')
+            print(f"生成 {args.duration:.0f} 秒测试文件...")
+            make_input(path, args.duration, args.audio)
+        total = media_duration(path)
+
+        index = None
+        if not args.audio:
+            t0 = time.perf_counter()
+            index = KeyframeIndex.for_file(path, use_sidecar=False)
+            print(f"关键帧索引：{len(index)} 个，{time.perf_counter() - t0:.2f} 秒（每个输入只建一次）")
+
+        print(f"\n{'起点':>10}{'输出端定位(s)':>16}{'混合定位(s)':>14}")
+        for frac in (float(x) for x in args.positions.split(',')):
+            start = max(0.0, min(total - args.clip, total * frac))
+            best = {}
+            for strategy in ('output', 'hybrid'):
+                best[strategy] = min(run_clip(path, start, args.clip, strategy, index, args.audio)
+                                     for _ in range(args.repeat))
+            print(f"{start:>10.1f}{best['output']:>16.2f}{best['hybrid']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
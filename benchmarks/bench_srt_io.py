@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+SRT 读写基准：srt_io 与 pysrt、原剪辑工具的正则解析对比
+
+用法：
+    python benchmarks/bench_srt_io.py --cues 100000 --repeat 3
+
+生成指定条数的测试字幕（含中英文、多行正文），分别计时解析和写出，取多次运行的最小值。
+未安装 pysrt 时跳过对应项。
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import srt_io
+
+try:
+    import pysrt
+except ImportError:
+    pysrt = None
+
+# 原 AI版video_audio_cutter_1023.py 中 parse_srt_file 的正则
+_OLD_PATTERN = re.compile(r'(\d+)\s*\n\s*([0-9:,.\- >]+)\s*-->\s*([0-9:,.\- >]+)\s*\n(.*?)(?=\n\s*\n|\Z)', re.DOTALL)
+
+
+def make_srt(path, n):
+    cues = []
+    for i in range(n):
+        text = f"第 {i} 句字幕 subtitle line {i}"
+        if i % 3 == 0:
+            text += "\n第二行 second line"
+        cues.append(srt_io.Cue(i + 1, i * 2000, i * 2000 + 1500, text))
+    srt_io.write_srt(path, cues)
+
+
+def old_regex_parse(path):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    out = []
+    for m in _OLD_PATTERN.finditer(content):
+        out.append((m.group(2).strip(), m.group(3).strip(), m.group(4).strip().replace('\n', ' ')))
+    return out
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SRT 读写基准")
+    parser.add_argument('--cues', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'bench.srt')
+        dst = os.path.join(tmp, 'out.srt')
+        make_srt(src, args.cues)
+        size_mb = os.path.getsize(src) / 2 ** 20
+        print(f"测试文件: {args.cues} 条字幕，{size_mb:.1f} MB，取 {args.repeat} 次最小值\n")
+
+        rows = []
+        t, cues = best_of(lambda: srt_io.read_srt(src), args.repeat)
+        rows.append(('解析', 'srt_io', t, len(cues)))
+        with open(src, 'r', encoding='utf-8') as f:
+            content = f.read()
+        t, res = best_of(lambda: srt_io.parse_srt(content), args.repeat)
+        rows.append(('解析', 'srt_io.parse_srt（字符串）', t, len(res)))
+        t, res = best_of(lambda: old_regex_parse(src), args.repeat)
+        rows.append(('解析', '正则（原剪辑工具）', t, len(res)))
+        if pysrt is not None:
+            t, subs = best_of(lambda: pysrt.open(src, encoding='utf-8'), args.repeat)
+            rows.append(('解析', 'pysrt', t, len(subs)))
+
+        t, _ = best_of(lambda: srt_io.write_srt(dst, cues), args.repeat)
+        rows.append(('写出', 'srt_io', t, len(cues)))
+        if pysrt is not None:
+            t, _ = best_of(lambda: subs.save(dst, encoding='utf-8'), args.repeat)
+            rows.append(('写出', 'pysrt', t, len(subs)))
+
+    base = {kind: t for kind, name, t, _ in rows if name == 'srt_io'}
+    print(f"{'操作':<6}{'实现':<20}{'耗时(s)':>10}{'条数':>10}{'相对 srt_io':>14}")
+    for kind, name, t, n in rows:
+        print(f"{kind:<6}{name:<20}{t:>10.3f}{n:>10}{t / base[kind]:>13.1f}x")
+    if pysrt is None:
+        print("\n（未安装 pysrt，跳过 pysrt 对比：pip install pysrt）")
+
+
+if __name__ == "__main__":
+    main()
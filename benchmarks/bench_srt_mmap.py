@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+超大 SRT 读取基准：srt_mmap 内存映射逐条读取与 srt_io.read_srt 整体读取对比
+
+用法：
+    python benchmarks/bench_srt_mmap.py --cues 500000
+
+分别统计顺序读完一遍的耗时（取多次最好成绩）和 Python 堆峰值（tracemalloc，单独一轮测量），以及建索引、读取旁路索引、
+随机访问第 N 条的耗时。测试文件分别以 UTF-8 和 GBK 编码各生成一份。
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import srt_io
+from srt_mmap import MappedSrt
+
+
+def make_srt(path, n, encoding):
+    with open(path, 'w', encoding=encoding, newline='\n') as f:
+        batch = []
+        for i in range(n):
+            text = f"第 {i} 句字幕 subtitle line {i}"
+            if i % 3 == 0:
+                text += "\n第二行 second line"
+            start = i * 2000
+            batch.append(f"{i + 1}\n{srt_io.format_time(start)} --> {srt_io.format_time(start + 1500)}\n{text}\n\n")
+            if len(batch) >= 4096:
+                f.write(''.join(batch))
+                batch.clear()
+        f.write(''.join(batch))
+
+
+def measure(fn, repeat):
+    """耗时取 repeat 次最好成绩；tracemalloc 会拖慢执行，堆峰值另跑一轮测量"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 2 ** 20, result
+
+
+def consume(iterable):
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="超大 SRT 读取基准")
+    parser.add_argument('--cues', type=int, default=500000)
+    parser.add_argument('--lookups', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for encoding in ('utf-8', 'gbk'):
+            path = os.path.join(tmp, f'bench_{encoding}.srt')
+            make_srt(path, args.cues, encoding)
+            size_mb = os.path.getsize(path) / 2 ** 20
+            print(f"\n{encoding}: {args.cues} 条字幕，{size_mb:.1f} MB")
+            print(f"{'操作':<36}{'耗时(s)':>10}{'堆峰值(MB)':>12}{'条数':>10}")
+
+            t, peak, n = measure(lambda: len(srt_io.read_srt(path, encoding=encoding)), args.repeat)
+            print(f"{'srt_io.read_srt（整体读入列表）':<36}{t:>10.3f}{peak:>12.1f}{n:>10}")
+
+            def iterate():
+                with MappedSrt(path, use_sidecar=False) as srt:
+                    return consume(srt)
+            t, peak, n = measure(iterate, args.repeat)
+            print(f"{'MappedSrt 逐条迭代（自动检测编码）':<36}{t:>10.3f}{peak:>12.1f}{n:>10}")
+
+            def build():
+                if os.path.exists(path + '.idx'):
+                    os.remove(path + '.idx')
+                with MappedSrt(path) as srt:
+                    return len(srt)
+            t, peak, n = measure(build, args.repeat)
+            print(f"{'建偏移索引并写 .idx':<36}{t:>10.3f}{peak:>12.1f}{n:>10}")
+
+            with MappedSrt(path) as srt:
+                t0 = time.perf_counter()
+                count = len(srt)
+                t_load = time.perf_counter() - t0
+                picks = [rng.randrange(count) for _ in range(args.lookups)]
+                t0 = time.perf_counter()
+                for k in picks:
+                    cue = srt[k]
+                    assert cue.index == k + 1
+                t_rand = time.perf_counter() - t0
+            print(f"{'读取已有 .idx':<36}{t_load:>10.3f}{'':>12}{count:>10}")
+            print(f"{'随机访问（每次，微秒）':<36}{t_rand / args.lookups * 1e6:>10.1f}{'':>12}{args.lookups:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+时间戳格式化/解析微基准：subtitle_time 整批转换与原来的逐个实现对比
+
+用法：
+    python benchmarks/bench_timestamps.py --n 200000
+
+原实现（复制自改动前的代码）：
+- AI 工具 _format_time：两次 datetime.fromtimestamp 相减（受本地时区影响）
+- 批量工具 format_srt_time：浮点取模，毫秒截断
+- 剪辑工具 seconds_to_time_str / time_to_seconds：round + 正则
+同时检查舍入是否正确（以十进制四舍五入为准）。
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subtitle_time
+
+
+# ---------- 原实现 ----------
+def old_ai_format_time(time_s):
+    time_obj = datetime.datetime.fromtimestamp(time_s) - datetime.datetime.fromtimestamp(0)
+    minutes, seconds = divmod(time_obj.seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    ms = time_obj.microseconds // 1000
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+def old_format_srt_time(seconds):
+    h = int(seconds // 3600)
+    m = int((seconds % 3600) // 60)
+    s = int(seconds % 60)
+    ms = int((seconds - int(seconds)) * 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def old_seconds_to_time_str(seconds):
+    if seconds <= 0:
+        return "00:00:00,000"
+    total_ms = int(round(seconds * 1000))
+    ms = total_ms % 1000
+    total_seconds = total_ms // 1000
+    H = total_seconds // 3600
+    M = (total_seconds % 3600) // 60
+    S = total_seconds % 60
+    return f"{H:02}:{M:02}:{S:02},{ms:03}"
+
+
+def old_time_to_seconds(time_str):
+    s = time_str.strip().replace('.', ',')
+    m = re.match(r'(\d+):(\d{1,2}):(\d{1,2})([.,](\d{1,3}))?$', s)
+    if not m:
+        raise ValueError(time_str)
+    ms = int((m.group(5) or '0').ljust(3, '0'))
+    return int(m.group(1)) * 3600 + int(m.group(2)) * 60 + int(m.group(3)) + ms / 1000.0
+
+
+def reference(seconds):
+    ms = int(Decimal(repr(seconds)).scaleb(3).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    return "%02d:%02d:%02d,%03d" % (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms % 1000)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="时间戳格式化/解析微基准")
+    parser.add_argument('--n', type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # Whisper 输出的时间戳多为两位小数，混入三位小数和恰好在 .5 毫秒上的值
+    values = [round(rng.uniform(0, 4 * 3600), rng.choice((2, 3))) for _ in range(args.n)]
+    values[::7] = [float(f"{int(v)}.{rng.randint(0, 999):03d}5") for v in values[::7]]
+    expected = [reference(v) for v in values]
+
+    print(f"{args.n} 个时间戳，numpy: {'有' if subtitle_time.np is not None else '无'}\n")
+    print(f"{'格式化实现':<32}{'耗时(s)':>10}{'相对':>8}{'舍入错误':>10}")
+    rows = [
+        ('subtitle_time.format_seconds', lambda: subtitle_time.format_seconds(values)),
+        ('AI 工具 _format_time（datetime）', lambda: [old_ai_format_time(v) for v in values]),
+        ('批量工具 format_srt_time', lambda: [old_format_srt_time(v) for v in values]),
+        ('剪辑工具 seconds_to_time_str', lambda: [old_seconds_to_time_str(v) for v in values]),
+    ]
+    base = None
+    for name, fn in rows:
+        t, out = timed(fn)
+        base = base or t
+        wrong = sum(a != b for a, b in zip(out, expected))
+        print(f"{name:<32}{t:>10.3f}{t / base:>7.1f}x{wrong:>10}")
+
+    strings = subtitle_time.format_seconds(values)
+    print(f"\n{'解析实现':<32}{'耗时(s)':>10}{'相对':>8}")
+    t_new, parsed = timed(lambda: subtitle_time.parse_ms(strings))
+    t_old, _ = timed(lambda: [old_time_to_seconds(s) for s in strings])
+    print(f"{'subtitle_time.parse_ms':<32}{t_new:>10.3f}{1:>7.1f}x")
+    print(f"{'剪辑工具 time_to_seconds（正则）':<32}{t_old:>10.3f}{t_old / t_new:>7.1f}x")
+    assert subtitle_time.format_ms(parsed) == strings
+
+
+if __name__ == "__main__":
+    main()
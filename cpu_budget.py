@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+CPU 线程预算调度（三个工具共用）
+
+功能：
+- 统计本机可用核心数，按“租约”把线程分配给推理任务和 ffmpeg 任务
+- 所有租约的线程总数不超过核心数，不足时阻塞等待，避免并发任务超额订阅
+- 可选把 ffmpeg 子进程绑定到租约分到的 CPU 核心（Linux 原生支持，其他平台需 psutil）
+- 统计本进程及子进程的 CPU 时间，报告实际 CPU 利用率
+"""
+
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def available_cores():
+    """返回当前进程可用的 CPU 核心编号列表"""
+    if hasattr(os, 'sched_getaffinity'):
+        try:
+            return sorted(os.sched_getaffinity(0))
+        except Exception:
+            pass
+    if psutil is not None:
+        try:
+            return sorted(psutil.Process().cpu_affinity())
+        except Exception:
+            pass
+    return list(range(os.cpu_count() or 1))
+
+
+def pin_process(pid, cores):
+    """把进程绑定到指定核心，成功返回 True（不支持的平台静默失败）"""
+    if not cores:
+        return False
+    try:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(pid, set(cores))
+            return True
+        if psutil is not None:
+            psutil.Process(pid).cpu_affinity(list(cores))
+            return True
+    except Exception:
+        pass
+    return False
+
+
+class ThreadLease:
+    """一次线程分配：threads 为分到的线程数，cores 为对应的核心编号"""
+
+    def __init__(self, budget, kind, threads, cores):
+        self.budget = budget
+        self.kind = kind
+        self.threads = threads
+        self.cores = cores
+        self._released = False
+
+    def pin(self, pid):
+        """若预算开启了绑核，则把子进程绑定到本租约的核心"""
+        if self.budget.pin_affinity:
+            return pin_process(pid, self.cores)
+        return False
+
+    def ffmpeg_args(self):
+        """ffmpeg CLI 的线程参数"""
+        return ['-threads', str(self.threads)]
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.budget._release(self)
+
+
+class ThreadBudget:
+    """
+    全局线程预算。
+    推理任务通常长期持有较大租约（模型的 intra-op 线程数），ffmpeg 任务
+    按需申请剩余核心；申请不到最小线程数时阻塞，直到有租约释放。
+    """
+
+    def __init__(self, total=None, pin_affinity=False):
+        cores = available_cores()
+        if total:
+            cores = cores[:max(1, min(int(total), len(cores)))]
+        self.total = len(cores)
+        self.pin_affinity = pin_affinity
+        self._free_cores = list(cores)
+        self._cond = threading.Condition()
+        self._peak = 0
+        self.reset_stats()
+
+    # ---------- 分配 ----------
+    @property
+    def in_use(self):
+        return self.total - len(self._free_cores)
+
+    def inference_threads(self, ffmpeg_reserve=None):
+        """推荐给推理模型的线程数：为并发的 ffmpeg 预留约四分之一核心"""
+        if ffmpeg_reserve is None:
+            ffmpeg_reserve = self.total // 4
+        return max(1, self.total - max(0, int(ffmpeg_reserve)))
+
+    def acquire(self, want, kind='job', minimum=1, timeout=None):
+        """
+        申请 want 个线程，至少 minimum 个；空闲不足 minimum 时阻塞。
+        返回 ThreadLease，超时返回 None。
+        """
+        want = max(1, min(int(want), self.total))
+        minimum = max(1, min(int(minimum), want))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while len(self._free_cores) < minimum:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            n = min(want, len(self._free_cores))
+            cores = self._free_cores[:n]
+            del self._free_cores[:n]
+            self._peak = max(self._peak, self.in_use)
+            return ThreadLease(self, kind, n, cores)
+
+    def _release(self, lease):
+        with self._cond:
+            self._free_cores.extend(lease.cores)
+            self._free_cores.sort()
+            self._cond.notify_all()
+
+    @contextmanager
+    def lease(self, want, kind='job', minimum=1):
+        """with budget.lease(n) as lease: ... 自动释放"""
+        ls = self.acquire(want, kind=kind, minimum=minimum)
+        try:
+            yield ls
+        finally:
+            ls.release()
+
+    # ---------- 利用率统计 ----------
+    def reset_stats(self):
+        self._t0_wall = time.monotonic()
+        self._t0_cpu = self._cpu_seconds()
+        self._peak = self.in_use
+
+    @staticmethod
+    def _cpu_seconds():
+        # 子进程时间只在 wait() 之后计入；Windows 上 os.times 不含子进程时间
+        t = os.times()
+        return t.user + t.system + t.children_user + t.children_system
+
+    def utilization(self):
+        """返回 (利用率 0~1, 墙钟秒数, CPU 秒数)"""
+        wall = max(1e-6, time.monotonic() - self._t0_wall)
+        cpu = max(0.0, self._cpu_seconds() - self._t0_cpu)
+        return cpu / (wall * self.total), wall, cpu
+
+    def report(self):
+        util, wall, cpu = self.utilization()
+        note = "（Windows 未计入子进程）" if sys.platform == 'win32' else ""
+        return (f"CPU 利用率 {util * 100:.0f}%{note}：{cpu:.1f} CPU 秒 / {wall:.1f} 秒 × {self.total} 核，"
+                f"峰值占用 {self._peak}/{self.total} 线程，绑核 {'开' if self.pin_affinity else '关'}")
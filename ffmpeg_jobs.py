@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+ffmpeg 任务并发池（三个工具共用）
+
+功能：
+- 最多同时运行 N 个 ffmpeg 进程，每个任务从 ThreadBudget 租用线程，所有任务的线程总数不超过核心数
+- 并发数与每任务线程数按核心数自动选择：重新编码（libx264 等）每任务 1~4 线程、铺满核心；
+  流复制几乎不占 CPU，每任务 1 线程，并发数受磁盘限制取较小值
+- 完成回调在调用 run() 的线程里按提交顺序依次触发：后提交的任务先完成时等前面的任务结束再报告，
+  进度条和日志单调递增
+- cancel() 终止所有运行中的进程（先 terminate，超时再 kill）并删除未写完的输出，尚未开始的任务直接跳过
+- 进度不再从 stderr 的 time= 行抓取：命令加上 -progress pipe:1 -nostats，逐行读取 key=value 输出，
+  按已知时长算出每个任务和全部任务的百分比、速度与剩余时间，回调按固定间隔节流
+- 可传入 job_control.JobControl：暂停时运行中的 ffmpeg 被挂起、排队的任务不再启动，
+  取消令牌时等同于 cancel()
+"""
+
+import os
+import time
+import threading
+import subprocess
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from cpu_budget import ThreadBudget
+from job_control import Cancelled
+
+# 流复制任务的最大并发数（瓶颈在磁盘，不在 CPU）
+COPY_WORKERS = 4
+# 单个编码任务的最大线程数：libx264 在 4 线程以上扩展变差，多开几个任务吞吐更高
+MAX_ENCODE_THREADS = 4
+# terminate 后等待进程退出的秒数，超时 kill
+KILL_GRACE = 3.0
+# 每个任务保留的最后几行输出（失败时写日志）
+TAIL_LINES = 8
+# 进度回调的最小间隔（秒）：ffmpeg 每 0.5 秒左右输出一次进度，多个任务并发时合并刷新
+PROGRESS_INTERVAL = 0.5
+
+
+# ---------- 结构化进度 ----------
+def with_progress(command):
+    """在 ffmpeg 命令中加入 -progress pipe:1 -nostats：进度以 key=value 行写到 stdout，stderr 只剩日志"""
+    return [command[0], '-progress', 'pipe:1', '-nostats', *command[1:]]
+
+
+def _progress_seconds(key, value):
+    """-progress 的一行 -> 已输出的媒体秒数；不是时间行或值为 N/A 时返回 None"""
+    # out_time_ms 名不副实，单位同样是微秒
+    if key in ('out_time_us', 'out_time_ms'):
+        try:
+            return max(0, int(value)) / 1e6
+        except ValueError:
+            return None
+    return None
+
+
+def format_duration(seconds):
+    seconds = int(max(0, seconds))
+    h, rem = divmod(seconds, 3600)
+    return f"{h}:{rem // 60:02d}:{rem % 60:02d}" if h else f"{rem // 60:02d}:{rem % 60:02d}"
+
+
+def format_progress(snapshot):
+    """'45%  速度 3.2x  剩余 01:05'"""
+    text = f"{snapshot['percent']:.0f}%"
+    if snapshot['speed']:
+        text += f"  速度 {snapshot['speed']:.1f}x"
+    if snapshot['eta'] is not None:
+        text += f"  剩余 {format_duration(snapshot['eta'])}"
+    return text
+
+
+class ProgressTracker:
+    """
+    汇总多个任务的进度。total_seconds 为所有任务的媒体总时长；各任务以任意可哈希的 key 上报
+    已处理的秒数。callback(snapshot) 最多每 interval 秒调用一次（任务结束时强制调用），
+    snapshot 含 percent / done / total / speed（媒体秒 ÷ 墙钟秒）/ eta（秒，未知为 None）
+    """
+
+    def __init__(self, total_seconds, callback=None, interval=PROGRESS_INTERVAL):
+        self.total = max(0.0, float(total_seconds or 0))
+        self.callback = callback
+        self.interval = interval
+        self._done = {}
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self._last_emit = 0.0
+
+    def update(self, key, seconds, limit=None, force=False):
+        """任务 key 已处理 seconds 秒（不超过 limit，即该任务的时长）"""
+        if limit is not None:
+            seconds = min(seconds, limit)
+        with self._lock:
+            self._done[key] = max(seconds, self._done.get(key, 0.0))
+            now = time.monotonic()
+            if not force and now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+            snapshot = self._snapshot(now)
+        if self.callback is not None:
+            self.callback(snapshot)
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot(time.monotonic())
+
+    def _snapshot(self, now):
+        done = sum(self._done.values())
+        elapsed = max(1e-6, now - self._t0)
+        speed = done / elapsed if done > 0 else 0.0
+        remaining = max(0.0, self.total - done)
+        return {
+            'percent': min(100.0, done * 100.0 / self.total) if self.total else 0.0,
+            'done': done, 'total': self.total, 'speed': speed,
+            'eta': remaining / speed if speed > 0 else None,
+        }
+
+
+def _pump(proc, tail, on_line, on_seconds):
+    """
+    读取 -progress 输出（stdout）直到进程结束；stderr 在另一线程逐行读取，保留末尾几行并转给 on_line
+    """
+    def read_stderr():
+        for raw in proc.stderr:
+            line = raw.decode('utf-8', errors='ignore').rstrip()
+            if line:
+                tail.append(line)
+                if on_line is not None:
+                    on_line(line)
+
+    reader = threading.Thread(target=read_stderr, daemon=True)
+    reader.start()
+    for raw in proc.stdout:
+        key, _, value = raw.decode('ascii', errors='ignore').strip().partition('=')
+        seconds = _progress_seconds(key, value)
+        if seconds is not None and on_seconds is not None:
+            on_seconds(seconds)
+    reader.join()
+    return proc.wait()
+
+
+def run_ffmpeg(command, duration=None, on_progress=None, lease=None, interval=PROGRESS_INTERVAL,
+               control=None):
+    """
+    执行一条 ffmpeg 命令并读取结构化进度。duration 为输出的媒体时长（秒，未知时不报告进度），
+    on_progress(snapshot) 按 interval 节流调用；失败时抛出 CalledProcessError（stderr 为末尾几行日志）。
+    control 为 JobControl 时进程随之暂停/终止，被取消时抛出 Cancelled
+    """
+    if control is not None:
+        control.check()
+    tracker = ProgressTracker(duration, on_progress, interval) if duration and on_progress else None
+    tail = deque(maxlen=TAIL_LINES)
+    proc = subprocess.Popen(with_progress(command), stdin=subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        if lease is not None:
+            lease.pin(proc.pid)
+        if control is not None:
+            control.add_process(proc)
+        on_seconds = (lambda t: tracker.update(None, t, duration)) if tracker else None
+        ret = _pump(proc, tail, None, on_seconds)
+    finally:
+        if control is not None:
+            control.remove_process(proc)
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    if control is not None and control.cancelled:
+        raise Cancelled()
+    if ret != 0:
+        raise subprocess.CalledProcessError(ret, command, stderr='\n'.join(tail))
+    if tracker is not None:
+        tracker.update(None, duration, force=True)
+
+
+def plan_concurrency(total_cores, job_count, encode=True):
+    """按核心数和任务数选择 (并发数, 每任务线程数)"""
+    total_cores = max(1, int(total_cores))
+    job_count = max(1, int(job_count))
+    if not encode:
+        return max(1, min(job_count, COPY_WORKERS, total_cores)), 1
+    threads = max(1, min(MAX_ENCODE_THREADS, total_cores // 4))
+    workers = max(1, min(job_count, total_cores // threads))
+    # 任务数少于可并发数时，把多出的核心分给每个任务
+    threads = max(threads, total_cores // workers)
+    return workers, threads
+
+
+class FfmpegJob:
+    """
+    一个 ffmpeg 任务。command 为完整命令，最后一个元素是输出路径（线程参数插在它前面）。
+    duration 为输出的媒体时长（秒），用于计算进度百分比。
+    运行后：argv 为实际执行的命令，returncode 为返回码，cancelled 表示被取消，
+    threads 为实际分到的线程数，tail 为最后几行输出，percent 为本任务进度（0~100）
+    """
+
+    def __init__(self, command, output_path=None, label='', data=None, duration=None):
+        self.command = list(command)
+        self.duration = duration
+        self.output_path = output_path if output_path is not None else self.command[-1]
+        self.label = label or os.path.basename(self.output_path)
+        self.data = data
+        self.argv = None
+        self.returncode = None
+        self.cancelled = False
+        self.error = None
+        self.threads = 0
+        self.percent = 0.0
+        self.tail = deque(maxlen=TAIL_LINES)
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.cancelled
+
+
+class FfmpegPool:
+    """
+    有界 ffmpeg 并发池。workers/threads 为 None 时由 plan_concurrency 按 budget 的核心数决定；
+    budget 可与识别模型共用，ffmpeg 只拿到模型没有占用的核心。
+    control 为 JobControl 时跟随它暂停/恢复，取消令牌即取消本池
+    """
+
+    def __init__(self, budget=None, workers=None, threads=None, encode=True, control=None):
+        self.budget = budget or ThreadBudget()
+        self.workers = workers
+        self.threads = threads
+        self.encode = encode
+        self.control = control
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._procs = set()
+        if control is not None:
+            control.on_cancel(self.cancel)
+
+    # ---------- 取消 ----------
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """终止所有运行中的 ffmpeg；不阻塞调用线程（可在 UI 线程调用）"""
+        self._cancel.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+        if procs:
+            timer = threading.Timer(KILL_GRACE, self._kill, args=(procs,))
+            timer.daemon = True
+            timer.start()
+
+    @staticmethod
+    def _kill(procs):
+        for proc in procs:
+            if proc.poll() is None:
+                try:
+                    proc.kill()
+                except OSError:
+                    pass
+
+    @contextmanager
+    def process(self, command, lease=None, **popen_kwargs):
+        """
+        启动受本池管理的子进程（cancel() 会终止它）；已取消时产出 None。
+        退出 with 块时确保进程已结束
+        """
+        with self._lock:
+            if self._cancel.is_set():
+                proc = None
+            else:
+                proc = subprocess.Popen(command, **popen_kwargs)
+                self._procs.add(proc)
+        if proc is not None and self.control is not None:
+            # 终止由本池负责，令牌只负责挂起/恢复
+            self.control.add_process(proc, terminate=False)
+        try:
+            if proc is not None and lease is not None:
+                lease.pin(proc.pid)
+            yield proc
+        finally:
+            if proc is not None:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+                with self._lock:
+                    self._procs.discard(proc)
+                if self.control is not None:
+                    self.control.remove_process(proc)
+
+    # ---------- 运行 ----------
+    def run(self, jobs, on_start=None, on_done=None, on_line=None, progress=None):
+        """
+        并发运行 jobs，阻塞到全部结束。
+        on_start(job) 在工作线程中任务开始时调用；on_done(job) 在本线程按提交顺序调用；
+        on_line(job, line) 收到 ffmpeg 的每行日志时在工作线程中调用；
+        progress 为 ProgressTracker（总时长应包含这些任务的 duration，可跨多次 run 共用）。返回 jobs
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return jobs
+        workers, threads = plan_concurrency(self.budget.total, len(jobs), self.encode)
+        workers = self.workers or workers
+        threads = self.threads or threads
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ffmpeg") as pool:
+            futures = [pool.submit(self._run_job, job, threads, on_start, on_line, progress) for job in jobs]
+            for job, future in zip(jobs, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    job.error = e
+                if on_done is not None:
+                    on_done(job)
+        return jobs
+
+    def _acquire(self, threads):
+        """申请线程租约；等待期间被取消则返回 None"""
+        while not self._cancel.is_set():
+            lease = self.budget.acquire(threads, kind='ffmpeg', timeout=0.2)
+            if lease is not None:
+                return lease
+        return None
+
+    def _run_job(self, job, threads, on_start, on_line, progress):
+        if self.control is not None:
+            # 暂停期间排队的任务停在这里
+            try:
+                self.control.check()
+            except Cancelled:
+                job.cancelled = True
+                return
+        lease = self._acquire(threads)
+        if lease is None:
+            job.cancelled = True
+            return
+        try:
+            job.threads = lease.threads
+            job.argv = job.command[:-1] + lease.ffmpeg_args() + job.command[-1:]
+            if on_start is not None:
+                on_start(job)
+
+            def on_seconds(t):
+                if job.duration:
+                    job.percent = min(100.0, t * 100.0 / job.duration)
+                    if progress is not None:
+                        progress.update(id(job), t, job.duration)
+
+            with self.process(with_progress(job.argv), lease, stdin=subprocess.DEVNULL,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+                if proc is None:
+                    job.cancelled = True
+                    return
+                job.returncode = _pump(proc, job.tail,
+                                       (lambda line: on_line(job, line)) if on_line else None, on_seconds)
+                if job.returncode == 0:
+                    job.percent = 100.0
+        finally:
+            lease.release()
+            # 结束的任务（含失败）按全长计入，总进度最终到 100%
+            if progress is not None and job.duration:
+                progress.update(id(job), job.duration, force=True)
+        if self._cancel.is_set() and job.returncode != 0:
+            job.cancelled = True
+            # 被终止的任务留下的是不完整文件
+            try:
+                os.remove(job.output_path)
+            except OSError:
+                pass
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+输入文件收集（三个工具共用）
+
+功能：
+- os.scandir 迭代遍历目录树（显式栈，不递归调用），文件类型取自 DirEntry，不为每个文件单独 stat；
+  只有按大小过滤/排序时才读取 stat（Windows 上 DirEntry 已自带，不额外访问磁盘）
+- 按扩展名、include/exclude 通配符（含 / 的模式匹配相对路径，否则匹配文件名，不区分大小写）、
+  文件大小过滤；目录名命中 exclude 时整棵子树跳过
+- 时长过滤与按时长排序放在最后：只对通过其他过滤的文件用 media_probe.probe_many 并行探测（命中缓存不启动 ffprobe）
+- 排序：'path'（默认，按相对路径自然排序，ep2 排在 ep10 之前）、'name'、'size'、'mtime'、'duration'，None 保持遍历顺序
+- 返回 (paths, stats)，format_stats(stats) 生成日志摘要
+"""
+
+import os
+import re
+import time
+import fnmatch
+
+# 各工具接受的扩展名（小写，带点）
+VIDEO_EXTS = ('.mp4', '.mov', '.mkv', '.avi', '.flv', '.wmv', '.mpg', '.mpeg', '.m4v', '.webm')
+AUDIO_EXTS = ('.mp3', '.wav', '.m4a', '.flac', '.aac', '.ogg', '.opus')
+MEDIA_EXTS = VIDEO_EXTS + AUDIO_EXTS
+SUBTITLE_EXTS = ('.srt',)
+
+SORT_KEYS = ('path', 'name', 'size', 'mtime', 'duration')
+
+_DIGITS = re.compile(r'(\d+)')
+
+
+def _natural_key(text):
+    """'ep10' -> ['ep', 10, '']：数字按数值比较"""
+    return [int(part) if part.isdigit() else part for part in _DIGITS.split(text.lower())]
+
+
+def _compile_globs(patterns):
+    """通配符列表 -> (匹配相对路径的正则, 匹配文件名的正则)；没有模式时为 None"""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    by_path, by_name = [], []
+    for pattern in patterns or ():
+        pattern = pattern.strip().replace('\\', '/')
+        if pattern:
+            (by_path if '/' in pattern else by_name).append(fnmatch.translate(pattern))
+    compile_ = lambda parts: re.compile('|'.join(parts), re.IGNORECASE) if parts else None
+    return compile_(by_path), compile_(by_name)
+
+
+def _matches(globs, rel, name):
+    by_path, by_name = globs
+    return bool((by_name is not None and by_name.match(name))
+                or (by_path is not None and by_path.match(rel)))
+
+
+def scan(roots, exts=None, include=None, exclude=None, min_size=None, max_size=None,
+         min_duration=None, max_duration=None, sort='path', reverse=False, recursive=True,
+         skip_hidden=True, follow_links=False):
+    """
+    收集 roots（一个或多个目录/文件）下符合条件的文件 -> (paths, stats)。
+    exts 为扩展名元组（None 表示不限）；include 非空时文件须命中其中之一，命中 exclude 的文件和目录跳过；
+    大小单位为字节，时长单位为秒（时长未知的文件在设置时长过滤时被排除）。
+    返回的路径去重（同一文件经不同根目录只出现一次）
+    """
+    t0 = time.perf_counter()
+    if isinstance(roots, (str, os.PathLike)):
+        roots = [roots]
+    exts = tuple(e.lower() for e in exts) if exts else None
+    include_globs = _compile_globs(include)
+    exclude_globs = _compile_globs(exclude)
+    has_include = include_globs != (None, None)
+    has_exclude = exclude_globs != (None, None)
+    need_stat = min_size is not None or max_size is not None or sort in ('size', 'mtime')
+    stats = {'dirs': 0, 'files': 0, 'matched': 0, 'skipped_ext': 0, 'skipped_glob': 0,
+             'skipped_size': 0, 'skipped_duration': 0, 'errors': 0, 'seconds': 0.0}
+
+    # (路径, 排序用相对路径, size, mtime)
+    found = []
+    seen = set()
+    visited = set()
+
+    def consider(path, rel, name, entry=None):
+        stats['files'] += 1
+        if exts is not None and os.path.splitext(name)[1].lower() not in exts:
+            stats['skipped_ext'] += 1
+            return
+        if (has_include and not _matches(include_globs, rel, name)) or \
+                (has_exclude and _matches(exclude_globs, rel, name)):
+            stats['skipped_glob'] += 1
+            return
+        size = mtime = None
+        if need_stat:
+            try:
+                st = entry.stat() if entry is not None else os.stat(path)
+            except OSError:
+                stats['errors'] += 1
+                return
+            size, mtime = st.st_size, st.st_mtime
+            if (min_size is not None and size < min_size) or (max_size is not None and size > max_size):
+                stats['skipped_size'] += 1
+                return
+        key = os.path.normcase(os.path.abspath(path))
+        if key in seen:
+            return
+        seen.add(key)
+        found.append((path, rel, size, mtime))
+
+    for root in roots:
+        root = os.fspath(root)
+        if os.path.isfile(root):
+            name = os.path.basename(root)
+            consider(root, name, name)
+            continue
+        stack = [(root, '')]
+        while stack:
+            directory, prefix = stack.pop()
+            if follow_links:
+                # 跟随符号链接时记录已访问目录，避免链接成环
+                try:
+                    st = os.stat(directory)
+                except OSError:
+                    stats['errors'] += 1
+                    continue
+                if (st.st_dev, st.st_ino) in visited:
+                    continue
+                visited.add((st.st_dev, st.st_ino))
+            stats['dirs'] += 1
+            subdirs = []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        name = entry.name
+                        if skip_hidden and name.startswith('.'):
+                            continue
+                        rel = prefix + name
+                        try:
+                            if entry.is_dir(follow_symlinks=follow_links):
+                                if recursive and not (has_exclude and _matches(exclude_globs, rel, name)):
+                                    subdirs.append((entry.path, rel + '/'))
+                                continue
+                            if not entry.is_file():
+                                continue
+                        except OSError:
+                            stats['errors'] += 1
+                            continue
+                        consider(entry.path, rel, name, entry)
+            except OSError:
+                stats['errors'] += 1
+                continue
+            # 倒序入栈，子目录按名称顺序遍历
+            subdirs.sort(key=lambda d: _natural_key(d[1]), reverse=True)
+            stack.extend(subdirs)
+
+    durations = None
+    if min_duration is not None or max_duration is not None or sort == 'duration':
+        import media_probe
+        infos = media_probe.probe_many(path for path, _, _, _ in found)
+        durations = {path: (info or {}).get('duration') for path, info in infos.items()}
+        if min_duration is not None or max_duration is not None:
+            kept = []
+            for item in found:
+                d = durations.get(item[0])
+                if d is None or (min_duration is not None and d < min_duration) \
+                        or (max_duration is not None and d > max_duration):
+                    stats['skipped_duration'] += 1
+                else:
+                    kept.append(item)
+            found = kept
+
+    if sort == 'path':
+        found.sort(key=lambda item: _natural_key(item[1]), reverse=reverse)
+    elif sort == 'name':
+        found.sort(key=lambda item: _natural_key(os.path.basename(item[0])), reverse=reverse)
+    elif sort == 'size':
+        found.sort(key=lambda item: item[2], reverse=reverse)
+    elif sort == 'mtime':
+        found.sort(key=lambda item: item[3], reverse=reverse)
+    elif sort == 'duration':
+        found.sort(key=lambda item: durations.get(item[0]) or 0.0, reverse=reverse)
+    elif sort is not None:
+        raise ValueError(f"未知的排序方式: {sort}（可选 {', '.join(SORT_KEYS)}）")
+
+    stats['matched'] = len(found)
+    stats['seconds'] = time.perf_counter() - t0
+    return [item[0] for item in found], stats
+
+
+def scan_options(config):
+    """配置中的 scan 字典 -> scan() 的关键字参数（忽略未知键，大小可写 MB：min_size_mb / max_size_mb）"""
+    config = dict(config or {})
+    options = {}
+    for key in ('include', 'exclude', 'min_duration', 'max_duration', 'sort', 'reverse',
+                'recursive', 'skip_hidden', 'follow_links'):
+        if key in config:
+            options[key] = config[key]
+    for key in ('min_size', 'max_size'):
+        if config.get(key + '_mb') is not None:
+            options[key] = int(float(config[key + '_mb']) * 1024 * 1024)
+        elif config.get(key) is not None:
+            options[key] = int(config[key])
+    if options.get('sort') not in SORT_KEYS + (None,):
+        raise ValueError(f"未知的排序方式: {options['sort']}（可选 {', '.join(SORT_KEYS)}）")
+    return options
+
+
+def format_stats(stats):
+    skipped = [(stats['skipped_ext'], "类型不符"), (stats['skipped_glob'], "通配符排除"),
+               (stats['skipped_size'], "大小不符"), (stats['skipped_duration'], "时长不符/未知"),
+               (stats['errors'], "无法读取")]
+    detail = "，".join(f"{label} {count}" for count, label in skipped if count)
+    return (f"扫描 {stats['dirs']} 个目录、{stats['files']} 个文件，选中 {stats['matched']} 个"
+            + (f"（{detail}）" if detail else "") + f"，用时 {stats['seconds']:.2f} 秒")
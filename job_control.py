@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+长任务的取消、暂停与恢复（三个工具共用）
+
+功能：
+- JobControl 是协作式的控制令牌：工作线程在片段、API 调用、ffmpeg 任务之间调用 check()，
+  已取消时抛出 Cancelled，暂停时阻塞到恢复
+- 登记的子进程随令牌一起控制：pause() 挂起（POSIX 为 SIGSTOP，Windows 需要 psutil），
+  resume() 继续，cancel() 先恢复再终止（超时 kill）。挂起的进程保留全部进度，CPU 让给其他任务
+- cancel() 还会调用登记的取消回调（如 FfmpegPool.cancel、转录子进程的 cancel），回调不阻塞
+- Cancelled 继承 BaseException（与 asyncio.CancelledError 相同），不会被各处的 except Exception 吞掉，
+  finally 中的清理（临时 WAV、未写完的输出）照常执行
+"""
+
+import os
+import signal
+import threading
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 终止子进程后等待退出的秒数，超时 kill
+KILL_GRACE = 3.0
+
+
+class Cancelled(BaseException):
+    """任务已被取消"""
+
+
+def suspend_process(pid):
+    """挂起进程，成功返回 True（不支持的平台返回 False，暂停只在检查点生效）"""
+    try:
+        if hasattr(signal, 'SIGSTOP'):
+            os.kill(pid, signal.SIGSTOP)
+            return True
+        if psutil is not None:
+            psutil.Process(pid).suspend()
+            return True
+    except Exception:
+        pass
+    return False
+
+
+def resume_process(pid):
+    try:
+        if hasattr(signal, 'SIGCONT'):
+            os.kill(pid, signal.SIGCONT)
+            return True
+        if psutil is not None:
+            psutil.Process(pid).resume()
+            return True
+    except Exception:
+        pass
+    return False
+
+
+def _alive(proc):
+    """subprocess.Popen 用 poll()，multiprocessing.Process 用 is_alive()"""
+    if hasattr(proc, 'poll'):
+        return proc.poll() is None
+    return proc.is_alive()
+
+
+class JobControl:
+    """一次任务的取消/暂停令牌；所有方法线程安全，可在 UI 线程调用（不阻塞）"""
+
+    def __init__(self):
+        self._cancel = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._lock = threading.Lock()
+        # proc -> 取消时是否由令牌终止（False 表示进程自行处理取消，只随暂停挂起）
+        self._procs = {}
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set() and not self._cancel.is_set()
+
+    # ---------- 控制（UI 线程） ----------
+    def cancel(self):
+        with self._lock:
+            if self._cancel.is_set():
+                return
+            self._cancel.set()
+            self._running.set()
+            procs = dict(self._procs)
+            callbacks, self._callbacks = self._callbacks, []
+        for proc in procs:
+            resume_process(proc.pid)
+        killed = [proc for proc, terminate in procs.items() if terminate and _alive(proc)]
+        for proc in killed:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+        if killed:
+            timer = threading.Timer(KILL_GRACE, self._kill, args=(killed,))
+            timer.daemon = True
+            timer.start()
+        for callback in callbacks:
+            callback()
+
+    @staticmethod
+    def _kill(procs):
+        for proc in procs:
+            if _alive(proc):
+                try:
+                    proc.kill()
+                except OSError:
+                    pass
+
+    def pause(self):
+        """暂停：检查点阻塞，登记的子进程挂起"""
+        with self._lock:
+            if self._cancel.is_set() or not self._running.is_set():
+                return
+            self._running.clear()
+            procs = list(self._procs)
+        for proc in procs:
+            suspend_process(proc.pid)
+
+    def resume(self):
+        with self._lock:
+            if self._running.is_set():
+                return
+            self._running.set()
+            procs = list(self._procs)
+        for proc in procs:
+            resume_process(proc.pid)
+
+    # ---------- 工作线程 ----------
+    def check(self):
+        """检查点：暂停时阻塞到恢复；已取消时抛出 Cancelled"""
+        self._running.wait()
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def on_cancel(self, callback):
+        """登记取消回调（已取消时立即调用）"""
+        with self._lock:
+            if not self._cancel.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def add_process(self, proc, terminate=True):
+        """
+        登记子进程（subprocess.Popen 或 multiprocessing.Process，需要 pid/poll 或 pid/is_alive）。
+        当前处于暂停时立即挂起；terminate=False 时取消只恢复它，由调用方自行结束
+        """
+        with self._lock:
+            self._procs[proc] = terminate
+            paused = not self._running.is_set()
+            cancelled = self._cancel.is_set()
+        if paused:
+            suspend_process(proc.pid)
+        if cancelled and terminate:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+
+    def remove_process(self, proc):
+        with self._lock:
+            self._procs.pop(proc, None)
+
+    @contextmanager
+    def track(self, proc, terminate=True):
+        self.add_process(proc, terminate)
+        try:
+            yield proc
+        finally:
+            self.remove_process(proc)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+视频关键帧索引与智能切割规划（三个工具共用）
+
+功能：
+- 用 ffprobe 读取视频流的包标志（packet flags，不解码），得到所有关键帧的时间点
+- 索引保存在旁路文件 <文件名>.kfidx 中，源文件大小或修改时间变化后自动重建；
+  目录不可写时只缓存在本进程内存里
+- 智能切割规划：片段开头到第一个关键帧、最后一个关键帧到片段结尾这两小段重新编码，
+  中间整段流复制，拼接后得到帧精确的片段，耗时接近纯流复制
+- 重新编码导出的混合定位：输入端 -ss 跳到起点前的关键帧（没有索引时提前 SEEK_PREROLL 秒），
+  输出端 -ss 只精确丢弃剩下的一小段，定位耗时与片段在文件中的位置无关
+"""
+
+import os
+import struct
+import subprocess
+from array import array
+from bisect import bisect_left, bisect_right
+
+# 旁路索引文件格式：魔数、版本、源文件大小、源文件修改时间(ns)、关键帧数，随后是关键帧时间数组（秒，double）
+_IDX_MAGIC = b'KEYIDX'
+_IDX_VERSION = 1
+_IDX_HEADER = struct.Struct('<6sHqqq')
+
+# 起止点与关键帧相差不超过此秒数时视为正好落在关键帧上
+KEYFRAME_TOLERANCE = 0.001
+
+# 没有关键帧索引（音频或索引失败）时，输入端定位提前的秒数
+SEEK_PREROLL = 5.0
+
+# 智能切割支持的视频编码 -> 重新编码首尾时使用的编码器
+SMART_CUT_ENCODERS = {
+    'h264': 'libx264',
+    'hevc': 'libx265',
+}
+
+# 进程内缓存：path -> (文件大小, 修改时间, KeyframeIndex)
+_CACHE = {}
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def probe_keyframes(path, timeout=None):
+    """用 ffprobe 读取第一路视频流所有关键帧的时间（秒，升序）；没有视频流时返回空数组"""
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0',
+        path
+    ]
+    times = array('d')
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        for raw in proc.stdout:
+            pts, _, flags = raw.decode('ascii', errors='ignore').strip().partition(',')
+            if 'K' in flags and pts and pts != 'N/A':
+                times.append(float(pts))
+        ret = proc.wait(timeout)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    if ret != 0:
+        raise RuntimeError(f"ffprobe 读取关键帧失败（返回码 {ret}）: {path}")
+    # 包按解码顺序输出，B 帧结构下 pts 不一定递增
+    if any(times[i] > times[i + 1] for i in range(len(times) - 1)):
+        times = array('d', sorted(times))
+    return times
+
+
+class KeyframeIndex:
+    """关键帧时间点（秒，升序）的只读索引"""
+
+    __slots__ = ('times',)
+
+    def __init__(self, times):
+        self.times = times
+
+    @classmethod
+    def for_file(cls, path, use_sidecar=True):
+        """读取（或构建并保存）path 的关键帧索引；同一进程内按文件大小和修改时间缓存"""
+        stamp = _stamp(path)
+        cached = _CACHE.get(path)
+        if cached is not None and cached[:2] == stamp:
+            return cached[2]
+        times = _load_sidecar(path, stamp) if use_sidecar else None
+        if times is None:
+            times = probe_keyframes(path)
+            if use_sidecar:
+                _save_sidecar(path, stamp, times)
+        index = cls(times)
+        _CACHE[path] = (stamp[0], stamp[1], index)
+        return index
+
+    def __len__(self):
+        return len(self.times)
+
+    def at_or_after(self, t):
+        """t 处或之后的第一个关键帧（容差 KEYFRAME_TOLERANCE），没有时返回 None"""
+        k = bisect_left(self.times, t - KEYFRAME_TOLERANCE)
+        return self.times[k] if k < len(self.times) else None
+
+    def at_or_before(self, t):
+        """t 处或之前的最后一个关键帧（容差 KEYFRAME_TOLERANCE），没有时返回 None"""
+        k = bisect_right(self.times, t + KEYFRAME_TOLERANCE)
+        return self.times[k - 1] if k > 0 else None
+
+    def plan(self, start, end):
+        """
+        智能切割规划：[(kind, start, end), ...]，kind 为 'encode'（重新编码）或 'copy'（流复制）。
+        片段内没有关键帧时整段重新编码；起止点恰好落在关键帧上时对应那一小段省略
+        """
+        head = self.at_or_after(start)
+        if head is None or head >= end - KEYFRAME_TOLERANCE:
+            return [('encode', start, end)]
+        tail = self.at_or_before(end)
+        parts = []
+        if head - start > KEYFRAME_TOLERANCE:
+            parts.append(('encode', start, head))
+        if tail - head > KEYFRAME_TOLERANCE:
+            parts.append(('copy', head, tail))
+        if end - tail > KEYFRAME_TOLERANCE:
+            parts.append(('encode', tail, end))
+        return parts
+
+
+def hybrid_seek_args(start, duration, index=None, preroll=SEEK_PREROLL):
+    """
+    重新编码导出的定位参数 -> (输入端参数, 输出端参数)，分别放在 -i 前后。
+    输入端定位到 start 之前的关键帧（index 为 None 或为空时取 start - preroll），
+    输出端 -ss 只需解码并丢弃两者之间的一小段
+    """
+    anchor = index.at_or_before(start) if index is not None and len(index) else None
+    if anchor is None:
+        anchor = max(0.0, start - preroll)
+    anchor = min(anchor, start)
+    offset = start - anchor
+    input_args = ['-ss', '%.6f' % anchor] if anchor > 0 else []
+    output_args = ['-ss', '%.6f' % offset] if offset > KEYFRAME_TOLERANCE else []
+    return input_args, output_args + ['-t', '%.6f' % duration]
+
+
+# ---------- 旁路索引文件 ----------
+def sidecar_path(path):
+    return path + '.kfidx'
+
+
+def _load_sidecar(path, stamp):
+    try:
+        with open(sidecar_path(path), 'rb') as f:
+            magic, version, size, mtime_ns, count = _IDX_HEADER.unpack(f.read(_IDX_HEADER.size))
+            if (magic, version) != (_IDX_MAGIC, _IDX_VERSION) or (size, mtime_ns) != stamp:
+                return None
+            times = array('d')
+            times.frombytes(f.read(count * times.itemsize))
+            return times if len(times) == count else None
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def _save_sidecar(path, stamp, times):
+    tmp = sidecar_path(path) + '.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(_IDX_HEADER.pack(_IDX_MAGIC, _IDX_VERSION, stamp[0], stamp[1], len(times)))
+            f.write(times.tobytes())
+        os.replace(tmp, sidecar_path(path))
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+批量、限速的界面日志（三个工具共用）
+
+功能：
+- 任意线程调用 write() 只把一行放进环形缓冲区，不再每条消息安排一次 after(0) 回调
+- 主线程每 FLUSH_INTERVAL 秒最多刷新一次：一次插入本批全部行、只滚动一次；
+  窗口中只保留最近 MAX_LINES 行，完整日志同时写入磁盘（~/.cache/whisper-subtitle-tools/logs/）
+- 状态栏更新合并：两次刷新之间多次 status() 只显示最后一次
+"""
+
+import os
+import threading
+import datetime
+from collections import deque
+from pathlib import Path
+
+LOG_DIR = Path.home() / ".cache" / "whisper-subtitle-tools" / "logs"
+
+# 刷新间隔（秒）与日志窗口保留的最大行数
+FLUSH_INTERVAL = 0.25
+MAX_LINES = 5000
+
+# 磁盘上每个工具保留的日志文件数
+KEEP_LOGS = 20
+
+
+def open_spool(name):
+    """在 LOG_DIR 下新建本次运行的日志文件（只保留最近 KEEP_LOGS 个）；目录不可写时返回 None"""
+    try:
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        old = sorted(LOG_DIR.glob(f"{name}-*.log"))
+        for path in old[:max(0, len(old) - KEEP_LOGS + 1)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = LOG_DIR / f"{name}-{stamp}-{os.getpid()}.log"
+        return open(path, 'a', encoding='utf-8')
+    except OSError:
+        return None
+
+
+class LogSink:
+    """
+    Text 控件的日志缓冲：write() / status() 线程安全，真正的界面操作都在主线程的定时刷新中完成。
+    on_status(*args, **kwargs) 在主线程中以最后一次 status() 的参数调用
+    """
+
+    def __init__(self, widget, on_status=None, name=None, max_lines=MAX_LINES,
+                 interval=FLUSH_INTERVAL, timestamp=False):
+        self.widget = widget
+        self.on_status = on_status
+        self.max_lines = max_lines
+        self.interval = interval
+        self.timestamp = timestamp
+        self.spool = open_spool(name) if name else None
+        self.spool_path = self.spool.name if self.spool else None
+        # 待显示的行：超过 max_lines 时最早的行只留在磁盘日志里
+        self._pending = deque(maxlen=max_lines)
+        self._dropped = 0
+        self._status = None
+        self._shown_status = None
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    # ---- 任意线程 ----
+    def write(self, message):
+        if self.timestamp:
+            message = f"[{datetime.datetime.now():%H:%M:%S}] {message}"
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(message)
+            if self.spool:
+                try:
+                    self.spool.write(message + '\n')
+                except (OSError, ValueError):
+                    self.spool = None
+            self._schedule()
+
+    __call__ = write
+
+    def status(self, *args, **kwargs):
+        """记录最新的状态栏内容，下次刷新时调用 on_status(*args, **kwargs)"""
+        with self._lock:
+            self._status = (args, kwargs)
+            self._schedule()
+
+    @property
+    def last_status(self):
+        """最近一次 status() 的第一个参数（尚未显示的也算）"""
+        status = self._status or self._shown_status
+        return status[0][0] if status and status[0] else None
+
+    def _schedule(self):
+        # 调用方已持有锁；本批已安排刷新时不再重复安排
+        if self._scheduled:
+            return
+        self._scheduled = True
+        try:
+            self.widget.after(int(self.interval * 1000), self.flush)
+        except Exception:
+            # 窗口已关闭
+            self._scheduled = False
+
+    # ---- 主线程 ----
+    def flush(self):
+        """把缓冲区写入控件并应用最新状态（也可在主线程中直接调用以立即显示）"""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+            status, self._status = self._status, None
+            self._scheduled = False
+            if self.spool:
+                try:
+                    self.spool.flush()
+                except (OSError, ValueError):
+                    self.spool = None
+        if dropped:
+            where = f"，完整日志见 {self.spool_path}" if self.spool_path else ""
+            lines.insert(0, f"…… 省略 {dropped} 行{where}")
+        if lines:
+            self._insert(lines)
+        if status is not None:
+            self._shown_status = status
+            if self.on_status is not None:
+                self.on_status(*status[0], **status[1])
+
+    def _insert(self, lines):
+        w = self.widget
+        try:
+            # 用户向上翻看时不强制滚到底部
+            follow = w.yview()[1] >= 0.999
+            state = w.cget('state')
+            if state == 'disabled':
+                w.configure(state='normal')
+            w.insert('end', '\n'.join(lines) + '\n')
+            count = int(w.index('end-1c').split('.')[0]) - 1
+            if count > self.max_lines:
+                w.delete('1.0', f'{count - self.max_lines + 1}.0')
+            if state == 'disabled':
+                w.configure(state='disabled')
+            if follow:
+                w.see('end')
+        except Exception:
+            # 窗口已关闭
+            pass
+
+    def clear(self):
+        """清空控件与尚未显示的行（磁盘日志保留）"""
+        with self._lock:
+            self._pending.clear()
+            self._dropped = 0
+        state = self.widget.cget('state')
+        self.widget.configure(state='normal')
+        self.widget.delete('1.0', 'end')
+        self.widget.configure(state=state)
+
+    def text(self):
+        """完整日志文本：有磁盘日志时读取磁盘日志，否则为控件中的内容"""
+        self.flush()
+        if self.spool_path:
+            try:
+                with open(self.spool_path, encoding='utf-8') as f:
+                    return f.read()
+            except OSError:
+                pass
+        return self.widget.get('1.0', 'end-1c')
+
+    def close(self):
+        with self._lock:
+            spool, self.spool = self.spool, None
+        if spool:
+            spool.close()
+
+
+class StatusVar:
+    """
+    tk.StringVar 的线程安全替身：set() 交给 LogSink 合并，刷新时才写入界面；
+    用于把状态变量传给在工作线程中更新进度的函数
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def set(self, value):
+        self.sink.status(value)
+
+    def get(self):
+        return self.sink.last_status or ''
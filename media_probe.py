@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+媒体信息探测与缓存（三个工具共用）
+
+功能：
+- 每个文件只运行一次 ffprobe，一次取回时长、码率、容器格式和所有流的编码参数
+- 结果缓存在 SQLite（~/.cache/whisper-subtitle-tools/media_probe.sqlite），以 路径 + 大小 + 修改时间
+  为键：文件未变时直接读缓存，替换或修改后自动重新探测
+- probe_many 并行探测整个文件夹，未命中缓存的文件才启动 ffprobe
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_PATH = Path.home() / ".cache" / "whisper-subtitle-tools" / "media_probe.sqlite"
+
+# 并行探测的最大进程数（ffprobe 主要等磁盘读文件头）
+PROBE_WORKERS = 8
+
+_STREAM_KEYS = ('index', 'codec_type', 'codec_name', 'profile', 'pix_fmt', 'width', 'height',
+                'r_frame_rate', 'time_base', 'sample_rate', 'channels', 'bit_rate', 'duration')
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _db():
+    """打开（必要时创建）缓存库；不可用时返回 None，只是不缓存"""
+    global _conn
+    if _conn is None:
+        try:
+            CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(CACHE_PATH), timeout=5, check_same_thread=False)
+            conn.execute("CREATE TABLE IF NOT EXISTS probes ("
+                         "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, info TEXT)")
+            conn.commit()
+            _conn = conn
+        except (OSError, sqlite3.Error):
+            _conn = False
+    return _conn or None
+
+
+def _key(path):
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return path, st.st_size, st.st_mtime_ns
+
+
+def _cached(key):
+    with _lock:
+        conn = _db()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute("SELECT size, mtime_ns, info FROM probes WHERE path = ?", (key[0],)).fetchone()
+        except sqlite3.Error:
+            return None
+    if row is None or tuple(row[:2]) != key[1:]:
+        return None
+    return json.loads(row[2])
+
+
+def _store(key, info):
+    with _lock:
+        conn = _db()
+        if conn is None:
+            return
+        try:
+            conn.execute("INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?)",
+                         (key[0], key[1], key[2], json.dumps(info, ensure_ascii=False)))
+            conn.commit()
+        except sqlite3.Error:
+            pass
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def run_ffprobe(path, timeout=60):
+    """
+    运行一次 ffprobe -> {'duration', 'bit_rate', 'format_name', 'size', 'streams': [...]}。
+    duration 为秒（未知为 None），streams 只保留常用字段
+    """
+    cmd = ['ffprobe', '-v', 'error', '-show_format', '-show_streams', '-of', 'json', path]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe 失败（返回码 {result.returncode}）: {result.stderr.strip()[-200:]}")
+    data = json.loads(result.stdout or '{}')
+    fmt = data.get('format') or {}
+    streams = [{k: s[k] for k in _STREAM_KEYS if k in s} for s in data.get('streams') or []]
+    duration = _float(fmt.get('duration'))
+    if duration is None:
+        durations = [_float(s.get('duration')) for s in streams]
+        duration = max((d for d in durations if d is not None), default=None)
+    return {
+        'duration': duration,
+        'bit_rate': int(_float(fmt.get('bit_rate')) or 0) or None,
+        'format_name': fmt.get('format_name'),
+        'size': int(_float(fmt.get('size')) or 0) or None,
+        'streams': streams,
+    }
+
+
+def probe(path, use_cache=True):
+    """读取媒体信息（命中缓存时不启动 ffprobe）；文件不存在或探测失败时抛出异常"""
+    key = _key(path)
+    if use_cache:
+        info = _cached(key)
+        if info is not None:
+            return info
+    info = run_ffprobe(key[0])
+    if use_cache:
+        _store(key, info)
+    return info
+
+
+def probe_many(paths, workers=PROBE_WORKERS, use_cache=True):
+    """并行探测多个文件 -> {path: info}；探测失败的文件对应 None"""
+    def one(path):
+        try:
+            return probe(path, use_cache)
+        except Exception:
+            return None
+
+    paths = list(paths)
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths))), thread_name_prefix="probe") as pool:
+        return dict(zip(paths, pool.map(one, paths)))
+
+
+# ---------- 便捷访问 ----------
+def duration(path):
+    """媒体时长（秒），未知或探测失败时返回 None"""
+    try:
+        return probe(path)['duration']
+    except Exception:
+        return None
+
+
+def first_stream(info, codec_type):
+    """info 中第一路 codec_type（'video' / 'audio'）流，没有时返回 None"""
+    for stream in (info or {}).get('streams') or []:
+        if stream.get('codec_type') == codec_type:
+            return stream
+    return None
+
+
+def video_stream(path):
+    """第一路视频流（封面图等 attached_pic 也会计入），没有或探测失败时返回 None"""
+    try:
+        return first_stream(probe(path), 'video')
+    except Exception:
+        return None
+
+
+def has_audio(info):
+    return first_stream(info, 'audio') is not None
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+ONNX Runtime CPU 识别引擎
+
+功能：
+- 一次性把 openai-whisper 的编码器/解码器导出为 ONNX 并缓存（~/.cache/whisper-subtitle-tools/onnx/<模型名>）
+- 编码器同时输出各解码层的 cross-attention K/V；解码器带自注意力 KV 缓存，逐 token 增量解码
+- 首次建会话时开启全部图优化，并把优化后的图写回缓存，之后直接加载
+- 可选对导出的 ONNX 做动态 int8 量化
+- 推理阶段只依赖 onnxruntime + numpy（分词器沿用 openai-whisper），接口与 openai-whisper 的
+  model.transcribe 一致，返回 {'language', 'segments'}，可直接放进 process_video 的 (engine, model)
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+CACHE_DIR = Path.home() / ".cache" / "whisper-subtitle-tools" / "onnx"
+
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+N_SAMPLES = 30 * SAMPLE_RATE        # 每个窗口 30 秒
+N_FRAMES = N_SAMPLES // HOP_LENGTH  # 3000 帧 mel
+INPUT_STRIDE = 2                    # 一个时间戳 token（0.02 秒）对应的 mel 帧数
+TIME_PRECISION = 0.02
+MAX_INITIAL_TIMESTAMP = 1.0
+SAMPLE_LEN = 224
+
+
+# ---------- 导出（需要 torch + openai-whisper，仅首次执行） ----------
+def _export(model_name, out_dir, log):
+    import torch
+    import whisper
+
+    model = whisper.load_model(model_name, device='cpu').float().eval()
+    dims = model.dims
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    def attend(q, k, v, n_head, mask=None):
+        b, tq, d = q.shape
+        tk = k.shape[1]
+        scale = (d // n_head) ** -0.25
+        q = q.reshape(b, tq, n_head, -1).permute(0, 2, 1, 3) * scale
+        k = k.reshape(b, tk, n_head, -1).permute(0, 2, 3, 1) * scale
+        v = v.reshape(b, tk, n_head, -1).permute(0, 2, 1, 3)
+        qk = q @ k
+        if mask is not None:
+            qk = qk + mask
+        w = qk.float().softmax(dim=-1)
+        return (w @ v).permute(0, 2, 1, 3).flatten(start_dim=2)
+
+    class EncoderWithCrossKV(torch.nn.Module):
+        """mel -> 各解码层 cross-attention 的 K/V：[n_layer, 2, 1, 1500, d]"""
+
+        def __init__(self, m):
+            super().__init__()
+            self.encoder = m.encoder
+            self.blocks = m.decoder.blocks
+
+        def forward(self, mel):
+            x = self.encoder(mel)
+            return torch.stack([
+                torch.stack([blk.cross_attn.key(x), blk.cross_attn.value(x)]) for blk in self.blocks
+            ])
+
+    class DecoderStep(torch.nn.Module):
+        """新 token + 历史自注意力 K/V -> logits 与拼接后的 K/V"""
+
+        def __init__(self, m):
+            super().__init__()
+            self.dec = m.decoder
+
+        def forward(self, tokens, cross_kv, self_kv):
+            dec = self.dec
+            past = self_kv.shape[3]
+            t = tokens.shape[1]
+            x = dec.token_embedding(tokens) + dec.positional_embedding[past:past + t]
+            qpos = torch.arange(t).unsqueeze(1) + past
+            kpos = torch.arange(past + t).unsqueeze(0)
+            mask = torch.zeros(t, past + t).masked_fill(kpos > qpos, float('-inf'))
+            new_kv = []
+            for i, blk in enumerate(dec.blocks):
+                h = blk.attn_ln(x)
+                k = torch.cat([self_kv[i, 0], blk.attn.key(h)], dim=1)
+                v = torch.cat([self_kv[i, 1], blk.attn.value(h)], dim=1)
+                new_kv.append(torch.stack([k, v]))
+                x = x + blk.attn.out(attend(blk.attn.query(h), k, v, blk.attn.n_head, mask))
+                h = blk.cross_attn_ln(x)
+                x = x + blk.cross_attn.out(attend(blk.cross_attn.query(h), cross_kv[i, 0], cross_kv[i, 1],
+                                                  blk.cross_attn.n_head))
+                x = x + blk.mlp(blk.mlp_ln(x))
+            x = dec.ln(x)
+            logits = x @ dec.token_embedding.weight.to(x.dtype).T
+            return logits, torch.stack(new_kv)
+
+    export_kwargs = {'opset_version': 17, 'do_constant_folding': True}
+    try:
+        import inspect
+        if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+            export_kwargs['dynamo'] = False
+    except Exception:
+        pass
+
+    log(f"正在导出 ONNX 编码器: {model_name} ...")
+    mel = torch.zeros(1, dims.n_mels, N_FRAMES)
+    with torch.no_grad():
+        torch.onnx.export(EncoderWithCrossKV(model), (mel,), str(out_dir / "encoder.onnx"),
+                          input_names=['mel'], output_names=['cross_kv'], **export_kwargs)
+
+        log(f"正在导出 ONNX 解码器: {model_name} ...")
+        n_layer, d = dims.n_text_layer, dims.n_text_state
+        tokens = torch.zeros(1, 2, dtype=torch.long)
+        cross_kv = torch.zeros(n_layer, 2, 1, dims.n_audio_ctx, d)
+        self_kv = torch.zeros(n_layer, 2, 1, 3, d)
+        torch.onnx.export(DecoderStep(model), (tokens, cross_kv, self_kv), str(out_dir / "decoder.onnx"),
+                          input_names=['tokens', 'cross_kv', 'self_kv'],
+                          output_names=['logits', 'new_self_kv'],
+                          dynamic_axes={'tokens': {1: 'new'}, 'self_kv': {3: 'past'},
+                                        'logits': {1: 'new'}, 'new_self_kv': {3: 'total'}},
+                          **export_kwargs)
+
+    np.save(str(out_dir / "mel_filters.npy"), whisper.audio.mel_filters('cpu', dims.n_mels).numpy())
+    meta = dict(vars(dims))
+    meta['is_multilingual'] = model.is_multilingual
+    meta['num_languages'] = model.num_languages
+    with open(out_dir / "meta.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+
+def _quantize(src, dst):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(str(src), str(dst), weight_type=QuantType.QInt8)
+
+
+def ensure_exported(model_name, cache_dir=None, quantize=False, log_func=None):
+    """确保 ONNX 文件已导出（及量化），返回缓存目录"""
+    log = log_func or (lambda msg: None)
+    out_dir = Path(cache_dir or CACHE_DIR) / model_name
+    if not (out_dir / "meta.json").exists():
+        t0 = time.perf_counter()
+        _export(model_name, out_dir, log)
+        log(f"✅ ONNX 导出完成（{time.perf_counter() - t0:.1f} 秒）: {out_dir}")
+    if quantize:
+        for part in ("encoder", "decoder"):
+            dst = out_dir / f"{part}.int8.onnx"
+            if not dst.exists():
+                log(f"正在对 {part}.onnx 做 int8 动态量化 ...")
+                _quantize(out_dir / f"{part}.onnx", dst)
+    return out_dir
+
+
+# ---------- 特征提取（numpy 实现，与 whisper.log_mel_spectrogram 等价） ----------
+def log_mel_spectrogram(audio, filters):
+    """audio: 16kHz float32 一维数组（长度 N_SAMPLES）-> [n_mels, N_FRAMES]"""
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)
+    padded = np.pad(audio, N_FFT // 2, mode='reflect')
+    n_frames = 1 + (len(padded) - N_FFT) // HOP_LENGTH
+    frames = np.lib.stride_tricks.as_strided(
+        padded, shape=(n_frames, N_FFT), strides=(padded.strides[0] * HOP_LENGTH, padded.strides[0]))
+    magnitudes = (np.abs(np.fft.rfft(frames * window, axis=1)) ** 2)[:-1].T
+    log_spec = np.log10(np.maximum(filters @ magnitudes, 1e-10))
+    log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+    return ((log_spec + 4.0) / 4.0).astype(np.float32)
+
+
+def load_audio(path):
+    """用 ffmpeg 解码为 16kHz 单声道 float32"""
+    import subprocess
+    cmd = ['ffmpeg', '-nostdin', '-threads', '0', '-i', path, '-f', 's16le',
+           '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE), '-']
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+# ---------- 推理 ----------
+class OnnxWhisper:
+    """ONNX Runtime 版 Whisper，transcribe() 的返回值与 openai-whisper 相同"""
+
+    def __init__(self, model_dir, threads=None, quantized=False):
+        model_dir = Path(model_dir)
+        with open(model_dir / "meta.json", encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.filters = np.load(str(model_dir / "mel_filters.npy"))
+        suffix = ".int8" if quantized else ""
+        self.encoder = self._session(model_dir / f"encoder{suffix}.onnx", threads)
+        self.decoder = self._session(model_dir / f"decoder{suffix}.onnx", threads)
+        self.n_layer = self.meta['n_text_layer']
+        self.d_model = self.meta['n_text_state']
+        self.n_text_ctx = self.meta['n_text_ctx']
+
+    @staticmethod
+    def _session(path, threads):
+        opts = ort.SessionOptions()
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        opts.inter_op_num_threads = 1
+        if threads:
+            opts.intra_op_num_threads = int(threads)
+        optimized = path.with_name(path.stem + ".opt.onnx")
+        if optimized.exists():
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            return ort.InferenceSession(str(optimized), opts, providers=['CPUExecutionProvider'])
+        # 首次加载：开启全部图优化，并把优化结果写回缓存
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.optimized_model_filepath = str(optimized)
+        return ort.InferenceSession(str(path), opts, providers=['CPUExecutionProvider'])
+
+    @classmethod
+    def load(cls, model_name, threads=None, quantize=False, cache_dir=None, log_func=None):
+        if ort is None or np is None:
+            raise RuntimeError("未安装 onnxruntime：pip install onnxruntime")
+        model_dir = ensure_exported(model_name, cache_dir=cache_dir, quantize=quantize, log_func=log_func)
+        return cls(model_dir, threads=threads, quantized=quantize)
+
+    def _tokenizer(self, language=None, task='transcribe'):
+        from whisper.tokenizer import get_tokenizer
+        return get_tokenizer(self.meta['is_multilingual'], num_languages=self.meta['num_languages'],
+                             language=language, task=task)
+
+    def _step(self, tokens, cross_kv, self_kv):
+        logits, new_kv = self.decoder.run(None, {
+            'tokens': np.asarray(tokens, dtype=np.int64).reshape(1, -1),
+            'cross_kv': cross_kv,
+            'self_kv': self_kv,
+        })
+        return logits[0, -1].astype(np.float64), new_kv
+
+    def _empty_kv(self):
+        return np.zeros((self.n_layer, 2, 1, 0, self.d_model), dtype=np.float32)
+
+    def _detect_language(self, cross_kv):
+        tok = self._tokenizer()
+        logits, _ = self._step([tok.sot], cross_kv, self._empty_kv())
+        lang_tokens = list(tok.all_language_tokens)
+        best = int(np.argmax(logits[lang_tokens]))
+        return tok.all_language_codes[best]
+
+    def _decode_window(self, tok, cross_kv):
+        """贪心解码一个 30 秒窗口，应用与 openai-whisper 相同的时间戳规则"""
+        tb = tok.timestamp_begin
+        eot = tok.eot
+        suppress = set(tok.non_speech_tokens)
+        suppress.update([tok.transcribe, tok.translate, tok.sot, tok.sot_prev, tok.sot_lm, tok.no_timestamps])
+        if getattr(tok, 'no_speech', None) is not None:
+            suppress.add(tok.no_speech)
+        suppress = np.array(sorted(suppress), dtype=np.int64)
+        blank = np.array(tok.encode(" ") + [eot], dtype=np.int64)
+        max_initial = tb + int(round(MAX_INITIAL_TIMESTAMP / TIME_PRECISION))
+
+        prompt = list(tok.sot_sequence)
+        logits, self_kv = self._step(prompt, cross_kv, self._empty_kv())
+        sampled = []
+        for step in range(SAMPLE_LEN):
+            logits[suppress] = -np.inf
+            if step == 0:
+                logits[blank] = -np.inf
+                logits[:tb] = -np.inf
+                logits[max_initial + 1:] = -np.inf
+            else:
+                last_ts = sampled[-1] >= tb
+                pen_ts = len(sampled) < 2 or sampled[-2] >= tb
+                if last_ts:
+                    if pen_ts:
+                        logits[tb:] = -np.inf
+                    else:
+                        logits[:eot] = -np.inf
+                stamps = [t for t in sampled if t >= tb]
+                if stamps:
+                    floor = stamps[-1] if (last_ts and not pen_ts) else stamps[-1] + 1
+                    logits[tb:floor] = -np.inf
+                # 时间戳总概率高于任一文本 token 时强制输出时间戳
+                m = logits.max()
+                logprobs = logits - (m + np.log(np.exp(logits - m).sum()))
+                ts_lp = logprobs[tb:]
+                ts_max = ts_lp.max()
+                if np.isfinite(ts_max):
+                    ts_sum = ts_max + np.log(np.exp(ts_lp - ts_max).sum())
+                    if ts_sum > logprobs[:tb].max():
+                        logits[:tb] = -np.inf
+            nxt = int(np.argmax(logits))
+            if nxt == eot or len(prompt) + len(sampled) + 1 >= self.n_text_ctx:
+                break
+            sampled.append(nxt)
+            logits, self_kv = self._step([nxt], cross_kv, self_kv)
+        return sampled
+
+    def _segments_from_tokens(self, tok, sampled, offset, window_s):
+        """按时间戳切分为分段，返回 (segments, 实际消费的帧数)"""
+        tb = tok.timestamp_begin
+        is_ts = [t >= tb for t in sampled]
+        single_ending = len(sampled) >= 2 and is_ts[-1] and not is_ts[-2]
+        pairs = [i for i in range(1, len(sampled)) if is_ts[i] and is_ts[i - 1]]
+        if pairs and not single_ending:
+            cut = pairs[-1]
+            consumed = (sampled[cut] - tb) * INPUT_STRIDE
+            sampled = sampled[:cut + 1]
+        else:
+            consumed = None
+
+        segments = []
+        start = None
+        text = []
+        for t in sampled:
+            if t >= tb:
+                ts = (t - tb) * TIME_PRECISION
+                if text and start is not None:
+                    segments.append((start, ts, text))
+                text = []
+                start = ts
+            elif t < tok.eot:
+                text.append(t)
+        if text:
+            segments.append((start or 0.0, window_s, text))
+
+        out = []
+        for s, e, toks in segments:
+            content = tok.decode(toks).strip()
+            if content:
+                out.append({'start': offset + s, 'end': offset + max(s, e), 'text': content})
+        return out, consumed
+
+    def transcribe(self, audio, language=None, task='transcribe', verbose=None, **kwargs):
+        """audio 可为文件路径或 16kHz float32 数组；其余 openai-whisper 参数忽略"""
+        if isinstance(audio, (str, os.PathLike)):
+            audio = load_audio(str(audio))
+        audio = np.asarray(audio, dtype=np.float32)
+        tok = None
+        segments = []
+        seek = 0
+        total_frames = max(1, len(audio) // HOP_LENGTH)
+        while seek < total_frames:
+            chunk = audio[seek * HOP_LENGTH: seek * HOP_LENGTH + N_SAMPLES]
+            window_frames = min(N_FRAMES, total_frames - seek)
+            if len(chunk) < N_SAMPLES:
+                chunk = np.pad(chunk, (0, N_SAMPLES - len(chunk)))
+            mel = log_mel_spectrogram(chunk, self.filters)[np.newaxis]
+            cross_kv = self.encoder.run(None, {'mel': mel})[0]
+            if tok is None:
+                if language is None and self.meta['is_multilingual']:
+                    language = self._detect_language(cross_kv)
+                tok = self._tokenizer(language=language or 'en', task=task)
+            offset = seek * HOP_LENGTH / SAMPLE_RATE
+            sampled = self._decode_window(tok, cross_kv)
+            segs, consumed = self._segments_from_tokens(tok, sampled, offset,
+                                                        window_frames * HOP_LENGTH / SAMPLE_RATE)
+            segments.extend(segs)
+            seek += consumed if consumed else window_frames
+        for i, seg in enumerate(segments):
+            seg['id'] = i
+        return {'language': language or 'en', 'segments': segments,
+                'text': ''.join(seg['text'] for seg in segments)}
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+切割片段规划（三个工具共用）
+
+功能：
+- AI 分析或 SRT 导入得到的片段常有重复、重叠或首尾相接，逐条切割会反复读取同一段媒体
+- 先去重（起止时间到毫秒相同视为同一片段，只导出一次，其余复制文件），再按开始时间排序，
+  把重叠或间隔不超过 merge_gap 秒的片段合并成区间
+- 每个区间只从输入文件顺序读取一次（导出为中间文件），区间内的各个片段再从中间文件裁出
+"""
+
+
+def plan_segments(ranges, merge_gap=0.0):
+    """
+    ranges: [(start, end), ...]（秒，下标即请求编号） -> (spans, stats)
+    spans 按开始时间排序，每项 {'start', 'end', 'clips', 'copies'}：
+      clips 为区间内需要实际导出的片段下标（按开始时间），
+      copies 为 {下标: [与它完全相同的其他请求下标, ...]}，这些请求直接复制导出结果
+    """
+    merge_gap = max(0.0, float(merge_gap or 0.0))
+    stats = {
+        'requested': len(ranges), 'unique': 0, 'duplicates': 0, 'spans': 0, 'merged_spans': 0,
+        'requested_seconds': 0.0, 'read_seconds': 0.0,
+    }
+
+    # 去重：起止时间按毫秒比较，保留最先出现的请求
+    first = {}
+    copies = {}
+    for i, (start, end) in enumerate(ranges):
+        stats['requested_seconds'] += end - start
+        key = (round(start * 1000), round(end * 1000))
+        if key in first:
+            copies.setdefault(first[key], []).append(i)
+            stats['duplicates'] += 1
+        else:
+            first[key] = i
+    unique = sorted(first.values(), key=lambda i: (ranges[i][0], ranges[i][1]))
+    stats['unique'] = len(unique)
+
+    spans = []
+    for i in unique:
+        start, end = ranges[i]
+        if spans and start <= spans[-1]['end'] + merge_gap:
+            span = spans[-1]
+            span['end'] = max(span['end'], end)
+        else:
+            span = {'start': start, 'end': end, 'clips': [], 'copies': {}}
+            spans.append(span)
+        span['clips'].append(i)
+        if i in copies:
+            span['copies'][i] = copies[i]
+
+    stats['spans'] = len(spans)
+    stats['merged_spans'] = sum(1 for span in spans if len(span['clips']) > 1)
+    stats['read_seconds'] = sum(span['end'] - span['start'] for span in spans)
+    return spans, stats
+
+
+def format_stats(stats):
+    saved = stats['requested_seconds'] - stats['read_seconds']
+    return (f"片段规划：请求 {stats['requested']} 个，去重 {stats['duplicates']} 个，"
+            f"合并为 {stats['spans']} 个读取区间（其中 {stats['merged_spans']} 个含多个片段），"
+            f"读取 {stats['read_seconds']:.1f} 秒 / 请求合计 {stats['requested_seconds']:.1f} 秒"
+            + (f"，少读 {saved:.1f} 秒" if saved > 0.05 else ""))
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+基于能量与过零率的语音分布图（识别前跳过静音）
+
+功能：
+- 对解码后的 16kHz PCM 做向量化分帧，计算每帧能量（dBFS）和过零率（ZCR）
+- 以自适应噪声底为基准判定语音帧，平滑后合并为语音区间，两端加缓冲
+- 把语音区间拼接成紧凑音频送入模型，识别结果的时间戳再映射回原始时间轴；
+  跨越区间交界的分段在交界处拆开，不会横跨被跳过的静音
+- 统计跳过的静音秒数；整段都是语音时不做拼接
+- 几乎没有检出语音时（多为录音音量低于阈值下限）判为不可靠，由调用方改为识别完整音频
+"""
+
+import wave
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 16000
+# 检出的语音少于总时长的该比例时认为检测不可靠，不跳过静音
+MIN_SPEECH_RATIO = 0.05
+
+
+def read_wav(path):
+    """读取 16bit PCM WAV 为 float32 单声道数组，返回 (pcm, 采样率)"""
+    with wave.open(path, 'rb') as wf:
+        sr = wf.getframerate()
+        channels = wf.getnchannels()
+        if wf.getsampwidth() != 2:
+            raise ValueError("仅支持 16bit PCM WAV")
+        raw = wf.readframes(wf.getnframes())
+    pcm = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1)
+    return pcm, sr
+
+
+def frame_features(pcm, sr=SAMPLE_RATE, frame_ms=30, hop_ms=10):
+    """分帧计算 (能量 dBFS, 过零率)，一帧一个值"""
+    frame = int(sr * frame_ms / 1000)
+    hop = int(sr * hop_ms / 1000)
+    if len(pcm) < frame:
+        pcm = np.pad(pcm, (0, frame - len(pcm)))
+    n = 1 + (len(pcm) - frame) // hop
+    frames = np.lib.stride_tricks.as_strided(
+        pcm, shape=(n, frame), strides=(pcm.strides[0] * hop, pcm.strides[0]))
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame - 1)
+    return energy_db, zcr
+
+
+def speech_mask(energy_db, zcr, min_db=-55.0, margin_db=6.0, smooth_frames=20):
+    """
+    判定语音帧：能量明显高于噪声底，或能量略高且过零率处于清音范围（擦音、气音）。
+    最后用滑动窗口平滑，消除零星的误判帧。
+    """
+    noise = np.percentile(energy_db, 10)
+    peak = np.percentile(energy_db, 95)
+    threshold = max(min_db, noise + max(margin_db, (peak - noise) * 0.25))
+    voiced = energy_db > threshold
+    unvoiced = (energy_db > max(min_db, noise + margin_db / 2)) & (zcr > 0.15) & (zcr < 0.5)
+    mask = voiced | unvoiced
+    if smooth_frames > 1 and len(mask) >= smooth_frames:
+        kernel = np.ones(smooth_frames) / smooth_frames
+        mask = np.convolve(mask.astype(np.float32), kernel, mode='same') > 0.3
+    return mask
+
+
+def _split_text(text, shares):
+    """按比例把文本切成 len(shares) 段；文本含空格时切点移到最近的空格"""
+    n = len(text)
+    cuts, acc = [0], 0.0
+    for share in shares[:-1]:
+        acc += share
+        c = int(round(n * acc))
+        if ' ' in text:
+            left, right = text.rfind(' ', cuts[-1], c + 1), text.find(' ', c)
+            candidates = [p for p in (left, right) if p >= cuts[-1]]
+            c = min(candidates, key=lambda p: abs(p - c)) if candidates else n
+        cuts.append(max(cuts[-1], c))
+    cuts.append(n)
+    return [text[a:b].strip() for a, b in zip(cuts, cuts[1:])]
+
+
+class SpeechMap:
+    """语音区间列表（原始时间轴，秒）及紧凑音频与原始时间之间的映射"""
+
+    def __init__(self, regions, duration):
+        self.regions = regions
+        self.duration = duration
+        self._compact_starts = []
+        pos = 0.0
+        for start, end in regions:
+            self._compact_starts.append(pos)
+            pos += end - start
+        self.speech_seconds = pos
+
+    @classmethod
+    def from_pcm(cls, pcm, sr=SAMPLE_RATE, hop_ms=10, pad=0.3, min_gap=0.8, min_speech=0.2):
+        """pad：区间两端缓冲秒数；min_gap：小于该值的静音不切开；min_speech：丢弃更短的语音"""
+        duration = len(pcm) / sr
+        energy_db, zcr = frame_features(pcm, sr, hop_ms=hop_ms)
+        mask = speech_mask(energy_db, zcr)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+        hop = hop_ms / 1000.0
+        regions = []
+        for a, b in zip(edges[::2], edges[1::2]):
+            start, end = a * hop, b * hop
+            if end - start < min_speech:
+                continue
+            start, end = max(0.0, start - pad), min(duration, end + pad)
+            if regions and start - regions[-1][1] < min_gap:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((start, end))
+        return cls(regions, duration)
+
+    @property
+    def skipped_seconds(self):
+        return max(0.0, self.duration - self.speech_seconds)
+
+    def is_unreliable(self, min_ratio=MIN_SPEECH_RATIO):
+        """没有或几乎没有检出语音：安静但正常的录音会整体低于能量下限，不能当作没有人说话"""
+        return self.speech_seconds < self.duration * min_ratio
+
+    def is_trivial(self, min_skip=1.0):
+        """跳过的静音太少，不值得拼接"""
+        return self.skipped_seconds < min_skip
+
+    def compact(self, pcm, sr=SAMPLE_RATE):
+        """只保留语音区间的紧凑音频"""
+        if not self.regions:
+            return pcm[:0]
+        return np.concatenate([pcm[int(s * sr):int(e * sr)] for s, e in self.regions])
+
+    def _region_index(self, t, is_end=False):
+        """紧凑音频上的时间所在的区间下标；区间交界处的结束时间归入前一个区间"""
+        i = max(0, bisect_right(self._compact_starts, t) - 1)
+        if is_end and i > 0 and t <= self._compact_starts[i]:
+            i -= 1
+        return i
+
+    def to_original(self, t, is_end=False):
+        """紧凑音频上的时间 -> 原始时间；区间交界处的结束时间归入前一个区间"""
+        if not self.regions:
+            return t
+        i = self._region_index(t, is_end)
+        start, end = self.regions[i]
+        return min(end, start + max(0.0, t - self._compact_starts[i]))
+
+    def remap_segments(self, segments):
+        """
+        把识别分段（及其词级时间戳 'words'）的 start/end 映射回原始时间轴，返回新的分段列表。
+        跨越区间交界的分段拆成每个区间一段：有词级时间戳时按词所在区间分组，
+        否则按分段在各区间内的时长比例切分文本（有空格时在空格处切，不切断单词）
+        """
+        if not self.regions:
+            return segments
+        out = []
+        for seg in segments:
+            start = float(seg.get('start', 0) or 0)
+            end = max(start, float(seg.get('end', 0) or 0))
+            first, last = self._region_index(start), self._region_index(end, is_end=True)
+            words = []
+            for word in seg.get('words') or ():
+                w_start = float(word.get('start', 0) or 0)
+                w_end = max(w_start, float(word.get('end', 0) or 0))
+                # 词按中点归属区间，时间截到该区间内
+                i = self._region_index((w_start + w_end) / 2)
+                r_start, r_end = self.regions[i]
+                word['start'] = min(r_end, max(r_start, self.to_original(w_start)))
+                word['end'] = max(word['start'], min(r_end, self.to_original(w_end, is_end=True)))
+                words.append((i, word))
+            if last <= first:
+                seg['start'] = self.to_original(start)
+                seg['end'] = max(seg['start'], self.to_original(end, is_end=True))
+                out.append(seg)
+            elif words:
+                groups = {}
+                for i, word in words:
+                    groups.setdefault(i, []).append(word)
+                for i in sorted(groups):
+                    group = groups[i]
+                    text = ''.join(w.get('word') or '' for w in group).strip()
+                    if text:
+                        out.append(dict(seg, start=group[0]['start'], end=group[-1]['end'],
+                                        text=text, words=group))
+            else:
+                spans = []
+                for i in range(first, last + 1):
+                    a = max(start, self._compact_starts[i])
+                    b = min(end, self._compact_starts[i] + self.regions[i][1] - self.regions[i][0])
+                    spans.append((a, b))
+                total = sum(b - a for a, b in spans) or 1.0
+                pieces = _split_text((seg.get('text') or '').strip(), [(b - a) / total for a, b in spans])
+                for (a, b), text in zip(spans, pieces):
+                    if text:
+                        p_start = self.to_original(a)
+                        out.append(dict(seg, start=p_start, end=max(p_start, self.to_original(b, is_end=True)),
+                                        text=text))
+        return out
+
+    def summary(self):
+        pct = self.skipped_seconds / self.duration * 100 if self.duration else 0.0
+        return (f"语音 {len(self.regions)} 段，共 {self.speech_seconds:.1f} 秒；"
+                f"跳过静音 {self.skipped_seconds:.1f} 秒（{pct:.0f}%）")
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+SRT 字幕读写（三个工具共用，替代 pysrt 与正则解析）
+
+功能：
+- 单遍流式状态机解析：逐行读取，不把整个文件读入内存，也不构造中间对象
+- 规范的文件和字符串先按空行切块解析（一块一条，时间轴快速路径内联），遇到不规范的块再回落到状态机
+- 容错：缺序号、缺空行、CRLF/BOM、'.' 作毫秒分隔符、毫秒位数不足、时间轴后带坐标等
+- 缓冲写出：按批拼接字符串后一次写入
+- Cue 只保存毫秒整数和文本，时间格式化/解析集中在这里
+"""
+
+import math
+
+# 每批写出的字幕条数
+_WRITE_BATCH = 4096
+
+# str.splitlines 视为换行、按块切分时却不会切开的字符：出现时字符串解析只走逐行状态机
+_OTHER_BREAKS = '\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+
+# 秒转毫秒时的浮点误差容限（以 ULP 计）：1.0005 * 1000 = 1000.4999999999999 应按 1000.5 进位
+TIE_ULPS = 4
+
+
+class Cue:
+    """一条字幕：index 序号，start/end 毫秒，text 文本（可含换行）"""
+
+    __slots__ = ('index', 'start', 'end', 'text')
+
+    def __init__(self, index, start, end, text):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.text = text
+
+    @property
+    def start_s(self):
+        return self.start / 1000.0
+
+    @property
+    def end_s(self):
+        return self.end / 1000.0
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"Cue({self.index}, {format_time(self.start)} --> {format_time(self.end)}, {self.text!r})"
+
+
+# ---------- 时间 ----------
+def parse_time(s):
+    """'HH:MM:SS,mmm' / 'H:MM:SS.mm' / 'MM:SS,mmm' -> 毫秒；格式不对抛 ValueError"""
+    main, _, frac = s.strip().replace('.', ',').partition(',')
+    parts = main.split(':')
+    if len(parts) == 3:
+        h, m, sec = parts
+    elif len(parts) == 2:
+        h = 0
+        m, sec = parts
+    else:
+        raise ValueError(f"时间格式错误: {s}")
+    frac = frac.strip()
+    ms = int(frac[:3].ljust(3, '0')) if frac else 0
+    return ((int(h) * 60 + int(m)) * 60 + int(sec)) * 1000 + ms
+
+
+def format_time(ms, sep=','):
+    """毫秒 -> 'HH:MM:SS,mmm'（负数按 0 处理）"""
+    if ms <= 0:
+        return f"00:00:00{sep}000"
+    ms = int(ms)
+    return "%02d:%02d:%02d%s%03d" % (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, sep, ms % 1000)
+
+
+def to_ms(seconds):
+    """秒 -> 毫秒，按十进制四舍五入（.5 进位），负数截为 0"""
+    y = float(seconds) * 1000.0
+    return max(0, math.floor(y + 0.5 + TIE_ULPS * math.ulp(y)))
+
+
+# 'HH:MM' 前缀 -> 毫秒（同一分钟内的字幕共用，数量有上限）
+_HM_MS = {}
+
+
+def _hm_ms(prefix):
+    ms = _HM_MS.get(prefix)
+    if ms is None:
+        ms = _HM_MS[prefix] = (int(prefix[0:2]) * 60 + int(prefix[3:5])) * 60000
+    return ms
+
+
+def _parse_timing(line):
+    """解析时间轴行，返回 (start_ms, end_ms)，不是时间轴返回 None"""
+    if len(line) >= 29 and line[12:17] == ' --> ' and line[2] == ':' and line[19] == ':':
+        # 快速路径：标准的 'HH:MM:SS,mmm --> HH:MM:SS,mmm'，'SSmmm' 直接就是秒内毫秒数
+        try:
+            return (_hm_ms(line[0:5]) + int(line[6:8] + line[9:12]),
+                    _hm_ms(line[17:22]) + int(line[23:25] + line[26:29]))
+        except ValueError:
+            pass
+    left, arrow, right = line.partition('-->')
+    if not arrow:
+        return None
+    right = right.lstrip('->').strip()
+    if not right:
+        return None
+    try:
+        return parse_time(left.strip().rstrip('-')), parse_time(right.split()[0])
+    except (ValueError, IndexError):
+        return None
+
+
+# ---------- 解析 ----------
+def iter_cues(lines):
+    """
+    流式解析任意行迭代器（文件对象、字符串列表），逐条产出 Cue。
+    时间轴行决定一条字幕的开始；其前紧邻的纯数字行视为序号。
+    """
+    index = None        # 新字幕的序号（时间轴之前的数字行）
+    pending = None      # 空行之后的纯数字行：可能是下一条序号，也可能是正文
+    cur = None          # 当前字幕 [index, start, end, 正文行列表]
+    blank = False       # 当前字幕正文后是否已出现空行
+    auto = 0
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+        if '-->' in line:
+            timing = _parse_timing(line)
+            if timing is not None:
+                if cur is not None:
+                    if pending is None and not blank and cur[3] and cur[3][-1].isdigit():
+                        # 缺空行：上一条最后一行其实是本条序号
+                        pending = cur[3].pop()
+                    yield Cue(cur[0], cur[1], cur[2], '\n'.join(cur[3]))
+                if pending is not None:
+                    index = int(pending)
+                auto = index if index is not None else auto + 1
+                cur = [auto, timing[0], timing[1], []]
+                index = pending = None
+                blank = False
+                continue
+        stripped = line.strip()
+        if cur is None:
+            stripped = stripped.lstrip('\ufeff')
+            if stripped.isdigit():
+                index = int(stripped)
+            continue
+        if not stripped:
+            if cur[3]:
+                blank = True
+            continue
+        if blank and stripped.isdigit():
+            if pending is not None:
+                cur[3].append(pending)
+            pending = stripped
+            continue
+        if pending is not None:
+            # 数字行之后不是时间轴：数字行属于正文
+            cur[3].append(pending)
+            pending = None
+        cur[3].append(stripped)
+    if cur is not None:
+        if pending is not None:
+            cur[3].append(pending)
+        yield Cue(cur[0], cur[1], cur[2], '\n'.join(cur[3]))
+
+
+def _parse_blocks(blocks, cues):
+    """
+    快速路径：按空行切好的块，一块一条字幕，块数远少于行数。
+    解析结果追加到 cues；遇到任何不规范的块返回 False，由逐行状态机重新解析。
+    """
+    append = cues.append
+    hm_get = _HM_MS.get
+    for block in blocks:
+        # 只切出序号行和时间轴行，正文多于一行时再逐行处理
+        lines = block.strip('\n').split('\n', 2)
+        if len(lines) < 2 or not lines[0].isdigit():
+            if lines == ['']:
+                continue
+            return False
+        line = lines[1]
+        # 与 _parse_timing 相同的标准格式快速路径，内联以省去每条两次函数调用
+        start = end = None
+        if len(line) >= 29 and line[12:17] == ' --> ' and line[2] == ':' and line[19] == ':':
+            h0, h1 = hm_get(line[0:5]), hm_get(line[17:22])
+            try:
+                start = (h0 if h0 is not None else _hm_ms(line[0:5])) + int(line[6:8] + line[9:12])
+                end = (h1 if h1 is not None else _hm_ms(line[17:22])) + int(line[23:25] + line[26:29])
+            except ValueError:
+                start = None
+        if start is None:
+            timing = _parse_timing(line.rstrip())
+            if timing is None:
+                return False
+            start, end = timing
+        text = lines[2] if len(lines) == 3 else ''
+        if '\n' in text:
+            body = [ln.strip() for ln in text.split('\n')]
+            if '' in body:
+                # 块内有只含空白的行：逐行状态机把它当作空行处理
+                return False
+            text = '\n'.join(body)
+        else:
+            text = text.strip()
+        if '-->' in text:
+            return False
+        append(Cue(int(lines[0]), start, end, text))
+    return True
+
+
+def _read_blocks(f, chunk_size=1 << 20):
+    """按块读取文件并走 _parse_blocks 快速路径；不规范时返回 None"""
+    cues = []
+    tail = ''
+    while True:
+        chunk = f.read(chunk_size)
+        blocks = (tail + chunk).split('\n\n')
+        tail = blocks.pop() if chunk else ''
+        if not _parse_blocks(blocks, cues):
+            return None
+        if not chunk:
+            return cues
+
+
+def read_srt(path, encoding='utf-8-sig', errors='replace'):
+    """读取 SRT 文件为 Cue 列表（规范文件走按块快速路径，否则逐行容错解析）"""
+    with open(path, 'r', encoding=encoding, errors=errors) as f:
+        cues = _read_blocks(f)
+        if cues is not None:
+            return cues
+        f.seek(0)
+        return list(iter_cues(f))
+
+
+def parse_srt(text):
+    """解析 SRT 字符串为 Cue 列表（规范文本走按块快速路径，否则逐行容错解析）"""
+    text = text.lstrip('\ufeff')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    cues = []
+    if not any(ch in text for ch in _OTHER_BREAKS) and _parse_blocks(text.split('\n\n'), cues):
+        return cues
+    return list(iter_cues(text.splitlines()))
+
+
+# ---------- 写出 ----------
+def iter_srt_blocks(cues, renumber=True):
+    """逐条产出 SRT 文本块"""
+    for i, cue in enumerate(cues, start=1):
+        yield (f"{i if renumber else cue.index}\n"
+               f"{format_time(cue.start)} --> {format_time(cue.end)}\n"
+               f"{cue.text}\n\n")
+
+
+def write_srt(path, cues, encoding='utf-8', renumber=True):
+    """缓冲写出 SRT；renumber=True 时按顺序重新编号（字幕轨自带整批格式化）"""
+    blocks = cues.srt_blocks() if hasattr(cues, 'srt_blocks') else iter_srt_blocks(cues, renumber)
+    batch = []
+    with open(path, 'w', encoding=encoding, newline='\n') as f:
+        for block in blocks:
+            batch.append(block)
+            if len(batch) >= _WRITE_BATCH:
+                f.write(''.join(batch))
+                batch.clear()
+        if batch:
+            f.write(''.join(batch))
+
+
+def dumps(cues, renumber=True):
+    return ''.join(iter_srt_blocks(cues, renumber))
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+超大 SRT 文件的内存映射读取（三个工具共用）
+
+功能：
+- mmap 映射文件，按需解码：逐条产出字幕，不把整个文件读成一个字符串，也不预先构造对象列表
+- 编码检测只看 BOM 和文件头/中/尾的几段采样：UTF-8（含 BOM）、GBK/GB18030、UTF-16（BOM）
+- 按序号随机访问第 N 条：字幕块的字节偏移保存在旁路索引文件 <文件名>.idx 中，
+  源文件大小或修改时间变化后自动重建；目录不可写时只保存在内存里
+- 字幕块的切分在字节上完成（UTF-8 / GBK 中换行和 '-->' 不会出现在多字节字符内部），
+  每条字幕单独解码，解析规则与 srt_io 相同
+"""
+
+import os
+import re
+import mmap
+import struct
+from array import array
+
+import srt_io
+
+_UTF8_BOM = b'\xef\xbb\xbf'
+_UTF16_BOMS = (b'\xff\xfe', b'\xfe\xff')
+
+# 字幕块起点：可选的序号行 + 时间轴行（'H:MM:SS,mmm --> ...' 或 'MM:SS.mmm --> ...'）。
+# 各字段位数不限，与 srt_io.parse_time 一致（'1000:00:01,000' 也是合法时间）；
+# 文件开头的 BOM 可选且不依赖序号行（首条缺序号的 BOM 文件也能匹配）。
+# 字节版用于建偏移索引和切分解码区间，字符串版用于在解码后的文本里切块，两者匹配的位置一致
+_TIME = r'\d+:\d+(?::\d+)?(?:[,.]\d*)?(?![\d:])'
+_CUE_PATTERN = r'^BOM(?:[ \t]*(\d+)[ \t]*\r?\n)?[ \t]*(' + _TIME + r'[ \t]*-+>+[ \t]*' + _TIME + ')'
+_CUE_START = re.compile(_CUE_PATTERN.replace('BOM', r'(?:\xef\xbb\xbf)?').encode('ascii'), re.M)
+_CUE_START_TEXT = re.compile(_CUE_PATTERN.replace('BOM', '\ufeff?'), re.M | re.ASCII)
+
+# 顺序读取时每次解码的字节数（在字幕块边界处截断）
+_CHUNK = 1 << 20
+
+# 旁路索引文件格式：魔数、版本、源文件大小、源文件修改时间(ns)、字幕条数、编码名长度，随后是编码名与偏移数组
+_IDX_MAGIC = b'SRTIDX'
+_IDX_VERSION = 3
+_IDX_HEADER = struct.Struct('<6sHqqqH')
+
+# 编码检测的采样大小（字节）
+_SAMPLE = 64 * 1024
+
+
+def _line_aligned(buf, start, size):
+    """取 [start, start+size) 内完整的行（避免从多字节字符中间截断）"""
+    n = len(buf)
+    if start > 0:
+        nl = buf.find(b'\n', start, min(n, start + size))
+        if nl < 0:
+            return b''
+        start = nl + 1
+    end = min(n, start + size)
+    if end < n:
+        nl = buf.rfind(b'\n', start, end)
+        end = nl + 1 if nl >= 0 else start
+    return bytes(buf[start:end])
+
+
+def detect_encoding(buf):
+    """
+    根据 BOM 和文件头/中/尾三段采样判断编码，不解码整个文件。
+    返回可直接用于 bytes.decode 的编码名：'utf-8-sig' / 'gb18030' / 'utf-16'
+    """
+    head = bytes(buf[:4])
+    if head.startswith(_UTF8_BOM):
+        return 'utf-8-sig'
+    if head[:2] in _UTF16_BOMS:
+        return 'utf-16'
+    n = len(buf)
+    samples = [_line_aligned(buf, pos, _SAMPLE) for pos in sorted({0, max(0, n // 2), max(0, n - _SAMPLE)})]
+    try:
+        for s in samples:
+            s.decode('utf-8')
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        pass
+    try:
+        for s in samples:
+            s.decode('gb18030')
+        return 'gb18030'
+    except UnicodeDecodeError:
+        return 'utf-8-sig'
+
+
+def _cue_at(text, m, end):
+    """
+    text 中由 _CUE_START_TEXT 匹配 m 开始、到 end 结束的字幕块 -> Cue。
+    块内没有序号行时 index 为 None，由调用方按上一条序号 + 1 补上（与 srt_io 一致）；
+    时间轴无法解析时返回 None，交给 _parse_block 逐行处理
+    """
+    line_end = text.find('\n', m.end(), end)
+    if line_end < 0:
+        line_end = end
+    timing = srt_io._parse_timing(text[m.start(2):line_end].rstrip())
+    if timing is None:
+        return None
+    body = text[line_end + 1:end].strip()
+    if '\n' in body:
+        body = '\n'.join([ln.strip() for ln in body.split('\n') if ln.strip()])
+    index = m.group(1)
+    return srt_io.Cue(int(index) if index else None, timing[0], timing[1], body)
+
+
+def _parse_block(text):
+    """逐行容错解析一个字幕块 -> Cue 列表（首条缺序号时 index 为 None）"""
+    first = text.lstrip('\ufeff').lstrip().split('\n', 1)[0].strip()
+    cues = list(srt_io.iter_cues(text.split('\n')))
+    if cues and not first.isdigit():
+        cues[0].index = None
+    return cues
+
+
+class MappedSrt:
+    """
+    内存映射的 SRT 文件。迭代时逐条解析；len() 与 [n] 通过字节偏移索引完成。
+    用完调用 close()，或用 with 语句。
+    """
+
+    def __init__(self, path, encoding=None, errors='replace', use_sidecar=True):
+        self.path = path
+        self.errors = errors
+        self.use_sidecar = use_sidecar
+        self._f = open(path, 'rb')
+        st = os.fstat(self._f.fileno())
+        self._stamp = (st.st_size, st.st_mtime_ns)
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else b''
+        self.encoding = encoding or detect_encoding(self._mm)
+        self._offsets = None
+        self._cues = None       # UTF-16 文件：无法按字节切块，首次随机访问时整体解析
+
+    # ---------- 生命周期 ----------
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._mm = b''
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def _byte_oriented(self):
+        return not self.encoding.lower().replace('_', '-').startswith('utf-16')
+
+    # ---------- 切块 ----------
+    def _iter_offsets(self):
+        """逐条产出字幕块起点（字节偏移）"""
+        for m in _CUE_START.finditer(self._mm):
+            yield m.start()
+
+    def _decode(self, start, end):
+        return self._mm[start:end].decode(self.encoding, self.errors).replace('\r\n', '\n').replace('\r', '\n')
+
+    def _block_start(self, m):
+        """
+        从任意位置搜到的匹配可能缺了序号行（搜索起点落在序号行中间）：
+        紧邻的上一行是纯数字时，块从那一行开始，与从头扫描得到的偏移一致
+        """
+        start = m.start()
+        if start == 0 or self._mm[start:start + 1].isdigit() and b'\n' in m.group():
+            return start
+        mm = self._mm
+        prev_start = mm.rfind(b'\n', 0, start - 1) + 1
+        return prev_start if mm[prev_start:start].strip().isdigit() else start
+
+    def _iter_ranges(self):
+        """把文件切成约 _CHUNK 字节、起止都在字幕块边界上的解码区间"""
+        mm = self._mm
+        n = len(mm)
+        m = _CUE_START.search(mm)
+        pos = m.start() if m else n
+        while pos < n:
+            end = pos + _CHUNK
+            if end < n:
+                m = _CUE_START.search(mm, end)
+                end = self._block_start(m) if m else n
+            else:
+                end = n
+            yield pos, end
+            pos = end
+
+    # ---------- 顺序读取 ----------
+    def __iter__(self):
+        if not self._byte_oriented:
+            with open(self.path, 'r', encoding=self.encoding, errors=self.errors) as f:
+                yield from srt_io.iter_cues(f)
+            return
+        last_index = 0
+        for start, end in self._iter_ranges():
+            text = self._decode(start, end)
+            matches = list(_CUE_START_TEXT.finditer(text))
+            for i, m in enumerate(matches):
+                block_end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+                cue = _cue_at(text, m, block_end)
+                cues = (cue,) if cue is not None else _parse_block(text[m.start():block_end])
+                for cue in cues:
+                    if cue.index is None:
+                        cue.index = last_index + 1
+                    last_index = cue.index
+                    yield cue
+
+    # ---------- 随机访问 ----------
+    def _index(self):
+        if self._offsets is None:
+            self._offsets = (self._load_sidecar() if self.use_sidecar else None)
+            if self._offsets is None:
+                self._offsets = array('q', self._iter_offsets())
+                if self.use_sidecar:
+                    self._save_sidecar(self._offsets)
+        return self._offsets
+
+    def __len__(self):
+        """字幕块数（不规范文件中一个块偶尔会解析出多条字幕，此时以块计）"""
+        if not self._byte_oriented:
+            return len(self._all_cues())
+        return len(self._index())
+
+    def __getitem__(self, n):
+        if not self._byte_oriented:
+            return self._all_cues()[n]
+        offsets = self._index()
+        count = len(offsets)
+        if n < 0:
+            n += count
+        if not 0 <= n < count:
+            raise IndexError(n)
+        cue = self._block(n)
+        if cue.index is None:
+            # 缺序号：向前找最近一条有序号的字幕，按位置差推算
+            k = n - 1
+            while k >= 0:
+                prev = self._block(k)
+                if prev.index is not None:
+                    break
+                k -= 1
+            cue.index = (prev.index if k >= 0 else 0) + (n - k)
+        return cue
+
+    def _block(self, n):
+        offsets = self._offsets
+        end = offsets[n + 1] if n + 1 < len(offsets) else len(self._mm)
+        text = self._decode(offsets[n], end)
+        m = _CUE_START_TEXT.match(text)
+        cue = _cue_at(text, m, len(text)) if m else None
+        return cue if cue is not None else _parse_block(text)[0]
+
+    def _all_cues(self):
+        if self._cues is None:
+            self._cues = list(iter(self))
+        return self._cues
+
+    # ---------- 旁路索引文件 ----------
+    @property
+    def sidecar_path(self):
+        return self.path + '.idx'
+
+    def _load_sidecar(self):
+        try:
+            with open(self.sidecar_path, 'rb') as f:
+                header = f.read(_IDX_HEADER.size)
+                magic, version, size, mtime_ns, count, enc_len = _IDX_HEADER.unpack(header)
+                if (magic, version) != (_IDX_MAGIC, _IDX_VERSION) or (size, mtime_ns) != self._stamp:
+                    return None
+                if f.read(enc_len).decode('ascii') != self.encoding:
+                    return None
+                offsets = array('q')
+                offsets.frombytes(f.read(count * offsets.itemsize))
+                return offsets if len(offsets) == count else None
+        except (OSError, struct.error, UnicodeDecodeError, ValueError):
+            return None
+
+    def _save_sidecar(self, offsets):
+        enc = self.encoding.encode('ascii')
+        tmp = self.sidecar_path + '.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(_IDX_HEADER.pack(_IDX_MAGIC, _IDX_VERSION, self._stamp[0], self._stamp[1],
+                                         len(offsets), len(enc)))
+                f.write(enc)
+                f.write(offsets.tobytes())
+            os.replace(tmp, self.sidecar_path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def iter_srt(path, encoding=None, errors='replace'):
+    """逐条读取 SRT（内存映射，自动检测编码）"""
+    with MappedSrt(path, encoding=encoding, errors=errors, use_sidecar=False) as srt:
+        yield from srt
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+按时间对齐合并双语字幕（替代按下标一一对应）
+
+功能：
+- 源字幕与译文分段都按开始时间排序后做一次双指针扫描，O(n + m)
+- 每条译文分配给与其时间重叠的源字幕；跨多条源字幕时按重叠时长比例切分文本
+  （含空格的文本按词切分，中日韩文本按字切分），多条译文落到同一源字幕时按顺序拼接
+- 与任何源字幕都不重叠的译文归到时间上最近的一条
+- 返回覆盖率统计：有译文的源字幕比例、被译文覆盖的源字幕时长比例、切分/就近分配的译文数
+"""
+
+from subtitle_track import SubtitleTrack
+
+
+def _tokens(text):
+    """返回 (切分单元, 连接符)：有空格按词，否则按字"""
+    if ' ' in text:
+        return text.split(), ' '
+    return list(text), ''
+
+
+def split_text(text, weights):
+    """按权重把文本切成 len(weights) 段（按词/字边界，保持顺序）"""
+    if len(weights) == 1:
+        return [text]
+    tokens, joiner = _tokens(text.strip())
+    total = float(sum(weights)) or 1.0
+    pieces = []
+    acc = 0.0
+    prev = 0
+    for w in weights:
+        acc += w
+        cut = int(round(len(tokens) * acc / total))
+        pieces.append(joiner.join(tokens[prev:cut]))
+        prev = cut
+    return pieces
+
+
+def _as_rows(translated):
+    """译文：SubtitleTrack（毫秒）或 Whisper segments（秒）-> [(start_ms, end_ms, text)]"""
+    if isinstance(translated, SubtitleTrack):
+        return list(translated.rows())
+    return list(SubtitleTrack.from_segments(translated).rows())
+
+
+def align_translations(source, translated):
+    """
+    把译文按时间分配到源字幕。
+    返回 (每条源字幕的译文列表, 统计 dict)。
+    """
+    src_starts, src_ends = source.starts.tolist(), source.ends.tolist()
+    n = len(src_starts)
+    rows = sorted(_as_rows(translated), key=lambda r: r[0])
+    assigned = [[] for _ in range(n)]
+    covered_ms = [0] * n
+    split_count = 0
+    nearest_count = 0
+
+    i = 0
+    for t_start, t_end, text in rows:
+        text = text.strip()
+        if not text or n == 0:
+            continue
+        # 跳过已经整体结束在本译文之前的源字幕（源字幕按时间排列，指针只前进）
+        while i < n and src_ends[i] <= t_start:
+            i += 1
+        j = i
+        overlaps = []
+        while j < n and src_starts[j] < t_end:
+            ov = min(src_ends[j], t_end) - max(src_starts[j], t_start)
+            if ov > 0:
+                overlaps.append((j, ov))
+            j += 1
+        if not overlaps:
+            # 不与任何源字幕重叠：归到最近的一条
+            mid = (t_start + t_end) / 2
+            cand = [k for k in (i - 1, i) if 0 <= k < n]
+            k = min(cand, key=lambda c: abs((src_starts[c] + src_ends[c]) / 2 - mid))
+            assigned[k].append(text)
+            nearest_count += 1
+            continue
+        if len(overlaps) > 1:
+            split_count += 1
+        pieces = split_text(text, [ov for _, ov in overlaps])
+        for (k, ov), piece in zip(overlaps, pieces):
+            covered_ms[k] += ov
+            if piece:
+                assigned[k].append(piece)
+
+    total_ms = sum(max(0, e - s) for s, e in zip(src_starts, src_ends))
+    covered = sum(min(c, max(0, e - s)) for c, s, e in zip(covered_ms, src_starts, src_ends))
+    stats = {
+        'source_cues': n,
+        'translated_segments': len(rows),
+        'cues_with_translation': sum(1 for a in assigned if a),
+        'time_coverage': covered / total_ms if total_ms else 0.0,
+        'split_segments': split_count,
+        'nearest_segments': nearest_count,
+    }
+    return assigned, stats
+
+
+def merge_bilingual(source, translated, joiner=' '):
+    """源字幕轨 + 译文 -> (双语字幕轨, 统计)；没有译文的源字幕保持原文"""
+    assigned, stats = align_translations(source, translated)
+    texts = [f"{text}\n{joiner.join(parts)}" if parts else text
+             for text, parts in zip(source.texts, assigned)]
+    return source.with_texts(texts), stats
+
+
+def format_stats(stats):
+    n = stats['source_cues'] or 1
+    return (f"{stats['cues_with_translation']}/{stats['source_cues']} 条源字幕有译文"
+            f"（{stats['cues_with_translation'] / n * 100:.1f}%），时长覆盖 {stats['time_coverage'] * 100:.1f}%；"
+            f"译文 {stats['translated_segments']} 段，跨字幕切分 {stats['split_segments']} 段，"
+            f"就近分配 {stats['nearest_segments']} 段")
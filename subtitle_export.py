@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+多格式字幕导出（SRT / VTT / ASS / JSON / TSV，三个工具共用）
+
+功能：
+- 从同一条内存字幕轨一次遍历同时写出多种格式，时间戳只整批格式化一次
+- 每种格式一个编码器（文件头 / 逐条 / 文件尾），各自缓冲后成批写盘
+- 导出格式按任务选择：formats 可以是 ('srt', 'vtt') 这样的序列，也可以是 "srt,vtt" 字符串
+"""
+
+import json
+
+from srt_io import _WRITE_BATCH
+from subtitle_time import format_ms
+
+FORMATS = ('srt', 'vtt', 'ass', 'json', 'tsv')
+DEFAULT_FORMATS = ('srt',)
+
+
+# ---------- 编码器 ----------
+class _SrtEncoder:
+    def header(self, meta):
+        return ''
+
+    def row(self, n, start, end, start_str, end_str, text):
+        return f"{n}\n{start_str} --> {end_str}\n{text}\n\n"
+
+    def footer(self):
+        return ''
+
+
+class _VttEncoder:
+    def header(self, meta):
+        return "WEBVTT\n\n"
+
+    def row(self, n, start, end, start_str, end_str, text):
+        return f"{start_str.replace(',', '.')} --> {end_str.replace(',', '.')}\n{text}\n\n"
+
+    def footer(self):
+        return ''
+
+
+def _ass_time(ms):
+    """毫秒 -> ASS 时间 H:MM:SS.cc（百分之一秒，四舍五入）"""
+    cs = (ms + 5) // 10
+    return "%d:%02d:%02d.%02d" % (cs // 360000, cs // 6000 % 60, cs // 100 % 60, cs % 100)
+
+
+class _AssEncoder:
+    def header(self, meta):
+        title = (meta or {}).get('title', '')
+        return (
+            "[Script Info]\n"
+            f"Title: {title}\n"
+            "ScriptType: v4.00+\n"
+            "WrapStyle: 0\n"
+            "PlayResX: 1920\n"
+            "PlayResY: 1080\n"
+            "ScaledBorderAndShadow: yes\n"
+            "\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
+            "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+            "Style: Default,Microsoft YaHei,56,&H00FFFFFF,&H000000FF,&H00000000,&H64000000,"
+            "0,0,0,0,100,100,0,0,1,2,1,2,20,20,40,1\n"
+            "\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        )
+
+    def row(self, n, start, end, start_str, end_str, text):
+        text = text.replace('\r', '').replace('\n', '\\N')
+        return f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},Default,,0,0,0,,{text}\n"
+
+    def footer(self):
+        return ''
+
+
+class _JsonEncoder:
+    """流式写出 {"language": ..., "segments": [...]}，不在内存中拼整个对象"""
+
+    def header(self, meta):
+        head = {k: v for k, v in (meta or {}).items() if k != 'title'}
+        body = json.dumps(head, ensure_ascii=False)[1:-1]
+        return "{" + (body + ", " if body else '') + '"segments": [\n'
+
+    def row(self, n, start, end, start_str, end_str, text):
+        item = json.dumps({'index': n, 'start': start / 1000.0, 'end': end / 1000.0,
+                           'start_ms': start, 'end_ms': end, 'text': text}, ensure_ascii=False)
+        return ("  " if n == 1 else ",\n  ") + item
+
+    def footer(self):
+        return "\n]}\n"
+
+
+class _TsvEncoder:
+    """与 Whisper 的 tsv 输出一致：start/end 为整数毫秒，文本中的制表符和换行替换为空格"""
+
+    def header(self, meta):
+        return "start\tend\ttext\n"
+
+    def row(self, n, start, end, start_str, end_str, text):
+        text = text.replace('\t', ' ').replace('\r', '').replace('\n', ' ')
+        return f"{start}\t{end}\t{text}\n"
+
+    def footer(self):
+        return ''
+
+
+_ENCODERS = {
+    'srt': _SrtEncoder,
+    'vtt': _VttEncoder,
+    'ass': _AssEncoder,
+    'json': _JsonEncoder,
+    'tsv': _TsvEncoder,
+}
+
+
+def parse_formats(formats):
+    """'srt,vtt' / ['SRT', 'vtt'] -> ('srt', 'vtt')；去重保持顺序，未知格式抛 ValueError，空则为 SRT"""
+    if formats is None:
+        return DEFAULT_FORMATS
+    if isinstance(formats, str):
+        formats = formats.replace(';', ',').split(',')
+    out = []
+    for fmt in formats:
+        fmt = fmt.strip().lower().lstrip('.')
+        if not fmt:
+            continue
+        if fmt not in _ENCODERS:
+            raise ValueError(f"不支持的字幕格式: {fmt}（可选: {', '.join(FORMATS)}）")
+        if fmt not in out:
+            out.append(fmt)
+    return tuple(out) or DEFAULT_FORMATS
+
+
+# ---------- 导出 ----------
+def export_track(track, base_path, formats=DEFAULT_FORMATS, encoding='utf-8', meta=None):
+    """
+    把字幕轨一次遍历写成多种格式。
+    base_path 不带扩展名（如 out/video），按格式追加 .srt/.vtt/...；返回写出的文件路径列表。
+    meta 为可选的附加信息（如 {'language': 'zh', 'title': 'video'}），写入 JSON 头部与 ASS 标题。
+    """
+    formats = parse_formats(formats)
+    encoders = [_ENCODERS[fmt]() for fmt in formats]
+    paths = [f"{base_path}.{fmt}" for fmt in formats]
+    starts, ends = track.starts, track.ends
+    start_strs, end_strs = format_ms(starts), format_ms(ends)
+
+    files = []
+    try:
+        for path in paths:
+            files.append(open(path, 'w', encoding=encoding, newline='\n'))
+        batches = [[enc.header(meta)] for enc in encoders]
+        rows = zip(starts, ends, start_strs, end_strs, track.texts)
+        for n, (start, end, start_str, end_str, text) in enumerate(rows, start=1):
+            for enc, batch in zip(encoders, batches):
+                batch.append(enc.row(n, start, end, start_str, end_str, text))
+            if n % _WRITE_BATCH == 0:
+                for f, batch in zip(files, batches):
+                    f.write(''.join(batch))
+                    batch.clear()
+        for f, enc, batch in zip(files, encoders, batches):
+            batch.append(enc.footer())
+            f.write(''.join(batch))
+    finally:
+        for f in files:
+            f.close()
+    return paths
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+字幕时间区间索引（三个工具共用）
+
+功能：
+- 每条字幕轨建一次索引：按开始时间排序，再在结束时间上建最大值线段树（叶子为 16 条一块）
+- 区间查询（哪些字幕与 00:41:10–00:43:00 重叠）和时间点查询（某一时刻正在显示哪些字幕）：
+  二分找出开始时间满足条件的前缀，再沿线段树只进入最大结束时间超过查询起点的子树，
+  耗时 O((1 + 命中数) · log n)；开头有一条很长的字幕也不会退化成从头扫描
+- 直接取出任意剪辑区间内的字幕文本
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from subtitle_track import SubtitleTrack
+
+# 线段树叶子块大小：块内直接线性扫描，减少树的层数
+_LEAF = 16
+
+
+class IntervalIndex:
+    """
+    字幕轨的只读区间索引（毫秒）。建好后与原轨独立：原轨之后平移/缩放不会反映到索引里。
+    查询返回原轨中的下标（从 0 开始），按开始时间排序。
+    """
+
+    __slots__ = ('_order', '_starts', '_ends', '_tree', '_size', '_texts')
+
+    def __init__(self, track):
+        starts, ends = track.starts.tolist(), track.ends.tolist()
+        order = list(range(len(starts)))
+        if any(starts[i] > starts[i + 1] for i in range(len(starts) - 1)):
+            order.sort(key=starts.__getitem__)
+        self._order = order
+        self._starts = array('q', (starts[i] for i in order))
+        self._ends = array('q', (ends[i] for i in order))
+        self._texts = track.texts
+        # 最大结束时间线段树：_tree[size + b] 为第 b 块的最大值，_tree[i] = max(左右子节点)
+        blocks = -(-len(order) // _LEAF)
+        size = 1
+        while size < blocks:
+            size *= 2
+        ends = self._ends
+        tree = array('q', [-1]) * (2 * size)
+        for b in range(blocks):
+            tree[size + b] = max(ends[b * _LEAF:(b + 1) * _LEAF])
+        for i in range(size - 1, 0, -1):
+            tree[i] = max(tree[2 * i], tree[2 * i + 1])
+        self._tree = tree
+        self._size = size
+
+    @classmethod
+    def from_srt(cls, path, **kwargs):
+        return cls(SubtitleTrack.from_srt(path, **kwargs))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def _positions(self, start_ms, end_ms):
+        """命中字幕在排序后的位置：开始时间 < end_ms（点查询为 <=）且结束时间 > start_ms"""
+        if end_ms <= start_ms:
+            hi = bisect_right(self._starts, start_ms)
+        else:
+            hi = bisect_left(self._starts, end_ms)
+        if hi == 0:
+            return []
+        tree, size, ends = self._tree, self._size, self._ends
+        last_block = (hi - 1) // _LEAF
+        out = []
+        # (节点, 覆盖的第一块, 块数)；先压右子树，保证按位置升序输出
+        stack = [(1, 0, size)]
+        while stack:
+            node, first, count = stack.pop()
+            if first > last_block or tree[node] <= start_ms:
+                continue
+            if count == 1:
+                base = first * _LEAF
+                out.extend(k for k in range(base, min(base + _LEAF, hi)) if ends[k] > start_ms)
+                continue
+            half = count // 2
+            stack.append((2 * node + 1, first + half, half))
+            stack.append((2 * node, first, half))
+        return out
+
+    # ---------- 查询 ----------
+    def overlapping(self, start_ms, end_ms):
+        """与 [start_ms, end_ms) 重叠的字幕下标；start_ms == end_ms 时按时间点查询"""
+        order = self._order
+        return [order[k] for k in self._positions(start_ms, end_ms)]
+
+    def at(self, t_ms):
+        """时刻 t_ms 正在显示的字幕下标（start <= t < end）"""
+        return self.overlapping(t_ms, t_ms)
+
+    def rows(self, start_ms, end_ms):
+        """与区间重叠的字幕 [(start_ms, end_ms, text), ...]，按开始时间排序"""
+        return [(self._starts[k], self._ends[k], self._texts[self._order[k]])
+                for k in self._positions(start_ms, end_ms)]
+
+    def text_between(self, start_ms, end_ms, sep=' '):
+        """取出与剪辑区间重叠的字幕文本，按时间顺序拼接（字幕内的换行替换为空格）"""
+        return sep.join(text.replace('\n', ' ') for _, _, text in self.rows(start_ms, end_ms) if text)
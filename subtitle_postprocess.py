@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+字幕后处理：按播放器约束重新断句、合并与换行（三个工具共用）
+
+功能：
+- 约束可配置：每行最大宽度、最多行数、每秒字数（CPS）、最短/最长时长、合并时允许的最大间隔
+- 宽度按显示列计算：中日韩文字和全角符号算 2 列，其余算 1 列，中英文混排用同一套规则
+- 过长的分段按词（英文等）或按字（中日韩）切开，优先在标点处断开；有词级时间戳时用真实时间，
+  否则按宽度比例插值
+- 过短的分段（时长或字数不足）与相邻分段合并
+- 时长不足或字数过密时在不与下一条重叠的前提下延长结束时间，最后把超宽文本均衡换行；
+  每个换行点都保证前后两部分都不超过行宽（单个单词本身超宽时除外）
+- 整体单次线性扫描；已满足约束的分段不做分词，常见的两行换行不走通用切分。
+  benchmarks/bench_postprocess.py 的 10 万条分段（约 1 万条需切分、5 万条需换行）约 0.8 秒
+"""
+
+import re
+from math import ceil
+
+from subtitle_track import SubtitleTrack
+from subtitle_time import seconds_to_ms
+
+DEFAULT_RULES = {
+    'max_width': 42,          # 每行最大显示宽度（列；中日韩文字算 2 列）
+    'max_lines': 2,           # 每条字幕最多行数
+    'max_cps': 18,            # 每秒最多显示列数（约合英文 17 字符/秒、中文 9 字/秒）
+    'min_duration_ms': 1000,  # 最短显示时长
+    'max_duration_ms': 7000,  # 最长显示时长
+    'min_width': 8,           # 少于该宽度的分段尝试与相邻分段合并
+    'merge_gap_ms': 500,      # 合并时两段之间允许的最大间隔
+    'min_gap_ms': 40,         # 延长结束时间时与下一条保留的间隔
+}
+
+_CJK = '\u1100-\u11ff\u2e80-\u9fff\ua960-\ua97f\uac00-\ud7ff\uf900-\ufaff\ufe30-\ufe4f\uff00-\uff60\uffe0-\uffe6'
+_WIDE = re.compile(f'[{_CJK}]')
+# 切分单元：一个中日韩字符，或一段非空白、非中日韩的连续字符；前导空白归入该单元
+_TOKEN = re.compile(f'\\s*(?:[{_CJK}]|[^\\s{_CJK}]+)')
+_SENTENCE_END = frozenset('.!?。！？…')
+_CLAUSE_END = frozenset(',;:，；：、')
+_PUNCT = _SENTENCE_END | _CLAUSE_END | frozenset('）」』》”’')
+_PUNCT_RE = re.compile('[' + re.escape(''.join(sorted(_PUNCT))) + ']')
+
+
+def text_width(text):
+    """显示宽度：中日韩文字和全角符号算 2 列"""
+    if text.isascii():
+        return len(text)
+    return len(text) + len(_WIDE.findall(text))
+
+
+def make_rules(rules=None):
+    """在默认约束上覆盖部分字段；未知字段抛 ValueError"""
+    merged = dict(DEFAULT_RULES)
+    for key, value in (rules or {}).items():
+        if key not in DEFAULT_RULES:
+            raise ValueError(f"未知的字幕约束: {key}")
+        merged[key] = int(value)
+    return merged
+
+
+def _tokenize(text):
+    """文本 -> [(单元, 宽度)]；中日韩标点紧跟前一个字，不单独成为一行开头"""
+    tokens = []
+    wide = _WIDE.match
+    for tok in _TOKEN.findall(text):
+        # 单元要么是（空白 +）一个中日韩字符，要么不含中日韩字符：只看最后一个字符
+        w = len(tok) + 1 if wide(tok[-1]) else len(tok)
+        if tokens and tok.strip() in _PUNCT:
+            prev, prev_w = tokens[-1]
+            tokens[-1] = (prev + tok, prev_w + w)
+        else:
+            tokens.append((tok, w))
+    return tokens
+
+
+def _timed_tokens(seg, start, end):
+    """
+    分段 -> [(单元, 宽度, 开始毫秒, 结束毫秒)]。
+    有词级时间戳（seg['words']）时使用真实时间，否则按宽度在 [start, end] 内线性插值。
+    """
+    words = seg.get('words') if isinstance(seg, dict) else None
+    if words:
+        out = []
+        for w in words:
+            word, ws, we = w.get('word') or '', w.get('start'), w.get('end')
+            if not word.strip():
+                continue
+            ws_ms = start if ws is None else max(start, min(end, int(round(ws * 1000))))
+            we_ms = ws_ms if we is None else max(ws_ms, min(end, int(round(we * 1000))))
+            out.append((word, text_width(word), ws_ms, we_ms))
+        if out:
+            return out
+    tokens = _tokenize(seg['text'] if isinstance(seg, dict) else seg)
+    total = sum(w for _, w in tokens) or 1
+    span = end - start
+    out, acc = [], 0
+    for tok, w in tokens:
+        t0 = start + span * acc // total
+        acc += w
+        out.append((tok, w, t0, start + span * acc // total))
+    return out
+
+
+def _split_long(tokens, rules):
+    """
+    把一个过长分段的单元切成若干条：按剩余宽度/时长算出还需要几条、每条目标宽度，
+    在句末（过半即可）或分句标点（七成即可）处提前断开，每次断开后对剩余部分重新计算目标
+    """
+    max_total = rules['max_width'] * rules['max_lines']
+    max_dur = rules['max_duration_ms']
+    n = len(tokens)
+    suffix_w = [0] * (n + 1)
+    for k in range(n - 1, -1, -1):
+        suffix_w[k] = suffix_w[k + 1] + tokens[k][1]
+    last_end = tokens[-1][3]
+
+    def plan(k):
+        rem_span = last_end - tokens[k][2]
+        need = max(1, ceil(suffix_w[k] / max_total), ceil(rem_span / max_dur) if max_dur > 0 else 1)
+        return suffix_w[k] / need, need
+
+    bounds = []
+    first, cur_w = 0, 0
+    target, need = plan(0)
+    for k, (text, w, t0, t1) in enumerate(tokens):
+        if k > first and (cur_w + w > max_total or t1 - tokens[first][2] > max_dur
+                          or (need > 1 and cur_w + w > 1.3 * target)):
+            bounds.append((first, k))
+            first, cur_w = k, 0
+            target, need = plan(k)
+        cur_w += w
+        last = text.rstrip()[-1:]
+        if need > 1 and k + 1 < n and ((last in _SENTENCE_END and cur_w >= 0.5 * target)
+                                       or (last in _CLAUSE_END and cur_w >= 0.7 * target)):
+            bounds.append((first, k + 1))
+            first, cur_w = k + 1, 0
+            target, need = plan(k + 1)
+    if first < n:
+        bounds.append((first, n))
+    return [(tokens[i][2], max(tokens[j - 1][3], tokens[i][2]), ''.join(t[0] for t in tokens[i:j]).strip())
+            for i, j in bounds]
+
+
+def _uniform_step(text, width):
+    """每个字符的显示宽度相同时返回该宽度（纯英文 1、纯中日韩 2），混排返回 0"""
+    if width == len(text):
+        return 1
+    if width == 2 * len(text):
+        return 2
+    return 0
+
+
+def _pick_cut(text, lo, hi, ideal, window, step, min_cut=0):
+    """
+    在字符下标 (lo, hi] 内挑一个切分位置：优先 ideal 前后 window 内、标点之后的位置，
+    其次离 ideal 最近的合法位置（英文只能在空格处，中日韩不能让标点落到下一行开头）。
+    小于 min_cut 的位置会让剩余部分放不下，不予考虑；没有合法位置时退回均衡切分点 ideal
+    """
+    n = len(text)
+    first = max(lo + 1, min_cut)
+    a, b = max(first, ideal - window), min(hi, ideal + window, n - 1)
+    best = None
+    if a <= b:
+        for m in _PUNCT_RE.finditer(text, a - 1, b):
+            c = m.end()
+            if step == 1 and text[c] != ' ' or step == 2 and text[c] in _PUNCT:
+                continue
+            if best is None or abs(c - ideal) < abs(best - ideal):
+                best = c
+        if best is not None:
+            return best
+    c = min(max(ideal, first), hi, n - 1)
+    if step == 1:
+        left, right = text.rfind(' ', first, min(ideal, hi) + 1), text.find(' ', max(ideal, first), hi + 1)
+        if left >= first and (right < 0 or ideal - left <= right - ideal):
+            return left
+        if right >= 0:
+            return right
+        # 范围内没有空格（超长单词）：在均衡位置断开，保证每行不超宽
+        return c if c > lo else None
+    k = c
+    while k < min(hi, n - 1) and text[k] in _PUNCT:
+        k += 1
+    if text[k] in _PUNCT:
+        # 右侧直到行宽上限都是标点：改向左找
+        k = c
+        while k > first and text[k] in _PUNCT:
+            k -= 1
+    return k if k > lo else None
+
+
+def _cuts(text, pieces, max_chars, step):
+    """把文本切成 pieces 段、每段不超过 max_chars 个字符的切分下标 [0, ..., len(text)]"""
+    n = len(text)
+    target = n / pieces
+    window = max(1, int(0.3 * target))
+    cuts = [0]
+    for j in range(1, pieces):
+        hi = cuts[-1] + max_chars
+        c = _pick_cut(text, cuts[-1], hi, min(int(round(target * j)), hi), window, step,
+                      n - (pieces - j) * max_chars)
+        if c is None:
+            break
+        cuts.append(c)
+    cuts.append(n)
+    return cuts
+
+
+def _split_uniform(text, start, end, rules, step):
+    """字符宽度一致且没有词级时间戳时的快速切分：按字符下标切，时间按比例插值"""
+    n = len(text)
+    max_total = rules['max_width'] * rules['max_lines']
+    max_dur = rules['max_duration_ms']
+    span = end - start
+    need = max(1, ceil(n * step / max_total), ceil(span / max_dur) if max_dur > 0 else 1)
+    cuts = _cuts(text, need, max_total // step, step)
+    out = []
+    for i, j in zip(cuts, cuts[1:]):
+        piece = text[i:j].strip()
+        if piece:
+            out.append((start + span * i // n, start + span * j // n, piece))
+    return out
+
+
+def wrap_text(text, max_width, width=None):
+    """
+    把超宽文本按词/字边界均衡换行：行数取最少，每个换行点取在目标位置附近，
+    附近有标点时优先在标点后换行
+    """
+    if width is None:
+        width = text_width(text)
+    if width <= max_width:
+        return text
+    n_lines = ceil(width / max_width)
+    step = _uniform_step(text, width)
+    if step and n_lines == 2:
+        # 最常见的两行：只有一个换行点，不走通用切分
+        n, max_chars = len(text), max_width // step
+        c = _pick_cut(text, 0, max_chars, min(int(round(n / 2)), max_chars),
+                      max(1, int(0.3 * (n / 2))), step, n - max_chars)
+        if c is None:
+            return text.strip()
+        first, second = text[:c].strip(), text[c:].strip()
+        return first + '\n' + second if first and second else first or second
+    if step:
+        cuts = _cuts(text, n_lines, max_width // step, step)
+        lines = (text[i:j].strip() for i, j in zip(cuts, cuts[1:]))
+        return '\n'.join(line for line in lines if line)
+    tokens = _tokenize(text)
+    target = width / n_lines
+    cum = [0]
+    for _, w in tokens:
+        cum.append(cum[-1] + w)
+    breaks = [0]
+    k = 1
+    for line in range(1, n_lines):
+        ideal = target * line
+        window = 0.25 * target
+        best, best_cost = None, None
+        # 切点之后剩余的宽度须能放进剩下的行
+        rest = cum[-1] - (n_lines - line) * max_width
+        while k < len(tokens) and cum[k] <= ideal + window:
+            if cum[k] >= ideal - window and rest <= cum[k] <= cum[breaks[-1]] + max_width:
+                cost = abs(cum[k] - ideal) - (window if tokens[k - 1][0].rstrip()[-1:] in _PUNCT else 0)
+                if best_cost is None or cost < best_cost:
+                    best, best_cost = k, cost
+            k += 1
+        if best is None:
+            fits = [j for j in range(breaks[-1] + 1, len(tokens)) if rest <= cum[j] <= cum[breaks[-1]] + max_width]
+            best = min(fits, key=lambda j: abs(cum[j] - ideal)) if fits else max(breaks[-1] + 1, k - 1)
+        if best >= len(tokens):
+            break
+        breaks.append(best)
+        k = best + 1
+    breaks.append(len(tokens))
+    if any(cum[j] - cum[i] > max_width for i, j in zip(breaks, breaks[1:])):
+        # 均衡切分放不下（宽单元分布不均）：逐行尽量填满，行数可能多于 n_lines，但每行不超宽
+        breaks = [0]
+        for k in range(1, len(tokens)):
+            if cum[k + 1] - cum[breaks[-1]] > max_width:
+                breaks.append(k)
+        breaks.append(len(tokens))
+    lines = (''.join(tok for tok, _ in tokens[i:j]).strip() for i, j in zip(breaks, breaks[1:]))
+    return '\n'.join(line for line in lines if line)
+
+
+# ---------- 主流程 ----------
+def _columns(source):
+    """字幕轨或 Whisper segments -> (开始毫秒列表, 结束毫秒列表, 文本列表, 原始分段列表或 None)"""
+    if isinstance(source, SubtitleTrack):
+        return source.starts.tolist(), source.ends.tolist(), source.texts, None
+    starts = seconds_to_ms([seg.get('start', 0) or 0 for seg in source])
+    ends = seconds_to_ms([seg.get('end', 0) or 0 for seg in source])
+    return starts, ends, [(seg.get('text') or '').strip() for seg in source], source
+
+
+def postprocess(source, rules=None):
+    """
+    按约束重新断句/合并/换行。source 为 SubtitleTrack 或 Whisper segments（可带 'words'）。
+    返回 (新字幕轨, 统计 dict)。
+    """
+    rules = make_rules(rules)
+    max_width, max_lines = rules['max_width'], rules['max_lines']
+    max_total = max_width * max_lines
+    max_dur, min_dur = rules['max_duration_ms'], rules['min_duration_ms']
+    min_width, merge_gap = rules['min_width'], rules['merge_gap_ms']
+    stats = {'input': 0, 'output': 0, 'split': 0, 'merged': 0, 'extended': 0, 'wrapped': 0}
+
+    in_starts, in_ends, in_texts, segs = _columns(source)
+    findall = _WIDE.findall
+    in_widths = [len(t) if t.isascii() else len(t) + len(findall(t)) for t in in_texts]
+    stats['input'] = len(in_texts)
+
+    starts, ends, texts, widths = [], [], [], []
+
+    def emit(start, end, text, width):
+        """追加一条；与上一条有一方过短、间隔小且合并后不超限时并入上一条。返回最后一条是否已足够长"""
+        if starts:
+            prev_short = widths[-1] < min_width or ends[-1] - starts[-1] < min_dur
+            cur_short = width < min_width or end - start < min_dur
+            if ((prev_short or cur_short) and start - ends[-1] <= merge_gap
+                    and widths[-1] + width + 1 <= max_total and end - starts[-1] <= max_dur):
+                joiner = '' if _WIDE.match(text[:1]) and _WIDE.match(texts[-1][-1:]) else ' '
+                texts[-1] = texts[-1] + joiner + text
+                widths[-1] += width + len(joiner)
+                ends[-1] = max(ends[-1], end)
+                stats['merged'] += 1
+                return widths[-1] >= min_width and ends[-1] - starts[-1] >= min_dur
+        starts.append(start)
+        ends.append(end)
+        texts.append(text)
+        widths.append(width)
+        return width >= min_width and end - start >= min_dur
+
+    last_ok = False
+    for i, text in enumerate(in_texts):
+        if not text:
+            continue
+        start, width = in_starts[i], in_widths[i]
+        end = max(start, in_ends[i])
+        if width <= max_total and end - start <= max_dur:
+            # 常见情况：本条与上一条都满足长度要求，直接追加
+            if last_ok and width >= min_width and end - start >= min_dur:
+                starts.append(start)
+                ends.append(end)
+                texts.append(text)
+                widths.append(width)
+            else:
+                last_ok = emit(start, end, text, width)
+            continue
+        seg = segs[i] if segs is not None else None
+        step = 0 if seg is not None and seg.get('words') else _uniform_step(text, width)
+        if step:
+            pieces = [(p_start, p_end, p_text, len(p_text) * step)
+                      for p_start, p_end, p_text in _split_uniform(text, start, end, rules, step)]
+        else:
+            tokens = _timed_tokens(seg if seg is not None else text, start, end)
+            if len(tokens) < 2:
+                last_ok = emit(start, end, text, width)
+                continue
+            pieces = [(p_start, p_end, p_text, text_width(p_text))
+                      for p_start, p_end, p_text in _split_long(tokens, rules)]
+        stats['split'] += len(pieces) > 1
+        for piece in pieces:
+            last_ok = emit(*piece)
+
+    # 时长不足或字数过密：延长结束时间，但不与下一条重叠；超宽文本换行
+    max_cps, min_gap = rules['max_cps'], rules['min_gap_ms']
+    n = len(starts)
+    for i in range(n):
+        width = widths[i]
+        need = max(min_dur, width * 1000 // max_cps) if max_cps > 0 else min_dur
+        if ends[i] - starts[i] < min(need, max_dur):
+            need = min(need, max_dur)
+            new_end = starts[i] + need
+            if i + 1 < n:
+                new_end = min(new_end, starts[i + 1] - min_gap)
+            if new_end > ends[i]:
+                ends[i] = new_end
+                stats['extended'] += 1
+        if width > max_width:
+            texts[i] = wrap_text(texts[i], max_width, width)
+            stats['wrapped'] += 1
+
+    stats['output'] = n
+    return SubtitleTrack(starts, ends, texts), stats
+
+
+def format_stats(stats):
+    return (f"{stats['input']} 段 -> {stats['output']} 条；切分 {stats['split']} 段，合并 {stats['merged']} 次，"
+            f"延长 {stats['extended']} 条，换行 {stats['wrapped']} 条")
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+字幕时间戳批量格式化/解析（三个工具共用）
+
+功能：
+- 秒 <-> 毫秒 <-> 'HH:MM:SS,mmm' 的整批转换，一次调用处理整个数组
+- 毫秒舍入规则统一：按十进制四舍五入（0.0005 秒进位为 1 毫秒），不受浮点误差影响
+- 有 numpy 时整批向量化：格式化只剩一次字符串拼接，规范格式的解析直接在字节数组上完成；
+  无 numpy 时退回逐个计算，结果一致
+- 与本地时区无关
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from srt_io import parse_time, to_ms, TIE_ULPS
+
+
+# ---------- 秒 -> 毫秒 ----------
+def seconds_to_ms(seconds):
+    """秒（可迭代）-> 毫秒整数列表；负数截为 0"""
+    if np is not None:
+        y = np.asarray(seconds, dtype=np.float64) * 1000.0
+        ms = np.floor(y + 0.5 + TIE_ULPS * np.spacing(np.abs(y))).astype(np.int64)
+        return np.maximum(ms, 0).tolist()
+    return [to_ms(s) for s in seconds]
+
+
+# ---------- 格式化 ----------
+def format_ms(values, sep=','):
+    """毫秒（可迭代）-> ['HH:MM:SS,mmm', ...]"""
+    if np is not None:
+        ms = np.maximum(np.asarray(values, dtype=np.int64), 0)
+        h, rem = np.divmod(ms, 3600000)
+        m, rem = np.divmod(rem, 60000)
+        s, rem = np.divmod(rem, 1000)
+        fmt = "%02d:%02d:%02d" + sep + "%03d"
+        return [fmt % t for t in zip(h.tolist(), m.tolist(), s.tolist(), rem.tolist())]
+    out = []
+    for v in values:
+        v = max(0, int(v))
+        out.append("%02d:%02d:%02d%s%03d" % (v // 3600000, v // 60000 % 60, v // 1000 % 60, sep, v % 1000))
+    return out
+
+
+def format_seconds(values, sep=','):
+    """秒（可迭代）-> ['HH:MM:SS,mmm', ...]"""
+    return format_ms(seconds_to_ms(values), sep=sep)
+
+
+def format_timestamp(seconds, sep=','):
+    """单个秒数 -> 'HH:MM:SS,mmm'"""
+    v = to_ms(seconds)
+    return "%02d:%02d:%02d%s%03d" % (v // 3600000, v // 60000 % 60, v // 1000 % 60, sep, v % 1000)
+
+
+# ---------- 解析 ----------
+def parse_ms(strings):
+    """
+    ['HH:MM:SS,mmm', ...] -> 毫秒整数列表。
+    规范格式（12 个字符，',' 或 '.' 分隔毫秒）整批在字节数组上解析；
+    其余格式（缺毫秒、毫秒位数不足、MM:SS 等）逐个解析，格式错误抛 ValueError。
+    """
+    strings = [s.strip() for s in strings]
+    if np is None or not strings:
+        return [parse_time(s) for s in strings]
+    canon = [len(s) == 12 and s[2] == ':' and s[5] == ':' and s[8] in ',.' for s in strings]
+    idx = [i for i, ok in enumerate(canon) if ok]
+    out = [0] * len(strings)
+    if idx:
+        try:
+            raw = ''.join(strings[i] for i in idx).encode('ascii')
+        except UnicodeEncodeError:
+            raw = None
+        if raw is not None:
+            d = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 12).astype(np.int64) - 48
+            digits = d[:, [0, 1, 3, 4, 6, 7, 9, 10, 11]]
+            if ((digits >= 0) & (digits <= 9)).all():
+                ms = (((digits[:, 0] * 10 + digits[:, 1]) * 60 + digits[:, 2] * 10 + digits[:, 3]) * 60
+                      + digits[:, 4] * 10 + digits[:, 5]) * 1000 + digits[:, 6] * 100 + digits[:, 7] * 10 + digits[:, 8]
+                for i, v in zip(idx, ms.tolist()):
+                    out[i] = v
+                for i, ok in enumerate(canon):
+                    if not ok:
+                        out[i] = parse_time(strings[i])
+                return out
+    return [parse_time(s) for s in strings]
+
+
+def parse_seconds(strings):
+    """['HH:MM:SS,mmm', ...] -> 秒（float）列表"""
+    return [v / 1000.0 for v in parse_ms(strings)]
+
+
+def parse_timestamp(s):
+    """单个 'HH:MM:SS,mmm' -> 秒（float）"""
+    return parse_time(s) / 1000.0
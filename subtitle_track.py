@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+列式字幕轨（三个工具共用）
+
+功能：
+- 开始/结束时间以毫秒存放在 array('q') 中，文本存放在一个列表里，不为每条字幕创建对象
+- 切片返回共享存储的视图（只记录区间），不复制数据
+- 整体平移/缩放时间：有 numpy 时对底层缓冲区做向量化运算，否则退回逐项循环
+- 可直接从 SRT / Whisper segments 构建，并写回 SRT
+"""
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import srt_io
+from srt_mmap import MappedSrt
+from subtitle_time import seconds_to_ms, format_ms
+
+
+class SubtitleTrack:
+    """
+    字幕轨或其视图。starts/ends/texts 为底层存储，[lo, hi) 为本视图的范围。
+    视图与原轨共享存储：对视图平移/缩放会作用到原轨的对应区间。
+    """
+
+    __slots__ = ('_starts', '_ends', '_texts', '_lo', '_hi')
+
+    def __init__(self, starts=None, ends=None, texts=None, lo=0, hi=None):
+        self._starts = starts if isinstance(starts, array) else array('q', starts or ())
+        self._ends = ends if isinstance(ends, array) else array('q', ends or ())
+        self._texts = texts if texts is not None else []
+        self._lo = lo
+        self._hi = len(self._starts) if hi is None else hi
+
+    # ---------- 构建 ----------
+    @classmethod
+    def from_cues(cls, cues):
+        track = cls()
+        for cue in cues:
+            track.append(cue.start, cue.end, cue.text)
+        return track
+
+    @classmethod
+    def from_srt(cls, path, **kwargs):
+        """读取 SRT（内存映射逐条追加，不保留 Cue 对象；未指定 encoding 时自动检测 UTF-8/GBK）"""
+        with MappedSrt(path, encoding=kwargs.get('encoding'), errors=kwargs.get('errors', 'replace'),
+                       use_sidecar=False) as srt:
+            return cls.from_cues(srt)
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Whisper segments（秒）-> 字幕轨，时间戳整批换算"""
+        starts = [seg.get('start', 0) or 0 for seg in segments]
+        ends = [seg.get('end', start) or 0 for seg, start in zip(segments, starts)]
+        return cls(array('q', seconds_to_ms(starts)), array('q', seconds_to_ms(ends)),
+                   [(seg.get('text') or '').strip() for seg in segments])
+
+    def append(self, start_ms, end_ms, text):
+        if self._lo != 0 or self._hi != len(self._starts):
+            raise ValueError("视图不能追加字幕")
+        self._starts.append(int(start_ms))
+        self._ends.append(int(end_ms))
+        self._texts.append(text)
+        self._hi += 1
+
+    # ---------- 访问 ----------
+    def __len__(self):
+        return self._hi - self._lo
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            lo, hi, step = key.indices(len(self))
+            if step != 1:
+                # 步长不为 1（含倒序）时按 indices 的结果复制出新轨
+                idx = [self._lo + i for i in range(lo, hi, step)]
+                return SubtitleTrack(array('q', (self._starts[i] for i in idx)),
+                                     array('q', (self._ends[i] for i in idx)),
+                                     [self._texts[i] for i in idx])
+            return SubtitleTrack(self._starts, self._ends, self._texts,
+                                 self._lo + lo, self._lo + max(lo, hi))
+        n = len(self)
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError(key)
+        i = self._lo + key
+        return srt_io.Cue(key + 1, self._starts[i], self._ends[i], self._texts[i])
+
+    def __iter__(self):
+        return self.cues()
+
+    @property
+    def starts(self):
+        """开始时间（毫秒）数组（按区间复制一份，避免长期占用底层缓冲区导致无法追加）"""
+        return self._starts[self._lo:self._hi]
+
+    @property
+    def ends(self):
+        return self._ends[self._lo:self._hi]
+
+    @property
+    def texts(self):
+        return self._texts[self._lo:self._hi]
+
+    def rows(self):
+        """逐条产出 (start_ms, end_ms, text)"""
+        s, e, t = self._starts, self._ends, self._texts
+        for i in range(self._lo, self._hi):
+            yield s[i], e[i], t[i]
+
+    def cues(self):
+        """逐条产出临时 Cue（供 srt_io 写出等按对象访问的代码使用）"""
+        for n, (start, end, text) in enumerate(self.rows(), start=1):
+            yield srt_io.Cue(n, start, end, text)
+
+    def duration_ms(self):
+        if not len(self):
+            return 0
+        return self._ends[self._hi - 1] - self._starts[self._lo]
+
+    # ---------- 派生 ----------
+    def copy(self):
+        return SubtitleTrack(self._starts[self._lo:self._hi], self._ends[self._lo:self._hi], self.texts)
+
+    def with_texts(self, texts):
+        """时间轴相同、文本替换后的新轨（时间数组复制一份，互不影响）"""
+        texts = list(texts)
+        if len(texts) != len(self):
+            raise ValueError(f"文本数量 {len(texts)} 与字幕条数 {len(self)} 不一致")
+        track = self.copy()
+        track._texts = texts
+        return track
+
+    def valid(self):
+        """去掉结束时间不大于开始时间的字幕"""
+        track = SubtitleTrack()
+        for start, end, text in self.rows():
+            if end > start:
+                track.append(start, end, text)
+        return track
+
+    # ---------- 时间变换（原地，作用于本视图区间） ----------
+    def _columns(self):
+        if np is None:
+            return None
+        return (np.frombuffer(self._starts, dtype=np.int64)[self._lo:self._hi],
+                np.frombuffer(self._ends, dtype=np.int64)[self._lo:self._hi])
+
+    def shift(self, offset_ms):
+        """整体平移（毫秒，可为负；结果小于 0 的截为 0）"""
+        offset_ms = int(offset_ms)
+        cols = self._columns()
+        if cols is not None:
+            for col in cols:
+                col += offset_ms
+                np.maximum(col, 0, out=col)
+            return self
+        for arr in (self._starts, self._ends):
+            for i in range(self._lo, self._hi):
+                arr[i] = max(0, arr[i] + offset_ms)
+        return self
+
+    def scale(self, factor, origin_ms=0):
+        """以 origin_ms 为原点缩放时间轴（如帧率转换 25/23.976），四舍五入到毫秒"""
+        cols = self._columns()
+        if cols is not None:
+            for col in cols:
+                col[:] = np.rint((col - origin_ms) * float(factor)) + origin_ms
+                np.maximum(col, 0, out=col)
+            return self
+        for arr in (self._starts, self._ends):
+            for i in range(self._lo, self._hi):
+                arr[i] = max(0, int(round((arr[i] - origin_ms) * factor)) + origin_ms)
+        return self
+
+    # ---------- 写出 ----------
+    def srt_blocks(self):
+        """逐条产出 SRT 文本块；时间戳整批格式化"""
+        starts = format_ms(self.starts)
+        ends = format_ms(self.ends)
+        for n, (start, end, text) in enumerate(zip(starts, ends, self.texts), start=1):
+            yield f"{n}\n{start} --> {end}\n{text}\n\n"
+
+    def write_srt(self, path, encoding='utf-8'):
+        srt_io.write_srt(path, self, encoding=encoding)
+
+    def __repr__(self):
+        return f"SubtitleTrack({len(self)} 条, {srt_io.format_time(self.duration_ms())})"
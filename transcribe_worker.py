@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+转录引擎工作进程（AI 工具使用）
+
+功能：
+- Whisper 模型加载、解码、字幕后处理、多格式导出与 Whisper 双语翻译都在独立的子进程中运行，
+  界面进程的 Tk 主循环不再与解码争用 GIL
+- 子进程通过事件队列发回元组 (类型, 数据...)，界面用定时器 poll() 批量读取：
+    ('loaded', 模型说明)            模型加载完成
+    ('log', 文本) / ('status', 文本)  日志与状态栏
+    ('progress', 已完成数, 总数)     每个文件结束后发送
+    ('segments', 输入路径, 字幕轨)   需要 API 翻译时发送最终字幕轨，由界面进程翻译
+    ('done', 汇总)                  一批任务结束（含取消）
+    ('error', 文本)                 模型加载失败，子进程随后退出
+    ('exited', 返回码)              子进程意外退出或被终止（由 poll() 补发）
+- 模型在子进程中常驻，多批任务复用；cancel() 置取消标志，当前文件的解码结束后停止，
+  超过 CANCEL_GRACE 秒仍未结束时终止子进程（之后需重新加载模型）
+"""
+
+import time
+import queue
+import multiprocessing as mp
+from pathlib import Path
+
+from whisper_models import load_openai_model
+from srt_io import write_srt
+from subtitle_track import SubtitleTrack
+from subtitle_align import merge_bilingual, format_stats as format_align_stats
+from subtitle_export import export_track
+from subtitle_postprocess import postprocess, format_stats as format_postprocess_stats
+from job_control import resume_process
+
+# 取消后等待当前文件结束的最长时间（秒），超时终止子进程
+CANCEL_GRACE = 5.0
+
+# 界面读取事件的间隔（毫秒）与每次最多处理的事件数
+POLL_INTERVAL_MS = 100
+POLL_BATCH = 500
+
+
+# ---------- 子进程 ----------
+def segments_to_track(segments, do_postprocess, rules, log):
+    """Whisper segments -> 字幕轨；可选按约束后处理（rules 无效时使用默认约束）"""
+    if not do_postprocess:
+        return SubtitleTrack.from_segments(segments)
+    try:
+        track, stats = postprocess(segments, rules)
+    except ValueError as e:
+        log(f"⚠️ 字幕约束配置无效，使用默认约束: {e}")
+        track, stats = postprocess(segments)
+    log(f"✂️ 字幕后处理: {format_postprocess_stats(stats)}")
+    return track
+
+
+def transcribe_file(model, p_in, options, emit, cancel):
+    """
+    处理一个文件：转录、后处理、导出；options['whisper_translate'] 时用 Whisper 生成英文双语字幕，
+    options['api_target'] 时把字幕轨发回界面进程做 API 翻译
+    """
+    def log(msg):
+        emit('log', msg)
+
+    output_dir = Path(options['output_dir'])
+    if options['postprocess']:
+        # 后处理需要词级时间戳来切分长段；旧版 openai-whisper 不支持时按比例插值
+        try:
+            result = model.transcribe(str(p_in), verbose=False, word_timestamps=True)
+        except TypeError:
+            result = model.transcribe(str(p_in), verbose=False)
+    else:
+        result = model.transcribe(str(p_in), verbose=False)
+
+    language = result.get('language', '未知')
+    log(f"识别到语言: {language.upper()}")
+
+    subtitles = segments_to_track(result['segments'], options['postprocess'],
+                                  options.get('postprocess_rules'), log)
+    written = export_track(subtitles, str(output_dir / f"{p_in.stem}_{language.lower()}"),
+                           options['formats'], meta={'language': language, 'title': p_in.stem})
+    log(f"✅ 原始字幕已保存: {', '.join(Path(p).name for p in written)}")
+    log(f"📂 可在此处找到: {output_dir}")
+
+    if cancel.is_set():
+        return
+    if options.get('whisper_translate'):
+        if language.lower() != 'english':
+            log("🌐 自动翻译 -> 英文 (Whisper translate)")
+            translation_result = model.transcribe(str(p_in), task="translate", verbose=False)
+            srt_path_bilingual = output_dir / f"{p_in.stem}_BILINGUAL_WHISPER.srt"
+            bilingual_subs, stats = merge_bilingual(subtitles, translation_result['segments'])
+            log(f"🔗 双语对齐: {format_align_stats(stats)}")
+            write_srt(str(srt_path_bilingual), bilingual_subs)
+            log(f"✅ 双语字幕 (Whisper) 已保存: {srt_path_bilingual.name}")
+            log(f"📂 可在此处找到: {srt_path_bilingual}")
+        else:
+            log("ℹ️ 源语言已是英文，跳过 Whisper 自动翻译。")
+    if options.get('api_target'):
+        emit('segments', str(p_in), subtitles)
+
+
+def _worker_main(model_name, quantize, commands, events, cancel):
+    def emit(*event):
+        events.put(event)
+
+    try:
+        model = load_openai_model(model_name, quantize=quantize, log_func=lambda msg: emit('log', msg))
+    except Exception as e:
+        emit('error', f"模型加载失败: {e}")
+        return
+    emit('loaded', f"{model_name}, int8" if quantize else model_name)
+
+    while True:
+        command = commands.get()
+        if command is None:
+            break
+        files, options = command
+        processed = failed = 0
+        for i, input_file in enumerate(files):
+            if cancel.is_set():
+                break
+            p_in = Path(input_file)
+            emit('status', f"正在转录 {p_in.name}...")
+            emit('log', f"--- ({i+1}/{len(files)}) 开始处理: {p_in.name} ---")
+            try:
+                transcribe_file(model, p_in, options, emit, cancel)
+                processed += 1
+            except Exception as e:
+                failed += 1
+                emit('log', f"❌ 处理文件 {p_in.name} 失败: {e}")
+            emit('progress', i + 1, len(files))
+        emit('done', {'total': len(files), 'processed': processed, 'failed': failed,
+                      'cancelled': cancel.is_set()})
+
+
+# ---------- 界面进程 ----------
+class TranscribeWorker:
+    """界面进程中的子进程句柄：启动时加载模型，submit() 提交一批文件，poll() 取事件，cancel() 取消"""
+
+    def __init__(self, model_name, quantize=False):
+        # spawn：子进程不继承 Tk 与界面线程的状态
+        ctx = mp.get_context('spawn')
+        self.model_name = model_name
+        self.quantize = quantize
+        self.busy = False
+        self._commands = ctx.Queue()
+        self._events = ctx.Queue()
+        self._cancel = ctx.Event()
+        self._kill_at = None
+        self._exit_reported = False
+        self.process = ctx.Process(target=_worker_main, name='transcribe-worker', daemon=True,
+                                   args=(model_name, quantize, self._commands, self._events, self._cancel))
+        self.process.start()
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def submit(self, files, options):
+        """提交一批文件（options 须可序列化）；上一批结束前不要重复提交"""
+        self._cancel.clear()
+        self.busy = True
+        self._commands.put((list(files), dict(options)))
+
+    def poll(self, limit=POLL_BATCH):
+        """不阻塞地取出已到达的事件；取消超时后在这里终止子进程，子进程退出时补发 ('exited', 返回码)"""
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        for event in events:
+            if event[0] == 'done':
+                self.busy = False
+                self._kill_at = None
+        if self._kill_at is not None and time.monotonic() >= self._kill_at and self.alive:
+            self.process.terminate()
+            self._kill_at = None
+        if not events and not self.alive and not self._exit_reported:
+            self._exit_reported = True
+            self.busy = False
+            events.append(('exited', self.process.exitcode))
+        return events
+
+    def cancel(self):
+        """当前文件结束后停止；CANCEL_GRACE 秒内未结束则终止子进程"""
+        if self.busy and not self._cancel.is_set():
+            self._cancel.set()
+            self._kill_at = time.monotonic() + CANCEL_GRACE
+
+    def close(self, timeout=2.0):
+        """通知子进程退出（释放模型），超时则终止；被暂停挂起的子进程先恢复"""
+        if self.alive:
+            resume_process(self.process.pid)
+            self._cancel.set()
+            self._commands.put(None)
+            self.process.join(timeout)
+            if self.alive:
+                self.process.terminate()
+                self.process.join()
+        self._exit_reported = True
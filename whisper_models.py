@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Whisper 模型管理（三个工具与基准脚本共用）
+
+功能：
+- 统一加载 faster-whisper / openai-whisper / ONNX Runtime，返回 (engine, model) 元组，与 process_video 的接口一致
+- openai-whisper 在 CPU 上可选动态 int8 量化：Linear 层权重量化为 int8，推理时激活动态量化
+- 量化后的权重缓存到磁盘，之后直接载入量化权重，无需再读 fp32 检查点并重新量化；
+  缓存只含张量与基本类型（int8 权重、量化参数、其余 fp32 权重），以 weights_only=True 载入，不反序列化任意对象
+- 非量化模型一次性转换为可内存映射的 fp32 权重文件，之后以 mmap 方式载入：
+  权重页由操作系统页缓存按需读入，多个进程共享同一份只读页，冷启动更快、单进程 RSS 更低
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import whisper
+except ImportError:
+    whisper = None
+
+try:
+    import torch
+    import torch.nn as nn
+except ImportError:
+    torch = None
+    nn = None
+
+try:
+    from faster_whisper import WhisperModel as FWWhisperModel
+except Exception:
+    FWWhisperModel = None
+
+CACHE_DIR = Path.home() / ".cache" / "whisper-subtitle-tools"
+# 量化缓存格式版本：旧版整模块 pickle 的缓存不再载入，会被重新量化覆盖
+QUANT_CACHE_FORMAT = 2
+
+
+# ---------- 量化工具 ----------
+def _select_quant_engine():
+    """x86 使用 fbgemm，ARM（如 Apple Silicon）使用 qnnpack"""
+    engines = torch.backends.quantized.supported_engines
+    for name in ('fbgemm', 'x86', 'qnnpack'):
+        if name in engines:
+            torch.backends.quantized.engine = name
+            return name
+    return torch.backends.quantized.engine
+
+
+def _swap_linear(module, factory):
+    """递归替换所有 nn.Linear（含 whisper 自己的 Linear 子类）"""
+    for child_name, child in module.named_children():
+        if isinstance(child, nn.Linear):
+            setattr(module, child_name, factory(child))
+        else:
+            _swap_linear(child, factory)
+
+
+def _plain_linear(mod):
+    # whisper.model.Linear 是 nn.Linear 的子类，quantize_dynamic 只识别精确类型
+    plain = nn.Linear(mod.in_features, mod.out_features, bias=mod.bias is not None)
+    plain.weight = mod.weight
+    plain.bias = mod.bias
+    return plain
+
+
+def _empty_qlinear(mod):
+    from torch.ao.nn.quantized.dynamic import Linear as QLinear
+    return QLinear(mod.in_features, mod.out_features, bias_=mod.bias is not None, dtype=torch.qint8)
+
+
+@contextmanager
+def _skip_init():
+    """构建骨架模型时跳过随机初始化（权重随后由缓存覆盖）"""
+    classes = (nn.Linear, nn.Embedding, nn.LayerNorm, nn.modules.conv._ConvNd)
+    saved = [(cls, cls.reset_parameters) for cls in classes]
+    try:
+        for cls, _ in saved:
+            cls.reset_parameters = lambda self: None
+        yield
+    finally:
+        for cls, fn in saved:
+            cls.reset_parameters = fn
+
+
+def quantized_cache_path(model_name, cache_dir=None):
+    base = Path(cache_dir) if cache_dir else CACHE_DIR / "int8"
+    version = getattr(whisper, '__version__', 'unknown')
+    return base / f"{model_name}-int8-w{version}-t{torch.__version__.split('+')[0]}.pt"
+
+
+def quantize_openai_model(model):
+    """对 openai-whisper 模型做动态 int8 量化（仅 Linear 层，原地替换）"""
+    _select_quant_engine()
+    model = model.cpu().float().eval()
+    _swap_linear(model, _plain_linear)
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _quantized_checkpoint(model):
+    """量化模型 -> 只含张量与基本类型的检查点：量化 Linear 拆成 int8 权重 + scale/zero_point + bias"""
+    from torch.ao.nn.quantized.dynamic import Linear as QLinear
+    linear = {}
+    for name, mod in model.named_modules():
+        if not isinstance(mod, QLinear):
+            continue
+        weight, bias = mod._weight_bias()
+        entry = {'int8': weight.int_repr(), 'bias': None if bias is None else bias.detach()}
+        if weight.qscheme() in (torch.per_tensor_affine, torch.per_tensor_symmetric):
+            entry.update(scale=float(weight.q_scale()), zero_point=int(weight.q_zero_point()))
+        else:
+            entry.update(scales=weight.q_per_channel_scales(), zero_points=weight.q_per_channel_zero_points(),
+                         axis=int(weight.q_per_channel_axis()))
+        linear[name] = entry
+    prefixes = tuple(name + '.' for name in linear)
+    state = {k: v for k, v in model.state_dict().items()
+             if isinstance(v, torch.Tensor) and not k.startswith(prefixes)}
+    return {'format': QUANT_CACHE_FORMAT, 'dims': vars(model.dims), 'state_dict': state, 'linear': linear}
+
+
+def _qweight(entry):
+    if 'scale' in entry:
+        return torch._make_per_tensor_quantized_tensor(entry['int8'], entry['scale'], entry['zero_point'])
+    return torch._make_per_channel_quantized_tensor(entry['int8'], entry['scales'], entry['zero_points'],
+                                                    entry['axis'])
+
+
+def _load_quantized_from_cache(model_name, path):
+    from whisper.model import ModelDimensions, Whisper
+    # weights_only：缓存目录可被其他程序写入，不能让它借 pickle 执行代码
+    ckpt = torch.load(str(path), map_location='cpu', weights_only=True)
+    if not isinstance(ckpt, dict) or ckpt.get('format') != QUANT_CACHE_FORMAT:
+        raise ValueError("量化缓存格式不匹配")
+    _select_quant_engine()
+    with _skip_init():
+        model = Whisper(ModelDimensions(**ckpt['dims']))
+    _swap_linear(model, _empty_qlinear)
+    linear = ckpt['linear']
+    prefixes = tuple(name + '.' for name in linear)
+    result = model.load_state_dict(ckpt['state_dict'], strict=False)
+    missing = [k for k in result.missing_keys if not k.startswith(prefixes)]
+    if missing or result.unexpected_keys:
+        raise ValueError(f"量化缓存与模型结构不符: {(missing + list(result.unexpected_keys))[:3]}")
+    modules = dict(model.named_modules())
+    for name, entry in linear.items():
+        modules[name].set_weight_bias(_qweight(entry), entry['bias'])
+    _set_alignment_heads(model, model_name)
+    return model.eval()
+
+
+def _set_alignment_heads(model, model_name):
+    heads = getattr(whisper, '_ALIGNMENT_HEADS', {}).get(model_name)
+    if heads is not None:
+        model.set_alignment_heads(heads)
+
+
+def mmap_cache_path(model_name, cache_dir=None):
+    base = Path(cache_dir) if cache_dir else CACHE_DIR / "mmap"
+    version = getattr(whisper, '__version__', 'unknown')
+    return base / f"{model_name}-fp32-w{version}-t{torch.__version__.split('+')[0]}.pt"
+
+
+def _mmap_supported():
+    # torch.load(mmap=True) 与 load_state_dict(assign=True) 需要 torch >= 2.1
+    import inspect
+    try:
+        return 'mmap' in inspect.signature(torch.load).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _load_mmap(model_name, path):
+    from whisper.model import ModelDimensions, Whisper
+    ckpt = torch.load(str(path), map_location='cpu', mmap=True, weights_only=True)
+    with _skip_init():
+        # 骨架参数只是未触碰的 torch.empty，随后被 mmap 张量直接替换，不会占用常驻内存
+        model = Whisper(ModelDimensions(**ckpt['dims']))
+    model.load_state_dict(ckpt['state_dict'], assign=True)
+    _set_alignment_heads(model, model_name)
+    return model.eval()
+
+
+def _convert_to_mmap(model_name, path, log):
+    """读取原始检查点并写出 fp32 连续权重（只执行一次），返回已加载的模型"""
+    model = whisper.load_model(model_name, device='cpu')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        state = {k: v.detach().float().contiguous() for k, v in model.state_dict().items()}
+        torch.save({'dims': vars(model.dims), 'state_dict': state}, str(tmp))
+        os.replace(tmp, path)
+        log(f"💾 已转换为可内存映射的权重文件: {path}")
+    except Exception as e:
+        log(f"⚠️ 写入 mmap 权重失败: {e}")
+    return model
+
+
+def load_openai_model(model_name, quantize=False, cache_dir=None, log_func=None, mmap=True):
+    """
+    加载 openai-whisper 模型。
+    quantize=True 时在 CPU 上使用动态 int8 量化，并把量化权重缓存到 cache_dir。
+    mmap=True（非量化）时从一次性转换好的 fp32 权重文件以内存映射方式载入。
+    """
+    log = log_func or (lambda msg: None)
+    if whisper is None:
+        raise RuntimeError("未安装 openai-whisper：pip install openai-whisper torch")
+    if not quantize:
+        # 有 GPU 时权重会被拷到显存，内存映射没有意义
+        if not mmap or not _mmap_supported() or torch.cuda.is_available():
+            return whisper.load_model(model_name)
+        path = mmap_cache_path(model_name, cache_dir)
+        if path.exists():
+            try:
+                t0 = time.perf_counter()
+                model = _load_mmap(model_name, path)
+                log(f"⚡ 已以内存映射方式载入模型（{time.perf_counter() - t0:.1f} 秒）: {path}")
+                return model
+            except Exception as e:
+                log(f"⚠️ mmap 权重不可用，重新转换: {e}")
+        return _convert_to_mmap(model_name, path, log)
+
+    path = quantized_cache_path(model_name, cache_dir)
+    if path.exists():
+        try:
+            t0 = time.perf_counter()
+            model = _load_quantized_from_cache(model_name, path)
+            log(f"⚡ 已从缓存载入 int8 量化模型（{time.perf_counter() - t0:.1f} 秒）: {path}")
+            return model
+        except Exception as e:
+            log(f"⚠️ 量化缓存不可用，重新量化: {e}")
+
+    t0 = time.perf_counter()
+    model = quantize_openai_model(whisper.load_model(model_name, device='cpu'))
+    log(f"✅ 已完成 int8 动态量化（{time.perf_counter() - t0:.1f} 秒）")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        torch.save(_quantized_checkpoint(model), str(tmp))
+        os.replace(tmp, path)
+        log(f"💾 量化权重已缓存: {path}")
+    except Exception as e:
+        log(f"⚠️ 写入量化缓存失败: {e}")
+    return model
+
+
+# ---------- 统一加载与识别 ----------
+def load_model(engine, model_name, threads=None, quantize=False, log_func=None):
+    """
+    按引擎名加载模型，返回 (engine, model)。
+    engine: 'faster' | 'openai' | 'onnx'；threads 为推理线程数（None 表示库默认）。
+    """
+    if engine == 'faster':
+        if FWWhisperModel is None:
+            raise RuntimeError("未安装 faster-whisper：pip install faster-whisper")
+        cache_dir = Path.home() / ".cache" / "faster-whisper"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        kwargs = {'cpu_threads': threads, 'num_workers': 1} if threads else {}
+        return engine, FWWhisperModel(model_name, device="cpu", compute_type="int8",
+                                      download_root=str(cache_dir), **kwargs)
+    if engine == 'openai':
+        if torch is not None and threads:
+            torch.set_num_threads(threads)
+        return engine, load_openai_model(model_name, quantize=quantize, log_func=log_func)
+    if engine == 'onnx':
+        from onnx_engine import OnnxWhisper
+        return engine, OnnxWhisper.load(model_name, threads=threads, quantize=quantize, log_func=log_func)
+    raise ValueError(f"未知引擎: {engine}")
+
+
+def transcribe(model, audio, language=None, **kwargs):
+    """
+    用 (engine, model) 识别音频（路径或 16kHz float32 数组）。
+    返回 {'language': str, 'segments': [{'start','end','text'}, ...]}
+    """
+    engine, mdl = model if isinstance(model, tuple) else ("openai", model)
+    if engine == 'faster':
+        fw_segments, info = mdl.transcribe(audio, language=language, beam_size=kwargs.pop('beam_size', 5), **kwargs)
+        segments = [{
+            'start': float(seg.start or 0),
+            'end': float(seg.end or 0),
+            'text': seg.text.strip() if getattr(seg, 'text', None) else ''
+        } for seg in fw_segments]
+        return {'language': getattr(info, 'language', language) or '', 'segments': segments}
+    if engine == 'onnx':
+        result = mdl.transcribe(audio, language=language)
+        return {'language': result['language'], 'segments': result['segments']}
+    if getattr(getattr(mdl, 'device', None), 'type', 'cpu') == 'cpu':
+        kwargs.setdefault('fp16', False)
+    result = mdl.transcribe(audio, language=language, verbose=None, **kwargs)
+
+    return {'language': result.get('language', language) or '', 'segments': result.get('segments', [])}
@@ -17,13 +17,14 @@ def _ensure_venv_and_deps():
         _venv.create(_VENV_DIR, with_pip=True)
     # 升级 pip 工具并安装依赖（非致命失败不抛异常）
     _subprocess.run([_PY_BIN, '-m', 'pip', 'install', '--upgrade', 'pip', 'setuptools', 'wheel'], check=False)
-    reqs = ['openai-whisper', 'torch', 'pysrt', 'requests']
+    reqs = ['openai-whisper', 'torch', 'requests']
     _subprocess.run([_PIP_BIN, 'install', *reqs], check=False)
 
 def _relaunch_inside_venv():
     _os.execv(_PY_BIN, [_PY_BIN, __file__, *_sys.argv[1:]])
 
-if not _in_venv():
+# 打包成 exe 时依赖已随程序分发，不创建虚拟环境（spawn 的子进程也会执行到这里）
+if not _in_venv() and not getattr(_sys, 'frozen', False):
     try:
         _ensure_venv_and_deps()
         _relaunch_inside_venv()
@@ -32,7 +33,7 @@ if not _in_venv():
         print('请手动执行:')
         print('  cd ~/Documents/优化设计\\ 四年级上册（福建专版）')
         print('  python3 -m venv whisper_env && source whisper_env/bin/activate')
-        print('  pip install openai-whisper torch pysrt requests')
+        print('  pip install openai-whisper torch requests')
 """
 Whisper 工具 - 完整功能实现版本 (AI API增强 - UI Key输入版)
 核心功能：
@@ -44,8 +45,9 @@ Whisper 工具 - 完整功能实现版本 (AI API增强 - UI Key输入版)
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from pathlib import Path
-import datetime
 import threading
+import queue
+import multiprocessing
 import os
 import subprocess
 import sys
@@ -53,13 +55,19 @@ import json
 import csv
 import requests # 用于调用 DeepSeek API
 
-# 核心依赖：需要安装 pip install openai-whisper torch pysrt requests
+from srt_io import write_srt, format_time
+from subtitle_track import SubtitleTrack
+from subtitle_export import FORMATS as EXPORT_FORMATS
+from log_sink import LogSink
+from transcribe_worker import TranscribeWorker, POLL_INTERVAL_MS
+from job_control import JobControl, Cancelled
+from file_scan import scan, scan_options, format_stats as format_scan_stats, MEDIA_EXTS, SUBTITLE_EXTS
+
+# 核心依赖：需要安装 pip install openai-whisper torch requests
 try:
     import whisper
-    import pysrt
 except ImportError:
     whisper = None
-    pysrt = None
 
 class ImprovedWhisperUI:
     # DeepSeek API 相关配置
@@ -80,7 +88,25 @@ class ImprovedWhisperUI:
         self.output_dir = ''
         self.model_loaded = False
         self.model_name = tk.StringVar(value="small")
-        self.model = None
+        # 转录子进程（模型在子进程中加载并常驻）与当前批次的状态
+        self.worker = None
+        self._worker_polling = False
+        self._notify_loaded = True
+        self._transcribing = False
+        self._api_jobs = None
+        # 运行中任务的暂停/取消令牌（'transcribe' / 'translate' / 'storyboard'）及其按钮
+        self._jobs = {}
+        self._job_buttons = {}
+        self._paused_status = ''
+        # CPU 上对 openai-whisper 做动态 int8 量化（量化权重缓存到 ~/.cache/whisper-subtitle-tools）
+        self.quantize_var = tk.BooleanVar(value=False)
+        # 转录导出格式（可多选，从同一条字幕轨一次写出）
+        self.export_format_vars = {fmt: tk.BooleanVar(value=(fmt == 'srt')) for fmt in EXPORT_FORMATS}
+        # 字幕后处理：按行宽/CPS/时长约束重新断句、合并、换行（约束可在配置文件 postprocess_rules 中覆盖）
+        self.postprocess_var = tk.BooleanVar(value=False)
+        self.postprocess_rules = {}
+        # “添加文件夹”的过滤与排序（配置文件 scan 中设置 include/exclude/min_size_mb/max_duration/sort 等）
+        self.scan_config = {}
         
         # 【新增】用于存储 API Key 的 StringVar 与 API 优先开关
         # 优先读取环境变量，如果没有，则为空
@@ -164,6 +190,13 @@ class ImprovedWhisperUI:
             padx=15
         ).pack(side='left', padx=5)
 
+        tk.Checkbutton(
+            model_frame,
+            text='int8 量化(CPU)',
+            variable=self.quantize_var,
+            command=self._save_config
+        ).pack(side='left', padx=5)
+
         # 新增：手动修复环境按钮（创建/升级 venv 并安装依赖）
         tk.Button(
             model_frame,
@@ -302,8 +335,8 @@ class ImprovedWhisperUI:
                 subprocess.run([py_bin, '-m', 'pip', 'install', '--upgrade', 'pip', 'setuptools', 'wheel'], check=False)
 
                 # 安装依赖
-                self.log("[环境] 安装依赖：openai-whisper, torch, pysrt, requests ...")
-                reqs = ['openai-whisper', 'torch', 'pysrt', 'requests']
+                self.log("[环境] 安装依赖：openai-whisper, torch, requests ...")
+                reqs = ['openai-whisper', 'torch', 'requests']
                 install_proc = subprocess.run([pip_bin, 'install', *reqs], capture_output=True, text=True)
                 if install_proc.returncode != 0:
                     self.log("[环境] 直接安装失败，尝试使用清华源加速...")
@@ -437,6 +470,12 @@ class ImprovedWhisperUI:
             padx=20
         ).pack(side='left', padx=5)
         
+        tk.Button(
+            btn_row,
+            text="📁 添加文件夹",
+            command=lambda: self.add_folder('transcription')
+        ).pack(side='left', padx=5)
+        
         tk.Button(
             btn_row,
             text="🗑️ 清空列表",
@@ -467,6 +506,25 @@ class ImprovedWhisperUI:
             variable=self.auto_translate_var,
             font=('Arial', 10)
         ).pack(anchor='w')
+
+        tk.Checkbutton(
+            options,
+            text="✂️ 按播放器约束重新断句/合并/换行（行宽、每秒字数、最短/最长时长）",
+            variable=self.postprocess_var,
+            command=self._save_config,
+            font=('Arial', 10)
+        ).pack(anchor='w')
+
+        formats_row = tk.Frame(options)
+        formats_row.pack(anchor='w', pady=(5, 0))
+        tk.Label(formats_row, text="📄 导出格式:", font=('Arial', 10)).pack(side='left')
+        for fmt in EXPORT_FORMATS:
+            tk.Checkbutton(
+                formats_row,
+                text=fmt.upper(),
+                variable=self.export_format_vars[fmt],
+                command=self._save_config
+            ).pack(side='left', padx=3)
         
         execute_frame = tk.Frame(list_frame)
         execute_frame.pack(fill='x', pady=10)
@@ -491,6 +549,7 @@ class ImprovedWhisperUI:
             pady=10
         )
         self._btn_transcribe_selected.pack(side='left', padx=5)
+        self._add_job_buttons(execute_frame, 'transcribe')
         
         self.trans_progress = ttk.Progressbar(execute_frame, mode='determinate')
         self.trans_progress.pack(side='right', fill='x', expand=True, padx=10)
@@ -584,6 +643,12 @@ class ImprovedWhisperUI:
             padx=20
         ).pack(side='left', padx=5)
         
+        tk.Button(
+            btn_row,
+            text="📁 添加文件夹",
+            command=lambda: self.add_folder('translation')
+        ).pack(side='left', padx=5)
+        
         tk.Button(
             btn_row,
             text="🗑️ 清空列表",
@@ -627,6 +692,7 @@ class ImprovedWhisperUI:
             pady=10
         )
         self._btn_translate_selected.pack(side='left', padx=5)
+        self._add_job_buttons(execute_frame, 'translate')
         
         self.translate_progress = ttk.Progressbar(execute_frame, mode='determinate')
         self.translate_progress.pack(side='right', fill='x', expand=True, padx=10)
@@ -708,6 +774,12 @@ class ImprovedWhisperUI:
             padx=20
         ).pack(side='left', padx=5)
         
+        tk.Button(
+            btn_row,
+            text="📁 添加文件夹",
+            command=lambda: self.add_folder('storyboard')
+        ).pack(side='left', padx=5)
+        
         tk.Button(
             btn_row,
             text="🗑️ 清空列表",
@@ -760,6 +832,7 @@ class ImprovedWhisperUI:
             pady=10
         )
         self._btn_story_start.pack(side='left', padx=5)
+        self._add_job_buttons(execute_frame, 'storyboard')
         
         self.story_progress = ttk.Progressbar(execute_frame, mode='determinate')
         self.story_progress.pack(side='right', fill='x', expand=True, padx=10)
@@ -788,6 +861,9 @@ class ImprovedWhisperUI:
             wrap='none'
         )
         self.log_text.pack(side='left', fill='both', expand=True)
+        # 日志与状态栏按批刷新（窗口保留最近的行，完整日志另存磁盘）
+        self.log_sink = LogSink(self.log_text, on_status=self._show_status,
+                                name='whisper_tool', timestamp=True)
 
         log_scrollbar_y = tk.Scrollbar(log_container, command=self.log_text.yview)
         log_scrollbar_y.pack(side='right', fill='y')
@@ -796,7 +872,7 @@ class ImprovedWhisperUI:
         log_scrollbar_x.pack(fill='x', padx=10)
         self.log_text.config(xscrollcommand=log_scrollbar_x.set)
         # 复制全部按钮
-        tk.Button(tab, text="📋 复制全部", command=lambda: (self.master.clipboard_clear(), self.master.clipboard_append(self.log_text.get('1.0','end')))).pack(anchor='e', padx=10, pady=(0,10))
+        tk.Button(tab, text="📋 复制全部", command=lambda: (self.master.clipboard_clear(), self.master.clipboard_append(self.log_sink.text()))).pack(anchor='e', padx=10, pady=(0,10))
         
         return tab
 
@@ -823,31 +899,84 @@ class ImprovedWhisperUI:
     # ========== 数据管理和设置 ==========
 
     def load_model(self):
-        """加载 Whisper 模型"""
+        """在转录子进程中加载 Whisper 模型（界面进程不持有模型）"""
         if whisper is None:
-            messagebox.showerror("错误", "缺少核心依赖！请运行: pip install openai-whisper torch pysrt")
+            messagebox.showerror("错误", "缺少核心依赖！请运行: pip install openai-whisper torch")
+            return
+        if self._transcribing:
+            messagebox.showwarning("警告", "转录进行中，请先取消或等待完成！")
             return
         
         self.log("▶️ 正在加载 Whisper 模型...")
         self.master.config(cursor="wait")
-        model_name = self.model_name.get()
+        self._start_worker(self.model_name.get(), self.quantize_var.get())
 
-        def load_target():
-            nonlocal model_name
-            try:
-                self.model = whisper.load_model(model_name)
-                self.model_loaded = True
-                self.model_status_label.config(text=f"● 模型已加载 ({model_name})", fg='green')
-                self.log(f"✅ Whisper 模型 '{model_name}' 加载成功！")
-                self.master.after(0, lambda: messagebox.showinfo("成功", f"模型 '{model_name}' 加载完成！"))
-            except Exception as e:
-                self.model_status_label.config(text="● 模型加载失败", fg='red')
-                self.log(f"❌ 模型加载失败: {e}")
-                self.master.after(0, lambda: messagebox.showerror("错误", f"模型加载失败: {e}"))
-            finally:
-                self.master.after(0, lambda: self.master.config(cursor=""))
-        
-        threading.Thread(target=load_target).start()
+    def _start_worker(self, model_name, quantize, notify=True):
+        """启动（或替换）转录子进程；notify=False 时加载完成后不弹窗（取消后自动重新加载）"""
+        if self.worker is not None:
+            self.worker.close()
+        self.model_loaded = False
+        self._notify_loaded = notify
+        self.worker = TranscribeWorker(model_name, quantize)
+        if not self._worker_polling:
+            self._worker_polling = True
+            self.master.after(POLL_INTERVAL_MS, self._poll_worker)
+
+    def _poll_worker(self):
+        """定时读取转录子进程的事件（主线程）"""
+        worker = self.worker
+        if worker is None:
+            self._worker_polling = False
+            return
+        exited = False
+        for event in worker.poll():
+            self._handle_worker_event(worker, event)
+            exited = exited or event[0] == 'exited'
+        if exited and self.worker is worker:
+            # 子进程已退出且没有重新启动：停止轮询，下次 _start_worker 时再开始
+            self._worker_polling = False
+            return
+        self.master.after(POLL_INTERVAL_MS, self._poll_worker)
+
+    def _handle_worker_event(self, worker, event):
+        kind = event[0]
+        if kind == 'log':
+            self.log(event[1])
+        elif kind == 'status':
+            self._set_status(event[1])
+        elif kind == 'progress':
+            self.trans_progress.config(value=event[1], maximum=event[2])
+        elif kind == 'segments':
+            if self._api_jobs is not None:
+                self._api_jobs.put(event[1:])
+        elif kind == 'done':
+            self._finish_transcription_batch()
+        elif kind == 'loaded':
+            self.model_loaded = True
+            self.model_status_label.config(text=f"● 模型已加载 ({event[1]})", fg='green')
+            self.log(f"✅ Whisper 模型 '{worker.model_name}' 加载成功！")
+            self.master.config(cursor="")
+            if self._notify_loaded:
+                messagebox.showinfo("成功", f"模型 '{worker.model_name}' 加载完成！")
+        elif kind == 'error':
+            self.model_status_label.config(text="● 模型加载失败", fg='red')
+            self.log(f"❌ {event[1]}")
+            self.master.config(cursor="")
+            messagebox.showerror("错误", event[1])
+        elif kind == 'exited':
+            # 取消超时被终止，或子进程意外退出（模型加载失败时已提示过）
+            loaded, self.model_loaded = self.model_loaded, False
+            if self._transcribing:
+                if worker.cancelled:
+                    self.log("⏹ 当前文件未能及时结束，已终止转录进程")
+                else:
+                    self.log(f"❌ 转录进程意外退出（返回码 {event[1]}）")
+                self._finish_transcription_batch()
+            if loaded and worker.cancelled:
+                self.log("▶️ 正在后台重新加载 Whisper 模型...")
+                self._start_worker(worker.model_name, worker.quantize, notify=False)
+            elif loaded:
+                self.model_status_label.config(text="● 模型未加载", fg='red')
 
     def select_output_dir(self):
         """选择/创建输出目录（兼容中文/空格路径，自动校验与创建）。"""
@@ -935,28 +1064,70 @@ class ImprovedWhisperUI:
             self.log(f"❌ {error_msg}")
             messagebox.showerror("错误", error_msg)
 
+    def _file_list_widgets(self, tab_name):
+        """选项卡 -> (列表框, 文件列表, 数量标签)"""
+        if tab_name == 'transcription':
+            return self.trans_listbox, self.input_files_transcription, self.trans_count_label
+        if tab_name == 'translation':
+            return self.translate_listbox, self.input_files_translation, self.trans_srt_count_label
+        return self.storyboard_listbox, self.input_files_storyboard, self.story_count_label
+
     def add_files(self, tab_name):
         """添加文件到列表"""
         if tab_name == 'transcription':
             files = filedialog.askopenfilenames(title="选择媒体文件", filetypes=[("媒体文件", "*.mp4 *.mp3 *.wav *.m4a *.mov")])
-            listbox = self.trans_listbox
-            file_list = self.input_files_transcription
-            count_label = self.trans_count_label
         elif tab_name == 'translation' or tab_name == 'storyboard':
             files = filedialog.askopenfilenames(title="选择字幕文件", filetypes=[("字幕文件", "*.srt")])
-            listbox = self.translate_listbox if tab_name == 'translation' else self.storyboard_listbox
-            file_list = self.input_files_translation if tab_name == 'translation' else self.input_files_storyboard
-            count_label = self.trans_srt_count_label if tab_name == 'translation' else self.story_count_label
         else:
             return
-
         if files:
-            for f in files:
-                if f not in file_list:
-                    listbox.insert('end', f)
-                    file_list.append(f)
-            count_label.config(text=str(len(file_list)))
-            self.log(f"添加了 {len(files)} 个文件到 {tab_name} 列表")
+            self._append_files(tab_name, files)
+
+    def add_folder(self, tab_name):
+        """递归添加文件夹中的媒体/字幕文件（过滤与排序见配置 scan）；扫描在后台线程进行"""
+        directory = filedialog.askdirectory(title="选择文件夹（包含子文件夹）")
+        if not directory:
+            return
+        exts = MEDIA_EXTS if tab_name == 'transcription' else SUBTITLE_EXTS
+        try:
+            options = scan_options(self.scan_config)
+        except (ValueError, TypeError) as e:
+            self.log(f"⚠️ 扫描配置无效，使用默认设置: {e}")
+            options = {}
+        self.log(f"📁 正在扫描: {directory}")
+        self.master.config(cursor="watch")
+
+        def run():
+            try:
+                paths, stats = scan(directory, exts=exts, **options)
+            except Exception as e:
+                self.log(f"❌ 扫描文件夹失败: {e}")
+                paths, stats = [], None
+
+            def done():
+                self.master.config(cursor="")
+                if stats is not None:
+                    self.log(f"📁 {format_scan_stats(stats)}")
+                self._append_files(tab_name, paths)
+            self.master.after(0, done)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _append_files(self, tab_name, files):
+        """去重后追加到列表：新文件一次 insert 调用插入，上万行也不逐行往返 Tcl"""
+        listbox, file_list, count_label = self._file_list_widgets(tab_name)
+        known = set(file_list)
+        added = []
+        for f in files:
+            if f not in known:
+                known.add(f)
+                added.append(f)
+        if added:
+            file_list.extend(added)
+            listbox.insert('end', *added)
+        count_label.config(text=str(len(file_list)))
+        self.log(f"添加了 {len(added)} 个文件到 {tab_name} 列表"
+                 + (f"（{len(files) - len(added)} 个已在列表中）" if len(files) > len(added) else ""))
 
     def clear_list(self, tab_name):
         """清空文件列表"""
@@ -980,13 +1151,15 @@ class ImprovedWhisperUI:
     # ========== 转录功能 ==========
     
     def start_transcription_thread(self, selected_only=False):
-        """在独立线程中启动转录"""
+        """把文件提交给转录子进程（需要 API 翻译时另起一个界面进程内的翻译线程）"""
         if not self.model_loaded:
             messagebox.showwarning("警告", "请先加载模型！")
             return
         if not self.output_dir:
             messagebox.showwarning("警告", "请先选择输出目录！")
             return
+        if self._transcribing:
+            return
 
         file_list = []
         if selected_only:
@@ -998,6 +1171,26 @@ class ImprovedWhisperUI:
         if not file_list:
             messagebox.showwarning("警告", "列表为空或未选中文件！")
             return
+
+        try:
+            output_dir = Path(self.output_dir)
+            # 确保输出目录存在
+            output_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            self.log(f"❌ 无法创建输出目录: {e}")
+            messagebox.showerror("错误", f"无法创建输出目录: {e}")
+            return
+
+        # 界面变量在主线程读取一次，子进程只拿到可序列化的选项
+        target = self._auto_translate_target()
+        options = {
+            'output_dir': str(output_dir),
+            'formats': list(self._export_formats()),
+            'postprocess': self.postprocess_var.get(),
+            'postprocess_rules': self.postprocess_rules,
+            'whisper_translate': target == 'whisper',
+            'api_target': target if target != 'whisper' else None,
+        }
         
         self.log(f"▶️ 开始转录 {len(file_list)} 个文件...")
         self.master.config(cursor="wait")
@@ -1010,154 +1203,110 @@ class ImprovedWhisperUI:
             self._btn_transcribe_selected_big.config(state=tk.DISABLED)
         except Exception:
             pass
-        threading.Thread(target=self._run_transcription, args=(file_list,)).start()
 
-    def _run_transcription(self, file_list):
-        """实际转录逻辑"""
-        try:
-            output_dir = Path(self.output_dir)
-            # 确保输出目录存在
-            output_dir.mkdir(parents=True, exist_ok=True)
-        except Exception as e:
-            self.log(f"❌ 无法创建输出目录: {e}")
-            self.master.after(0, lambda: messagebox.showerror("错误", f"无法创建输出目录: {e}"))
-            return
-            
-        auto_translate = self.auto_translate_var.get()
-        
-        for i, input_file in enumerate(file_list):
+        self._transcribing = True
+        # 暂停时整个转录进程被挂起（解码停在原处）；取消由子进程自己在文件之间处理
+        control = self._begin_job('transcribe')
+        control.add_process(self.worker.process, terminate=False)
+        control.on_cancel(self._on_transcription_cancel)
+        self._api_jobs = None
+        if options['api_target']:
+            self._api_jobs = queue.Queue()
+            threading.Thread(target=self._run_api_translation,
+                             args=(self._api_jobs, options['api_target'], output_dir, control), daemon=True).start()
+        self.worker.submit(file_list, options)
+
+    def _auto_translate_target(self):
+        """转录后的自动翻译目标：None（不翻译）、'whisper'（Whisper 本地翻译为英文）或 API 翻译的 (语言名, 文件名后缀)"""
+        auto_mode = self.auto_translate_mode.get()
+        if auto_mode == 'off':
+            return None
+        # 解析目标语言选择
+        if auto_mode == 'follow':
+            # 跟随全局设置
+            global_mode = self.translate_target_mode.get()
+            if global_mode in ('zh', 'en'):
+                target = global_mode
+            elif global_mode == 'custom':
+                # Whisper 本地 translate 仅支持翻译到英文。自定义时退化为 API 翻译。
+                target = 'api'
+            else:
+                # auto: 若不是英文则翻译到英文
+                target = 'en'
+        else:
+            target = auto_mode  # zh/en
+
+        # Whisper 本地 translate 只能翻到英文。若目标为中文则走 API 生成双语。
+        if target == 'en':
+            return 'whisper'
+        if target == 'zh':
+            return ('中文', 'ZH')
+        # 自定义或跟随(自定义) -> 走 API
+        target_lang_name = (self.translate_target_custom.get() or '').strip() or '英文'
+        return (target_lang_name, target_lang_name.replace('/', '_').replace('\\', '_'))
+
+    def _run_api_translation(self, jobs, api_target, output_dir, control):
+        """逐个翻译子进程发回的字幕轨并写出双语 SRT；收到 None 表示本批结束。每次 API 调用前检查暂停/取消"""
+        target_lang_name, suffix = api_target
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            if control.cancelled:
+                continue
+            input_file, subtitles = job
+            p_in = Path(input_file)
             try:
-                p_in = Path(input_file)
-                self._set_status(f"正在转录 {p_in.name}...")
-                self.log(f"--- ({i+1}/{len(file_list)}) 开始处理: {p_in.name} ---")
-
-                result = self.model.transcribe(str(p_in), verbose=False)
-                
-                language = result.get('language', '未知')
-                self.log(f"识别到语言: {language.upper()}")
-                
-                srt_path_raw = output_dir / f"{p_in.stem}_{language.lower()}.srt"
-                subtitles = self._segments_to_srt(result['segments'])
-                subtitles.save(str(srt_path_raw), encoding='utf-8')
-                self.log(f"✅ 原始字幕已保存: {srt_path_raw.name}")
-                self.log(f"📂 可在此处找到: {srt_path_raw}")
-
-                # 新自动翻译策略：依据自动翻译选择器
-                auto_mode = self.auto_translate_mode.get()
-                if auto_mode != 'off':
-                    # 解析目标语言选择
-                    if auto_mode == 'follow':
-                        # 跟随全局设置
-                        global_mode = self.translate_target_mode.get()
-                        if global_mode == 'zh':
-                            target = 'zh'
-                        elif global_mode == 'en':
-                            target = 'en'
-                        elif global_mode == 'custom':
-                            # Whisper 本地 translate 仅支持翻译到英文。自定义时退化为 API 翻译。
-                            target = 'api'
-                        else:
-                            # auto: 若不是英文则翻译到英文
-                            target = 'en'
-                    else:
-                        target = auto_mode  # zh/en
-
-                    if target in ('zh', 'en'):
-                        # Whisper 本地 translate 只能翻到英文。若目标为中文则走 API 生成双语。
-                        if target == 'en':
-                            if language.lower() != 'english':
-                                self.log("🌐 自动翻译 -> 英文 (Whisper translate)")
-                                translation_result = self.model.transcribe(str(p_in), task="translate", verbose=False)
-                                srt_path_bilingual = output_dir / f"{p_in.stem}_BILINGUAL_WHISPER.srt"
-                                bilingual_subs = self._create_bilingual_srt(subtitles, translation_result['segments'])
-                                bilingual_subs.save(str(srt_path_bilingual), encoding='utf-8')
-                                self.log(f"✅ 双语字幕 (Whisper) 已保存: {srt_path_bilingual.name}")
-                                self.log(f"📂 可在此处找到: {srt_path_bilingual}")
-                            else:
-                                self.log("ℹ️ 源语言已是英文，跳过 Whisper 自动翻译。")
-                        else:  # target == 'zh'
-                            self.log("🌐 自动翻译 -> 中文 (使用 DeepSeek API)")
-                            # 使用 API 逐句翻译为中文
-                            subs_raw = subtitles
-                            bilingual_subs = pysrt.SubRipFile()
-                            for sub in subs_raw:
-                                text_to_translate = sub.text.strip().replace('\n', ' ')
-                                translated_text = self._deepseek_translate(text_to_translate, '中文') if text_to_translate else ''
-                                new_text = f"{sub.text}\n{translated_text}"
-                                bilingual_subs.append(pysrt.SubRipItem(sub.index, start=sub.start, end=sub.end, text=new_text))
-                            srt_path_bilingual = output_dir / f"{p_in.stem}_BILINGUAL_API_ZH.srt"
-                            bilingual_subs.save(str(srt_path_bilingual), encoding='utf-8')
-                            self.log(f"✅ 双语字幕 (API->中文) 已保存: {srt_path_bilingual.name}")
-                            self.log(f"📂 可在此处找到: {srt_path_bilingual}")
-                    else:
-                        # 自定义或跟随(自定义) -> 走 API
-                        target_lang_name = (self.translate_target_custom.get() or '').strip() or '英文'
-                        self.log(f"🌐 自动翻译 -> {target_lang_name} (使用 DeepSeek API)")
-                        subs_raw = subtitles
-                        bilingual_subs = pysrt.SubRipFile()
-                        for sub in subs_raw:
-                            text_to_translate = sub.text.strip().replace('\n', ' ')
-                            translated_text = self._deepseek_translate(text_to_translate, target_lang_name) if text_to_translate else ''
-                            new_text = f"{sub.text}\n{translated_text}"
-                            bilingual_subs.append(pysrt.SubRipItem(sub.index, start=sub.start, end=sub.end, text=new_text))
-                        safe_suffix = target_lang_name.replace('/', '_').replace('\\', '_')
-                        srt_path_bilingual = output_dir / f"{p_in.stem}_BILINGUAL_API_{safe_suffix}.srt"
-                        bilingual_subs.save(str(srt_path_bilingual), encoding='utf-8')
-                        self.log(f"✅ 双语字幕 (API->{target_lang_name}) 已保存: {srt_path_bilingual.name}")
-                        self.log(f"📂 可在此处找到: {srt_path_bilingual}")
-
+                self.log(f"🌐 自动翻译 -> {target_lang_name} (使用 DeepSeek API): {p_in.name}")
+                new_texts = []
+                for text in subtitles.texts:
+                    control.check()
+                    text_to_translate = text.strip().replace('\n', ' ')
+                    translated_text = self._deepseek_translate(text_to_translate, target_lang_name) if text_to_translate else ''
+                    new_texts.append(f"{text}\n{translated_text}")
+                # 全部译完才写文件，取消时不留下半份字幕
+                bilingual_subs = subtitles.with_texts(new_texts)
+                srt_path_bilingual = output_dir / f"{p_in.stem}_BILINGUAL_API_{suffix}.srt"
+                write_srt(str(srt_path_bilingual), bilingual_subs)
+                self.log(f"✅ 双语字幕 (API->{target_lang_name}) 已保存: {srt_path_bilingual.name}")
+                self.log(f"📂 可在此处找到: {srt_path_bilingual}")
+            except Cancelled:
+                continue
             except Exception as e:
-                self.log(f"❌ 处理文件 {p_in.name} 失败: {e}")
-
-            self.trans_progress.config(value=i + 1)
-        
-        self.master.after(0, lambda: self.master.config(cursor=""))
-        def _done():
-            try:
-                self._btn_transcribe_start.config(state=tk.NORMAL, text='▶️ 开始转录')
-                self._btn_transcribe_selected.config(state=tk.NORMAL)
-                self._btn_transcribe_start_big.config(state=tk.NORMAL, text='▶️ 开始转录')
-                self._btn_transcribe_selected_big.config(state=tk.NORMAL)
-            except Exception:
-                pass
-            self.log("🎉 所有转录任务完成！")
-            messagebox.showinfo("完成", "所有转录和字幕生成任务已完成！")
-        self.master.after(0, _done)
-
-    def _segments_to_srt(self, segments):
-        """将 Whisper segments 转换为 pysrt 对象"""
-        subs = pysrt.SubRipFile()
-        for i, segment in enumerate(segments):
-            start_time = self._format_time(segment['start'])
-            end_time = self._format_time(segment['end'])
-            sub = pysrt.SubRipItem(i + 1, start=start_time, end=end_time, text=segment['text'].strip())
-            subs.append(sub)
-        return subs
-    
-    def _format_time(self, time_s):
-        """格式化时间（秒）为 SRT 格式"""
-        time_obj = datetime.datetime.fromtimestamp(time_s) - datetime.datetime.fromtimestamp(0)
-        minutes, seconds = divmod(time_obj.seconds, 60)
-        hours, minutes = divmod(minutes, 60)
-        ms = time_obj.microseconds // 1000
-        return pysrt.SubRipTime(hours=hours, minutes=minutes, seconds=seconds, milliseconds=ms)
-
-    def _create_bilingual_srt(self, subs_raw, segments_translated):
-        """合并原始和翻译字幕为双语 SRT"""
-        if len(subs_raw) != len(segments_translated):
-             self.log("⚠️ 原始字幕和翻译字幕段落数量不匹配，可能导致合并错位！")
-        
-        bilingual_subs = pysrt.SubRipFile()
-        for i, sub in enumerate(subs_raw):
-            try:
-                translated_text = segments_translated[i]['text'].strip()
-                new_text = f"{sub.text}\n{translated_text}"
-                new_sub = pysrt.SubRipItem(sub.index, start=sub.start, end=sub.end, text=new_text)
-                bilingual_subs.append(new_sub)
-            except IndexError:
-                 bilingual_subs.append(sub)
-        
-        return bilingual_subs
+                self.log(f"❌ 翻译文件 {p_in.name} 失败: {e}")
+        self.master.after(0, self._transcription_done)
+
+    def _finish_transcription_batch(self):
+        """子进程一批任务结束：有翻译线程时等它处理完剩余的字幕轨再收尾"""
+        if self._api_jobs is not None:
+            self._api_jobs.put(None)
+            self._api_jobs = None
+        elif self._transcribing:
+            self._transcription_done()
+
+    def _on_transcription_cancel(self):
+        """取消转录：当前文件结束后停止，超时终止转录进程；未开始的 API 翻译不再进行"""
+        if self.worker is not None:
+            self.worker.cancel()
+        self.log("⏹ 当前文件结束后停止，超时将终止转录进程")
+
+    def _transcription_done(self):
+        self._transcribing = False
+        control = self._end_job('transcribe')
+        self.master.config(cursor="")
+        try:
+            self._btn_transcribe_start.config(state=tk.NORMAL, text='▶️ 开始转录')
+            self._btn_transcribe_selected.config(state=tk.NORMAL)
+            self._btn_transcribe_start_big.config(state=tk.NORMAL, text='▶️ 开始转录')
+            self._btn_transcribe_selected_big.config(state=tk.NORMAL)
+        except Exception:
+            pass
+        if control.cancelled:
+            self.log("⏹ 转录已取消")
+            self._set_status("转录已取消")
+            return
+        self.log("🎉 所有转录任务完成！")
+        messagebox.showinfo("完成", "所有转录和字幕生成任务已完成！")
 
     # ========== 翻译功能 (使用 DeepSeek API) ==========
 
@@ -1243,10 +1392,11 @@ class ImprovedWhisperUI:
             self._btn_translate_selected_big.config(state=tk.DISABLED)
         except Exception:
             pass
-        threading.Thread(target=self._run_translation, args=(file_list,)).start()
+        control = self._begin_job('translate')
+        threading.Thread(target=self._run_translation, args=(file_list, control)).start()
 
-    def _run_translation(self, file_list):
-        """实际翻译逻辑 (在线程中运行)"""
+    def _run_translation(self, file_list, control):
+        """实际翻译逻辑 (在线程中运行)；每句翻译前检查暂停/取消"""
         try:
             output_dir = Path(self.output_dir)
             # 确保输出目录存在
@@ -1254,46 +1404,49 @@ class ImprovedWhisperUI:
         except Exception as e:
             self.log(f"❌ 无法创建输出目录: {e}")
             self.master.after(0, lambda: messagebox.showerror("错误", f"无法创建输出目录: {e}"))
+            self.master.after(0, lambda: self._end_job('translate'))
             return
         
         for i, input_file in enumerate(file_list):
             try:
+                control.check()
                 p_in = Path(input_file)
                 self._set_status(f"正在翻译 {p_in.name}...")
                 self.log(f"--- ({i+1}/{len(file_list)}) 开始翻译: {p_in.name} ---")
 
                 # 1. 读取字幕文件
-                subs_raw = pysrt.open(str(p_in), encoding='utf-8')
+                subs_raw = SubtitleTrack.from_srt(str(p_in))
                 
                 # 2. 确定翻译目标语言（尊重全局选择器）
                 mode = self.translate_target_mode.get()
                 if mode == 'auto':
-                    is_chinese = any('\u4e00' <= char <= '\u9fff' for sub in subs_raw for char in sub.text)
+                    is_chinese = any('\u4e00' <= char <= '\u9fff' for text in subs_raw.texts for char in text)
                     target_lang = "英文" if is_chinese else "中文"
                     source_lang = "中文" if is_chinese else "英文"
                 elif mode == 'zh':
                     target_lang = "中文"
                     # 简单估计源语言用于日志
-                    is_chinese = any('\u4e00' <= char <= '\u9fff' for sub in subs_raw for char in sub.text)
+                    is_chinese = any('\u4e00' <= char <= '\u9fff' for text in subs_raw.texts for char in text)
                     source_lang = "中文" if is_chinese else "非中文"
                 elif mode == 'en':
                     target_lang = "英文"
-                    is_chinese = any('\u4e00' <= char <= '\u9fff' for sub in subs_raw for char in sub.text)
+                    is_chinese = any('\u4e00' <= char <= '\u9fff' for text in subs_raw.texts for char in text)
                     source_lang = "中文" if is_chinese else "非中文"
                 else:  # custom
                     custom = (self.translate_target_custom.get() or '').strip()
                     target_lang = custom if custom else "英文"
-                    is_chinese = any('\u4e00' <= char <= '\u9fff' for sub in subs_raw for char in sub.text)
+                    is_chinese = any('\u4e00' <= char <= '\u9fff' for text in subs_raw.texts for char in text)
                     source_lang = "中文" if is_chinese else "非中文"
                 
-                translated_subs = pysrt.SubRipFile()
+                new_texts = []
                 
                 self.log(f"🌐 源语言估计: {source_lang}，翻译目标: {target_lang}")
                 
                 # 3. 逐句翻译：按优先模式决定
-                for sub in subs_raw:
+                for n, text in enumerate(subs_raw.texts, start=1):
+                    control.check()
                     # 去除空行，避免 API 浪费
-                    text_to_translate = sub.text.strip().replace('\n', ' ')
+                    text_to_translate = text.strip().replace('\n', ' ')
                     if not text_to_translate:
                         translated_text = ""
                     else:
@@ -1304,26 +1457,28 @@ class ImprovedWhisperUI:
                             translated_text = text_to_translate
                         
                     # 4. 创建新的双语字幕条目
-                    new_text = f"{sub.text}\n{translated_text}"
-                    translated_sub = pysrt.SubRipItem(sub.index, start=sub.start, end=sub.end, text=new_text)
-                    translated_subs.append(translated_sub)
+                    new_texts.append(f"{text}\n{translated_text}")
                     
-                    self._set_status(f"正在翻译 {p_in.name}: 第 {sub.index} 句")
+                    self._set_status(f"正在翻译 {p_in.name}: 第 {n} 句")
 
                 # 5. 保存翻译后的双语字幕
                 suffix = 'DeepSeek' if self.api_prefer_var.get() else 'Local'
                 output_path = output_dir / f"{p_in.stem}_Bilingual_{suffix}.srt"
-                translated_subs.save(str(output_path), encoding='utf-8')
+                write_srt(str(output_path), subs_raw.with_texts(new_texts))
                 self.log(f"✅ 双语字幕已保存: {output_path.name}")
                 self.log(f"📂 可在此处找到: {output_path}")
 
+            except Cancelled:
+                # 双语字幕在整份译完后才写出，取消的文件不留下半份输出
+                break
             except Exception as e:
                 self.log(f"❌ 翻译文件 {p_in.name} 失败: {e}")
 
-            self.translate_progress.config(value=i + 1)
+            self.master.after(0, lambda value=i + 1: self.translate_progress.config(value=value))
         
         self.master.after(0, lambda: self.master.config(cursor=""))
         def _done():
+            self._end_job('translate')
             try:
                 self._btn_translate_start.config(state=tk.NORMAL, text='▶️ 开始翻译')
                 self._btn_translate_selected.config(state=tk.NORMAL)
@@ -1331,6 +1486,10 @@ class ImprovedWhisperUI:
                 self._btn_translate_selected_big.config(state=tk.NORMAL)
             except Exception:
                 pass
+            if control.cancelled:
+                self.log("⏹ 翻译已取消")
+                self._set_status("翻译已取消")
+                return
             self.log("🎉 所有翻译任务完成！")
             messagebox.showinfo("完成", "所有字幕翻译任务已完成！")
         self.master.after(0, _done)
@@ -1383,10 +1542,11 @@ class ImprovedWhisperUI:
             self._btn_story_start_big.config(state=tk.DISABLED, text='正在生成…')
         except Exception:
             pass
-        threading.Thread(target=self._run_storyboard_generation, args=(file_list, fmt)).start()
+        control = self._begin_job('storyboard')
+        threading.Thread(target=self._run_storyboard_generation, args=(file_list, fmt, control)).start()
 
-    def _run_storyboard_generation(self, file_list, export_format):
-        """实际分镜生成逻辑 (在线程中运行)"""
+    def _run_storyboard_generation(self, file_list, export_format, control):
+        """实际分镜生成逻辑 (在线程中运行)；每批 API 调用前检查暂停/取消"""
         try:
             output_dir = Path(self.output_dir)
             # 确保输出目录存在
@@ -1394,6 +1554,7 @@ class ImprovedWhisperUI:
         except Exception as e:
             self.log(f"❌ 无法创建输出目录: {e}")
             self.master.after(0, lambda: messagebox.showerror("错误", f"无法创建输出目录: {e}"))
+            self.master.after(0, lambda: self._end_job('storyboard'))
             return
         
         # 设定字幕合并批次大小
@@ -1401,19 +1562,21 @@ class ImprovedWhisperUI:
         
         for i, input_file in enumerate(file_list):
             try:
+                control.check()
                 p_in = Path(input_file)
                 self._set_status(f"正在生成分镜 {p_in.name}...")
                 self.log(f"--- ({i+1}/{len(file_list)}) 开始生成分镜: {p_in.name} ---")
 
-                subs = pysrt.open(str(p_in), encoding='utf-8')
+                subs = SubtitleTrack.from_srt(str(p_in))
                 storyboard_data = []
                 
                 # 按批次进行总结和提示词生成
                 for j in range(0, len(subs), BATCH_SIZE):
+                    control.check()
                     batch = subs[j:j + BATCH_SIZE]
                     
                     # 拼接字幕文本
-                    subtitle_text_batch = "\n".join([sub.text.strip().replace('\n', ' ') for sub in batch])
+                    subtitle_text_batch = "\n".join([text.strip().replace('\n', ' ') for text in batch.texts])
                     
                     self.log(f"正在分析第 {j//BATCH_SIZE + 1} 个批次 (共 {len(batch)} 句)...")
                     
@@ -1427,11 +1590,11 @@ class ImprovedWhisperUI:
                         
                         storyboard_item = {
                             "scene_id": j // BATCH_SIZE + 1,
-                            "timestamp_start": first_sub.start.to_time().strftime("%H:%M:%S.%f")[:-3],
-                            "timestamp_end": last_sub.end.to_time().strftime("%H:%M:%S.%f")[:-3],
+                            "timestamp_start": format_time(first_sub.start, sep='.'),
+                            "timestamp_end": format_time(last_sub.end, sep='.'),
                             "text_summary": ai_result.get("summary", "N/A"),
                             "ai_prompt_suggestion": ai_result.get("ai_prompt", "N/A"),
-                            "duration_sec": last_sub.end.total_seconds() - first_sub.start.total_seconds()
+                            "duration_sec": (last_sub.end - first_sub.start) / 1000.0
                         }
                         storyboard_data.append(storyboard_item)
 
@@ -1456,50 +1619,107 @@ class ImprovedWhisperUI:
                 self.log(f"✅ 分镜脚本已保存: {output_path.name} ({len(storyboard_data)}个场景)")
                 self.log(f"📂 可在此处找到: {output_path}")
 
+            except Cancelled:
+                # 分镜在整份生成后才写出，取消的文件不留下半份输出
+                break
             except Exception as e:
                 self.log(f"❌ 分镜生成失败: {e}")
 
-            self.story_progress.config(value=i + 1)
+            self.master.after(0, lambda value=i + 1: self.story_progress.config(value=value))
 
         self.master.after(0, lambda: self.master.config(cursor=""))
         def _done():
+            self._end_job('storyboard')
             try:
                 self._btn_story_start.config(state=tk.NORMAL, text='🎬 生成并导出分镜')
                 self._btn_story_start_big.config(state=tk.NORMAL, text='🎬 生成并导出分镜')
             except Exception:
                 pass
+            if control.cancelled:
+                self.log("⏹ 分镜生成已取消")
+                self._set_status("分镜生成已取消")
+                return
             self.log("🎉 所有分镜生成任务完成！")
             messagebox.showinfo("完成", "所有分镜脚本已生成！")
         self.master.after(0, _done)
     
+    # ========== 任务暂停/取消 ==========
+
+    def _add_job_buttons(self, frame, name):
+        """在执行按钮旁加入“暂停/取消”按钮（任务运行时可用）"""
+        pause = tk.Button(frame, text="⏸ 暂停", command=lambda: self._toggle_job_pause(name),
+                          state=tk.DISABLED, padx=20, pady=10)
+        pause.pack(side='left', padx=5)
+        cancel = tk.Button(frame, text="⏹ 取消", command=lambda: self._cancel_job(name),
+                           state=tk.DISABLED, padx=20, pady=10)
+        cancel.pack(side='left', padx=5)
+        self._job_buttons[name] = (pause, cancel)
+
+    def _begin_job(self, name):
+        """任务开始（主线程）：新建 JobControl 并启用它的按钮"""
+        control = JobControl()
+        self._jobs[name] = control
+        for button in self._job_buttons[name]:
+            button.config(state=tk.NORMAL)
+        return control
+
+    def _end_job(self, name):
+        """任务结束（主线程）：恢复可能仍被挂起的进程，禁用按钮，返回该任务的 JobControl"""
+        control = self._jobs.pop(name)
+        control.resume()
+        pause, cancel = self._job_buttons[name]
+        pause.config(state=tk.DISABLED, text="⏸ 暂停")
+        cancel.config(state=tk.DISABLED)
+        return control
+
+    def _toggle_job_pause(self, name):
+        control = self._jobs.get(name)
+        if control is None or control.cancelled:
+            return
+        pause = self._job_buttons[name][0]
+        if control.paused:
+            control.resume()
+            pause.config(text="⏸ 暂停")
+            self.log("▶ 已继续")
+            self._set_status(self._paused_status)
+        else:
+            self._paused_status = (self.log_sink.last_status or '').replace("状态: ", "", 1) or "处理中"
+            control.pause()
+            pause.config(text="▶ 继续")
+            self.log("⏸ 已暂停（正在进行的 API 请求会先完成）")
+            self._set_status("已暂停")
+
+    def _cancel_job(self, name):
+        control = self._jobs.get(name)
+        if control is None or control.cancelled:
+            return
+        pause, cancel = self._job_buttons[name]
+        pause.config(state=tk.DISABLED, text="⏸ 暂停")
+        cancel.config(state=tk.DISABLED)
+        self.log("⏹ 正在取消...")
+        self._set_status("正在取消")
+        control.cancel()
+
     # ========== 日志和状态方法 ==========
 
     def log(self, message):
-        """添加日志（线程安全）"""
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        def _do():
-            self.log_text.config(state='normal')
-            self.log_text.insert('end', f"[{timestamp}] {message}\n")
-            self.log_text.see('end')
-            self.log_text.config(state='disabled')
-            # 状态栏颜色
-            color = 'gray'
-            if any(k in message for k in ("开始", "正在", "处理中")):
-                color = '#2980b9'
-            if any(k in message for k in ("完成", "成功", "已保存")):
-                color = '#27ae60'
-            if any(k in message for k in ("部分",)):
-                color = '#e67e22'
-            if any(k in message for k in ("失败", "错误", "❌")):
-                color = '#c0392b'
-            self.status_label.config(text=message, fg=color)
-        self.master.after(0, _do)
+        """添加日志（线程安全，按批刷新到界面）"""
+        self.log_sink.write(message)
+        # 状态栏颜色
+        color = 'gray'
+        if any(k in message for k in ("开始", "正在", "处理中")):
+            color = '#2980b9'
+        if any(k in message for k in ("完成", "成功", "已保存")):
+            color = '#27ae60'
+        if any(k in message for k in ("部分",)):
+            color = '#e67e22'
+        if any(k in message for k in ("失败", "错误", "❌")):
+            color = '#c0392b'
+        self.log_sink.status(message, color)
     
     def clear_log(self):
-        """清空日志"""
-        self.log_text.config(state='normal')
-        self.log_text.delete('1.0', 'end')
-        self.log_text.config(state='disabled')
+        """清空日志（磁盘上的完整日志保留）"""
+        self.log_sink.clear()
         self.log("日志已清空")
     
     def save_log(self):
@@ -1511,27 +1731,32 @@ class ImprovedWhisperUI:
         if filepath:
             try:
                 with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(self.log_text.get('1.0', 'end'))
+                    f.write(self.log_sink.text())
                 self.master.after(0, lambda: messagebox.showinfo("成功", "日志已保存"))
                 self.log(f"日志已保存到: {Path(filepath).name}")
             except Exception as e:
                 self.master.after(0, lambda: messagebox.showerror("错误", f"保存日志失败: {e}"))
 
     def _set_status(self, text):
-        """更新状态栏 (线程安全)"""
-        def _do():
-            color = 'gray'
-            if any(k in text for k in ("开始", "正在", "处理中", "转录中", "翻译", "生成")):
-                color = '#2980b9'
-            if any(k in text for k in ("完成", "成功")):
-                color = '#27ae60'
-            if any(k in text for k in ("部分",)):
-                color = '#e67e22'
-            if any(k in text for k in ("失败", "错误")):
-                color = '#c0392b'
-            self.status_label.config(text="状态: " + text, fg=color)
-        # 使用 after(0) 确保在主线程更新 UI
-        self.master.after(0, _do)
+        """更新状态栏 (线程安全；连续的更新合并，每次刷新只显示最后一条)"""
+        color = 'gray'
+        if any(k in text for k in ("开始", "正在", "处理中", "转录中", "翻译", "生成")):
+            color = '#2980b9'
+        if any(k in text for k in ("完成", "成功")):
+            color = '#27ae60'
+        if any(k in text for k in ("部分",)):
+            color = '#e67e22'
+        if any(k in text for k in ("失败", "错误")):
+            color = '#c0392b'
+        self.log_sink.status("状态: " + text, color)
+
+    def _show_status(self, text, color):
+        """由日志刷新在主线程中调用"""
+        self.status_label.config(text=text, fg=color)
+
+    def _export_formats(self):
+        """当前勾选的导出格式（至少保留 SRT）"""
+        return tuple(fmt for fmt in EXPORT_FORMATS if self.export_format_vars[fmt].get()) or ('srt',)
 
     # ========== 配置的加载与保存 ==========
     def _load_config(self):
@@ -1545,6 +1770,14 @@ class ImprovedWhisperUI:
                 self.translate_target_mode.set(cfg.get('translate_target_mode', self.translate_target_mode.get()))
                 self.translate_target_custom.set(cfg.get('translate_target_custom', self.translate_target_custom.get()))
                 self.auto_translate_mode.set(cfg.get('auto_translate_mode', self.auto_translate_mode.get()))
+                self.quantize_var.set(cfg.get('quantize_int8', self.quantize_var.get()))
+                self.postprocess_var.set(cfg.get('postprocess', self.postprocess_var.get()))
+                self.postprocess_rules = cfg.get('postprocess_rules', self.postprocess_rules) or {}
+                self.scan_config = cfg.get('scan', self.scan_config) or {}
+                saved_formats = cfg.get('export_formats')
+                if saved_formats:
+                    for fmt, var in self.export_format_vars.items():
+                        var.set(fmt in saved_formats)
         except Exception as e:
             self.log(f"⚠️ 加载配置失败: {e}")
 
@@ -1556,7 +1789,12 @@ class ImprovedWhisperUI:
                 'api_key': self.api_key_var.get(),
                 'translate_target_mode': self.translate_target_mode.get(),
                 'translate_target_custom': self.translate_target_custom.get(),
-                'auto_translate_mode': self.auto_translate_mode.get()
+                'auto_translate_mode': self.auto_translate_mode.get(),
+                'quantize_int8': self.quantize_var.get(),
+                'export_formats': list(self._export_formats()),
+                'postprocess': self.postprocess_var.get(),
+                'postprocess_rules': self.postprocess_rules,
+                'scan': self.scan_config
             }
             with open(self._config_path, 'w', encoding='utf-8') as f:
                 json.dump(cfg, f, ensure_ascii=False, indent=2)
@@ -1565,10 +1803,15 @@ class ImprovedWhisperUI:
         
 # 主程序
 if __name__ == "__main__":
-    if whisper is None or pysrt is None:
-        print("警告：缺少核心依赖 (whisper, torch, pysrt)。转录功能将受限。")
-        print("请运行: pip install openai-whisper torch pysrt requests")
+    # 打包成 exe 后，spawn 出的转录子进程会重新执行本脚本：必须最先交给 multiprocessing 处理
+    multiprocessing.freeze_support()
+    if whisper is None:
+        print("警告：缺少核心依赖 (whisper, torch)。转录功能将受限。")
+        print("请运行: pip install openai-whisper torch requests")
     
     root = tk.Tk()
     app = ImprovedWhisperUI(root)
     root.mainloop()
+    # 窗口关闭时取消仍在运行的任务：被暂停的线程和转录进程不恢复就无法退出
+    for control in list(app._jobs.values()):
+        control.cancel()
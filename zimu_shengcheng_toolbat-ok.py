@@ -66,7 +66,6 @@ for _spec in ("numpy>=2", "ffmpeg-python"):
 import threading
 import subprocess
 import traceback
-import datetime
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import shutil
@@ -88,6 +87,31 @@ try:
     from faster_whisper import WhisperModel as FWWhisperModel
 except Exception:
     FWWhisperModel = None
+
+try:
+    import torch
+except Exception:
+    torch = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from concurrent.futures import ThreadPoolExecutor
+
+from cpu_budget import ThreadBudget
+from ffmpeg_jobs import run_ffmpeg, format_progress, format_duration, ProgressTracker
+from job_control import JobControl, Cancelled
+from file_scan import scan, format_stats as format_scan_stats, VIDEO_EXTS
+import media_probe
+from log_sink import LogSink, StatusVar
+from whisper_models import load_openai_model
+from onnx_engine import OnnxWhisper
+from speech_map import SpeechMap, read_wav
+from subtitle_track import SubtitleTrack
+from subtitle_export import export_track, FORMATS
+from subtitle_postprocess import postprocess as postprocess_segments, format_stats as format_postprocess_stats
 
 # ----------------------------
 # 依赖安装函数
@@ -178,7 +202,24 @@ def load_whisper_model_async(model_name, model_container, progress_var, log_func
             cache_dir = Path.home() / ".cache" / "faster-whisper"
             cache_dir.mkdir(parents=True, exist_ok=True)
 
-            if FWWhisperModel is not None:
+            # 推理线程数由全局线程预算决定，为并发的 ffmpeg 任务预留核心
+            budget = model_container.setdefault('budget', ThreadBudget())
+            threads = budget.inference_threads()
+            model_container['threads'] = threads
+
+            if model_container.get('engine') == 'onnx':
+                # ONNX Runtime 引擎：首次使用时导出并缓存 ONNX 图（需要 torch + openai-whisper）
+                log_func(f"正在加载 ONNX Runtime 模型: {model_name}（首次使用会导出 ONNX，耗时较长）...")
+                progress_var.set(f"正在加载 {model_name} 模型，请稍候...")
+                quantize = model_container.get('quantize', False)
+                model_container['model'] = (
+                    "onnx",
+                    OnnxWhisper.load(model_name, threads=threads, quantize=quantize, log_func=log_func),
+                )
+                kind = "ONNX Runtime int8" if quantize else "ONNX Runtime"
+                progress_var.set(f"✅ 模型 {model_name} 已就绪（{kind}）")
+                log_func(f"✅ ONNX 模型 {model_name} 加载完成（{kind}，推理线程 {threads}/{budget.total}）")
+            elif FWWhisperModel is not None:
                 log_func(f"正在加载 Faster-Whisper 模型: {model_name}（首次加载会下载到 {cache_dir}）...")
                 progress_var.set(f"正在加载 {model_name} 模型，请稍候...")
                 model_container['model'] = (
@@ -187,11 +228,13 @@ def load_whisper_model_async(model_name, model_container, progress_var, log_func
                         model_name,
                         device="cpu",
                         compute_type="int8",
+                        cpu_threads=threads,
+                        num_workers=1,
                         download_root=str(cache_dir),
                     ),
                 )
                 progress_var.set(f"✅ 模型 {model_name} 已就绪（Faster-Whisper）")
-                log_func(f"✅ Faster-Whisper 模型 {model_name} 加载完成（缓存目录：{cache_dir}）")
+                log_func(f"✅ Faster-Whisper 模型 {model_name} 加载完成（缓存目录：{cache_dir}，推理线程 {threads}/{budget.total}）")
             else:
                 if whisper is None:
                     log_func("❌ 未检测到 faster-whisper 或 openai-whisper。请点击'安装依赖'或手动安装：pip install faster-whisper")
@@ -199,37 +242,103 @@ def load_whisper_model_async(model_name, model_container, progress_var, log_func
                     return
                 log_func(f"正在加载 Whisper 模型: {model_name}（首次加载会下载模型文件）...")
                 progress_var.set(f"正在加载 {model_name} 模型，请稍候...")
-                # openai-whisper 默认缓存于 ~/.cache/whisper
-                model_container['model'] = ("openai", whisper.load_model(model_name))
-                progress_var.set(f"✅ 模型 {model_name} 已就绪（openai-whisper）")
-                log_func(f"✅ Whisper 模型 {model_name} 加载完成")
+                # openai-whisper 默认缓存于 ~/.cache/whisper；int8 量化权重缓存于 ~/.cache/whisper-subtitle-tools
+                if torch is not None:
+                    torch.set_num_threads(threads)
+                quantize = model_container.get('quantize', False)
+                model_container['model'] = (
+                    "openai",
+                    load_openai_model(model_name, quantize=quantize, log_func=log_func),
+                )
+                kind = "openai-whisper int8" if quantize else "openai-whisper"
+                progress_var.set(f"✅ 模型 {model_name} 已就绪（{kind}）")
+                log_func(f"✅ Whisper 模型 {model_name} 加载完成（{kind}，推理线程 {threads}/{budget.total}）")
         except Exception as e:
             progress_var.set(f"❌ 模型加载失败: {e}")
             log_func(f"❌ 模型加载失败: {e}\n{traceback.format_exc()}")
     threading.Thread(target=run, daemon=True).start()
 
-# ----------------------------
-# SRT 时间格式化
-# ----------------------------
-def format_srt_time(seconds):
-    """将秒数转换为 SRT 时间格式 HH:MM:SS,mmm"""
-    h = int(seconds // 3600)
-    m = int((seconds % 3600) // 60)
-    s = int(seconds % 60)
-    ms = int((seconds - int(seconds)) * 1000)
-    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+# ----------------------------
+# ffmpeg 执行（受线程预算约束）
+# ----------------------------
+# 日志中进度行的最小间隔（秒），避免刷屏
+PROGRESS_LOG_INTERVAL = 3.0
+# 后台同时导出的静音视频数上限（全部导出合计不超过预算中识别之外的线程，见 start_batch_processing）
+MUTE_WORKERS = 2
+
+def _run_ffmpeg(stream, cli_args, lease, duration=None, on_progress=None, control=None):
+    """
+    执行 ffmpeg：ffmpeg-python 构建的命令也编译成参数列表，统一由 ffmpeg_jobs.run_ffmpeg 执行，
+    通过 -progress 读取进度（duration 已知时按 PROGRESS_LOG_INTERVAL 节流回调 on_progress）；
+    开启绑核时把进程绑定到租约核心；control 暂停时挂起进程，取消时终止进程并抛出 Cancelled
+    """
+    args = ffmpeg.compile(stream) if ffmpeg is not None and stream is not None else cli_args
+    run_ffmpeg(args, duration=duration, on_progress=on_progress, lease=lease,
+               interval=PROGRESS_LOG_INTERVAL, control=control)
+
+def export_mute_video(input_path, output_video_path, budget, threads, log_func, index, total, duration=None,
+                      control=None):
+    """
+    导出静音视频（通过 ffmpeg 去除音轨），编码线程向预算申请；duration 未知时用 ffprobe 读取。
+    被取消时删除未写完的视频并抛出 Cancelled
+    """
+    name = os.path.basename(output_video_path)
+    if control is not None:
+        control.check()
+    if duration is None:
+        duration = media_probe.duration(input_path)
+    on_progress = lambda p: log_func(f"[{index}/{total}] 静音视频 {format_progress(p)}")
+    try:
+        with budget.lease(threads, kind='ffmpeg') as lease:
+            log_func(f"[{index}/{total}] 正在导出静音视频（{lease.threads} 线程）...")
+            stream = None
+            if ffmpeg is not None:
+                stream = (
+                    ffmpeg
+                    .input(input_path)
+                    .output(output_video_path, an=None, vcodec='libx264', threads=lease.threads, loglevel='error')
+                    .overwrite_output()
+                )
+            _run_ffmpeg(stream, [
+                'ffmpeg', '-y', '-i', input_path, '-an', '-vcodec', 'libx264',
+                *lease.ffmpeg_args(), output_video_path
+            ], lease, duration, on_progress, control)
+        log_func(f"[{index}/{total}] ✅ 静音视频生成完成: {name}")
+        return True
+    except Cancelled:
+        try:
+            os.remove(output_video_path)
+        except OSError:
+            pass
+        log_func(f"[{index}/{total}] ⏹ 已取消静音视频: {name}")
+        raise
+    except Exception as e:
+        log_func(f"[{index}/{total}] ❌ 导出静音视频失败: {name} - {e}")
+        return False
 
 # ----------------------------
 # 核心处理函数
 # ----------------------------
-def process_video(input_path, output_folder, keep_audio, model, log_func, index, total):
-    """
-    处理单个视频文件
-    - 生成字幕文件
-    - 可选生成静音视频
-    """
+def process_video(input_path, output_folder, keep_audio, model, log_func, index, total,
+                  budget=None, threads=None, skip_silence=True, formats=None, postprocess=False,
+                  control=None):
+    """
+    处理单个视频文件
+    - 生成字幕文件（formats 为导出格式，如 ('srt', 'vtt', 'json')，默认只有 SRT）
+    - 可选生成静音视频
+    - budget/threads：线程预算与模型推理线程数，ffmpeg 使用剩余核心
+    - skip_silence：按能量/过零率跳过静音，只识别语音区间
+    - postprocess：按行宽/CPS/时长约束重新断句、合并、换行（识别时请求词级时间戳）
+    - control：JobControl，在各步骤之间与 faster-whisper 的每个片段之后检查暂停/取消；
+      取消时抛出 Cancelled（临时音频照常删除，字幕只在识别完成后写出）
+    """
+    check = control.check if control is not None else (lambda: None)
     temp_audio = None
     name = None
+    if budget is None:
+        budget = ThreadBudget()
+    threads = max(1, min(threads or budget.total, budget.total))
+    ffmpeg_threads = max(1, budget.total - threads)
     
     try:
         filename = os.path.basename(input_path)
@@ -244,81 +353,111 @@ def process_video(input_path, output_folder, keep_audio, model, log_func, index,
             raise RuntimeError("Whisper 模型未加载")
 
         # 1. 导出音频用于识别（通过 ffmpeg 提取）
+        check()
         temp_audio = os.path.join(output_folder, f"{name}_temp.wav")
+        duration = media_probe.duration(input_path)
         log_func(f"[{index}/{total}] 正在提取音频...")
         try:
             # 优先使用 ffmpeg-python，如果不可用则退回到 ffmpeg CLI
-            if ffmpeg is not None:
-                (
-                    ffmpeg
-                    .input(input_path)
-                    .output(temp_audio, ac=1, ar=16000, vn=None, loglevel='error')
-                    .overwrite_output()
-                    .run()
-                )
-            else:
-                subprocess.run([
-                    'ffmpeg', '-y', '-i', input_path, '-vn', '-ac', '1', '-ar', '16000', temp_audio
-                ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            with budget.lease(ffmpeg_threads, kind='ffmpeg') as lease:
+                stream = None
+                if ffmpeg is not None:
+                    stream = (
+                        ffmpeg
+                        .input(input_path)
+                        .output(temp_audio, ac=1, ar=16000, vn=None, threads=lease.threads, loglevel='error')
+                        .overwrite_output()
+                    )
+                _run_ffmpeg(stream, [
+                    'ffmpeg', '-y', '-i', input_path, '-vn', '-ac', '1', '-ar', '16000',
+                    *lease.ffmpeg_args(), temp_audio
+                ], lease, duration,
+                    lambda p: log_func(f"[{index}/{total}] 提取音频 {format_progress(p)}"), control)
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"提取音频失败: {e}")
-        
+
+        # 1.5 语音分布图：静音段不送入模型，减少耗时和静音处的幻觉字幕
+        audio_input = temp_audio
+        speech = None
+        if skip_silence and np is not None:
+            try:
+                pcm, _ = read_wav(temp_audio)
+                speech = SpeechMap.from_pcm(pcm)
+                log_func(f"[{index}/{total}] 🔇 {speech.summary()}")
+                if speech.is_unreliable():
+                    log_func(f"[{index}/{total}] ⚠️ 几乎没有检测到语音（可能是录音音量过低），改为识别完整音频")
+                    speech = None
+                elif speech.is_trivial():
+                    speech = None
+                else:
+                    audio_input = speech.compact(pcm)
+            except Exception as e:
+                log_func(f"[{index}/{total}] ⚠️ 静音检测失败，识别完整音频: {e}")
+                speech = None
+        
         # 2. 语音识别（兼容 faster-whisper 与 openai-whisper）
+        check()
         log_func(f"[{index}/{total}] 正在识别语音（可能较慢）...")
         engine, mdl = model if isinstance(model, tuple) else ("openai", model)
         segments = []
-        if engine == "faster":
-            try:
-                fw_segments, info = mdl.transcribe(temp_audio, language="zh", beam_size=5)
-                for seg in fw_segments:
-                    segments.append({
-                        'start': float(seg.start or 0),
-                        'end': float(seg.end or 0),
-                        'text': seg.text.strip() if getattr(seg, 'text', None) else ''
-                    })
-            except Exception as e:
-                raise RuntimeError(f"Faster-Whisper 识别失败: {e}")
+        # 推理必须拿到模型的全部线程才开始，避免与 ffmpeg 争抢核心
+        with budget.lease(threads, kind='inference', minimum=threads):
+            if engine == "faster":
+                try:
+                    fw_segments, info = mdl.transcribe(audio_input, language="zh", beam_size=5,
+                                                       word_timestamps=postprocess)
+                    for seg in fw_segments:
+                        # faster-whisper 逐段解码，每段之间可暂停/取消
+                        check()
+                        segments.append({
+                            'start': float(seg.start or 0),
+                            'end': float(seg.end or 0),
+                            'text': seg.text.strip() if getattr(seg, 'text', None) else '',
+                            'words': [{'word': w.word, 'start': float(w.start or 0), 'end': float(w.end or 0)}
+                                      for w in (getattr(seg, 'words', None) or ())]
+                        })
+                except Exception as e:
+                    raise RuntimeError(f"Faster-Whisper 识别失败: {e}")
+            elif engine == "onnx":
+                try:
+                    result = mdl.transcribe(audio_input, language='zh')
+                    segments = result.get('segments', [])
+                except Exception as e:
+                    raise RuntimeError(f"ONNX Runtime 识别失败: {e}")
+            else:
+                try:
+                    if torch is not None:
+                        torch.set_num_threads(threads)
+                    try:
+                        result = mdl.transcribe(audio_input, language='zh', word_timestamps=postprocess)
+                    except TypeError:
+                        # 旧版 openai-whisper 不支持词级时间戳，后处理时按比例插值
+                        result = mdl.transcribe(audio_input, language='zh')
+                    segments = result.get('segments', [])
+                except Exception as e:
+                    raise RuntimeError(f"openai-whisper 识别失败: {e}")
+        if speech is not None:
+            segments = speech.remap_segments(segments)
+        
+        # 3. 生成字幕文件（可选后处理，一次遍历写出所选的全部格式）
+        check()
+        if postprocess:
+            track, pp_stats = postprocess_segments(segments)
+            log_func(f"[{index}/{total}] ✂️ 字幕后处理: {format_postprocess_stats(pp_stats)}")
         else:
-            try:
-                result = mdl.transcribe(temp_audio, language='zh')
-                segments = result.get('segments', [])
-            except Exception as e:
-                raise RuntimeError(f"openai-whisper 识别失败: {e}")
-        
-        # 3. 生成 SRT 字幕文件
-        output_srt_path = os.path.join(output_folder, f"{name}.srt")
-        with open(output_srt_path, "w", encoding="utf-8") as f:
-            for i, seg in enumerate(segments, start=1):
-                start = seg.get('start', 0)
-                end = seg.get('end', start)
-                text = (seg.get('text') or '').strip()
-                f.write(f"{i}\n")
-                f.write(f"{format_srt_time(start)} --> {format_srt_time(end)}\n")
-                f.write(f"{text}\n\n")
-        
-        log_func(f"[{index}/{total}] ✅ 字幕生成完成: {name}.srt ({len(segments)} 个片段)")
+            track = SubtitleTrack.from_segments(segments)
+        written = export_track(track, os.path.join(output_folder, name),
+                               formats, meta={'language': 'zh', 'title': name})
+        
+        names = ", ".join(os.path.basename(p) for p in written)
+        log_func(f"[{index}/{total}] ✅ 字幕生成完成: {names} ({len(segments)} 个片段)")
         
         # 4. 如果需要生成静音视频（通过 ffmpeg 去除音轨）
         if not keep_audio:
             output_video_path = os.path.join(output_folder, f"{name}_mute{ext}")
-            log_func(f"[{index}/{total}] 正在导出静音视频...")
-            try:
-                if ffmpeg is not None:
-                    (
-                        ffmpeg
-                        .input(input_path)
-                        .output(output_video_path, an=None, vcodec='libx264', loglevel='error')
-                        .overwrite_output()
-                        .run()
-                    )
-                else:
-                    subprocess.run([
-                        'ffmpeg', '-y', '-i', input_path, '-an', '-vcodec', 'libx264', output_video_path
-                    ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            except subprocess.CalledProcessError as e:
-                raise RuntimeError(f"导出静音视频失败: {e}")
-            log_func(f"[{index}/{total}] ✅ 静音视频生成完成: {name}_mute{ext}")
-        
+            return export_mute_video(input_path, output_video_path, budget, ffmpeg_threads,
+                                     log_func, index, total, duration, control)
+        
         return True
         
     except Exception as e:
@@ -338,7 +477,11 @@ def process_video(input_path, output_folder, keep_audio, model, log_func, index,
 # 批量处理函数
 # ----------------------------
 def start_batch_processing(input_folder, output_folder, keep_audio, model_container, progress_var, log_func):
-    """批量处理文件夹中的所有视频"""
+    """批量处理文件夹中的所有视频；运行中的任务的 JobControl 放在 model_container['control']"""
+    
+    if model_container.get('control') is not None:
+        messagebox.showwarning("提示", "已有任务在运行，请等待完成或先取消")
+        return
     
     if not input_folder or not output_folder:
         messagebox.showwarning("提示", "请选择输入和输出文件夹")
@@ -360,38 +503,122 @@ def start_batch_processing(input_folder, output_folder, keep_audio, model_contai
         messagebox.showerror("错误", "请先加载 Whisper 模型")
         return
     
-    # 支持的视频格式
-    video_exts = ('.mp4', '.mov', '.mkv', '.avi', '.flv', '.wmv', '.mpg', '.mpeg', '.m4v', '.webm')
-    videos = [f for f in os.listdir(input_folder) if f.lower().endswith(video_exts)]
+    # 支持的视频格式；包含子文件夹时递归扫描，输出按相对目录放置（videos 为完整路径，按路径自然排序）
+    recursive = model_container.get('recursive', False)
+    videos, scan_stats = scan(input_folder, exts=VIDEO_EXTS, recursive=recursive)
+    if recursive:
+        # 输出目录在输入目录之内时，不再处理上次生成的静音视频
+        out_prefix = os.path.join(os.path.abspath(output_folder), '')
+        videos = [v for v in videos if not os.path.abspath(v).startswith(out_prefix)]
     
     if not videos:
-        messagebox.showwarning("提示", f"输入文件夹内没有视频文件\n支持格式: {', '.join(video_exts)}")
+        messagebox.showwarning("提示", f"输入文件夹内没有视频文件\n支持格式: {', '.join(VIDEO_EXTS)}")
         return
     
     log_func(f"=" * 60)
     log_func(f"开始批量处理，共 {len(videos)} 个视频文件")
+    log_func(f"📁 {format_scan_stats(scan_stats)}")
     log_func(f"输入目录: {input_folder}")
     log_func(f"输出目录: {output_folder}")
-    log_func(f"模式: {'仅生成字幕' if keep_audio else '生成字幕+静音视频'}")
+    log_func(f"模式: {'仅生成字幕' if keep_audio else '生成字幕+静音视频'}")
+    # 导出格式在任务开始时确定，处理过程中修改勾选只影响下一次任务
+    formats = tuple(model_container.get('formats') or ('srt',))
+    log_func(f"字幕格式: {', '.join(f.upper() for f in formats)}")
     log_func(f"=" * 60)
     
     progress_var.set(f"开始处理 {len(videos)} 个视频...")
     
-    def run():
-        total = len(videos)
-        success_count = 0
-        failure_count = 0
-        
-        for i, video in enumerate(videos, start=1):
-            video_path = os.path.join(input_folder, video)
-            if process_video(video_path, output_folder, keep_audio, model, log_func, i, total):
-                success_count += 1
-            else:
-                failure_count += 1
-        
-        # 完成总结
-        log_func(f"=" * 60)
-        log_func(f"✅ 全部处理完成！成功: {success_count}, 失败: {failure_count}")
+    budget = model_container.setdefault('budget', ThreadBudget())
+    threads = model_container.get('threads') or budget.inference_threads()
+    control = model_container['control'] = JobControl()
+
+    def run():
+        try:
+            process_all()
+        finally:
+            model_container['control'] = None
+
+    def process_all():
+        total = len(videos)
+        success_count = 0
+        failure_count = 0
+        cancelled = False
+        budget.reset_stats()
+
+        # 先并行探测全部文件（命中缓存的不启动 ffprobe），得到总时长用于估算剩余时间
+        infos = media_probe.probe_many(videos)
+        durations = {p: (info or {}).get('duration') or 0.0 for p, info in infos.items()}
+        total_seconds = sum(durations.values())
+        unknown = sum(1 for info in infos.values() if info is None)
+        log_func(f"📊 媒体总时长 {format_duration(total_seconds)}"
+                 + (f"（{unknown} 个文件无法读取时长）" if unknown else ""))
+
+        def on_progress(snapshot):
+            progress_var.set(f"处理中 {done_count}/{total}：{format_progress(snapshot)}")
+
+        tracker = ProgressTracker(total_seconds, on_progress)
+        done_count = 0
+        
+        # 静音视频导出在后台与下一个文件的识别并行：全部导出合计只申请 total - threads 个线程，
+        # 否则它们会占满预算，识别（需要拿到全部 threads 个线程）要等导出结束才能开始
+        mute_share = max(1, budget.total - threads)
+        mute_workers = min(MUTE_WORKERS, mute_share)
+        mute_threads = max(1, mute_share // mute_workers)
+        mute_futures = []
+        with ThreadPoolExecutor(max_workers=mute_workers, thread_name_prefix="mute") as pool:
+            try:
+                for i, video_path in enumerate(videos, start=1):
+                    control.check()
+                    video = os.path.relpath(video_path, input_folder)
+                    out_dir = os.path.normpath(os.path.join(output_folder, os.path.dirname(video)))
+                    os.makedirs(out_dir, exist_ok=True)
+                    info = infos.get(video_path)
+                    if info is not None and not media_probe.has_audio(info):
+                        log_func(f"[{i}/{total}] ⚠️ 没有音轨，跳过: {video}")
+                        ok = False
+                    else:
+                        ok = process_video(video_path, out_dir, True, model, log_func, i, total,
+                                           budget=budget, threads=threads,
+                                           skip_silence=model_container.get('skip_silence', True),
+                                           formats=formats,
+                                           postprocess=model_container.get('postprocess', False),
+                                           control=control)
+                    done_count = i
+                    tracker.update(video_path, durations[video_path], force=True)
+                    if not ok:
+                        failure_count += 1
+                        continue
+                    if keep_audio:
+                        success_count += 1
+                        continue
+                    name, ext = os.path.splitext(os.path.basename(video_path))
+                    mute_futures.append(pool.submit(
+                        export_mute_video, video_path, os.path.join(out_dir, f"{name}_mute{ext}"),
+                        budget, mute_threads, log_func, i, total, None, control
+                    ))
+            except Cancelled:
+                cancelled = True
+            # 取消后排队的静音视频在开始前退出，运行中的 ffmpeg 已被终止
+            for fut in mute_futures:
+                try:
+                    ok = fut.result()
+                except Cancelled:
+                    cancelled = True
+                    continue
+                if ok:
+                    success_count += 1
+                else:
+                    failure_count += 1
+        
+        # 完成总结
+        log_func(f"=" * 60)
+        if cancelled:
+            log_func(f"⏹ 已取消！成功: {success_count}, 失败: {failure_count}（未完成的文件已清理）")
+            log_func(f"=" * 60)
+            progress_var.set(f"⏹ 已取消（完成 {success_count} 个）")
+            return
+        log_func(f"✅ 全部处理完成！成功: {success_count}, 失败: {failure_count}")
+        log_func(budget.report())
         log_func(f"=" * 60)
         
         if failure_count == 0:
@@ -503,7 +730,9 @@ def main():
     # 【修改】增加了默认窗口宽度
     root.geometry("800x650") 
     
-    model_container = {'model': None}
+    model_container = {'model': None, 'budget': ThreadBudget(), 'quantize': False, 'engine': 'auto',
+                       'skip_silence': True, 'formats': ['srt'], 'postprocess': False, 'control': None,
+                       'recursive': False}
     
     # ========== 顶部：模型设置区域 ==========
     frame_top = ttk.LabelFrame(root, text="模型设置")
@@ -532,7 +761,29 @@ def main():
         text="安装依赖",
         width=15
     )
-    btn_install_deps.grid(row=0, column=3, padx=8, pady=8)
+    btn_install_deps.grid(row=0, column=3, padx=8, pady=8)
+
+    # openai-whisper / ONNX 引擎生效：Linear 层动态 int8 量化，量化权重缓存到磁盘
+    quantize_var = tk.BooleanVar(value=False)
+    def _toggle_quantize():
+        model_container['quantize'] = quantize_var.get()
+    ttk.Checkbutton(
+        frame_top,
+        text="int8 量化（openai-whisper / ONNX）",
+        variable=quantize_var,
+        command=_toggle_quantize
+    ).grid(row=0, column=4, padx=8, pady=8)
+
+    # 第三种引擎：导出的编码器/解码器在 ONNX Runtime 上推理（勾选后重新加载模型生效）
+    onnx_var = tk.BooleanVar(value=False)
+    def _toggle_onnx():
+        model_container['engine'] = 'onnx' if onnx_var.get() else 'auto'
+    ttk.Checkbutton(
+        frame_top,
+        text="ONNX Runtime 引擎",
+        variable=onnx_var,
+        command=_toggle_onnx
+    ).grid(row=0, column=5, padx=8, pady=8)
     
     # ========== 中部：文件选择区域 ==========
     frame_mid = ttk.LabelFrame(root, text="文件选择")
@@ -573,24 +824,115 @@ def main():
         frame_mid,
         text="仅生成字幕（不生成静音视频）",
         variable=keep_audio
-    ).grid(row=2, column=0, columnspan=3, sticky="w", padx=8, pady=10)
+    ).grid(row=2, column=0, columnspan=3, sticky="w", padx=8, pady=10)
+
+    # 线程预算：可选把 ffmpeg 子进程绑定到分配的核心
+    pin_affinity = tk.BooleanVar(value=False)
+    def _toggle_pin():
+        model_container['budget'].pin_affinity = pin_affinity.get()
+    ttk.Checkbutton(
+        frame_mid,
+        text=f"绑定 CPU 核心（共 {model_container['budget'].total} 核，推理与 ffmpeg 分核运行）",
+        variable=pin_affinity,
+        command=_toggle_pin
+    ).grid(row=3, column=0, columnspan=3, sticky="w", padx=8, pady=(0, 10))
+
+    # 识别前按能量/过零率跳过静音段，字幕时间戳映射回原视频
+    skip_silence = tk.BooleanVar(value=True)
+    def _toggle_skip_silence():
+        model_container['skip_silence'] = skip_silence.get()
+    ttk.Checkbutton(
+        frame_mid,
+        text="跳过静音段（只识别有语音的部分）",
+        variable=skip_silence,
+        command=_toggle_skip_silence
+    ).grid(row=4, column=0, columnspan=3, sticky="w", padx=8, pady=(0, 10))
+
+    # 按播放器约束重新断句/合并/换行（默认约束见 subtitle_postprocess.DEFAULT_RULES）
+    postprocess_var = tk.BooleanVar(value=False)
+    def _toggle_postprocess():
+        model_container['postprocess'] = postprocess_var.get()
+    ttk.Checkbutton(
+        frame_mid,
+        text="字幕后处理（按行宽、每秒字数、时长重新断句与换行）",
+        variable=postprocess_var,
+        command=_toggle_postprocess
+    ).grid(row=5, column=0, columnspan=3, sticky="w", padx=8, pady=(0, 10))
+
+    # 递归扫描子文件夹（os.scandir），输出目录中保留相同的子目录结构
+    recursive_var = tk.BooleanVar(value=False)
+    def _toggle_recursive():
+        model_container['recursive'] = recursive_var.get()
+    ttk.Checkbutton(
+        frame_mid,
+        text="包含子文件夹（输出保持相同的目录结构）",
+        variable=recursive_var,
+        command=_toggle_recursive
+    ).grid(row=6, column=0, columnspan=3, sticky="w", padx=8, pady=(0, 10))
+
+    # 字幕导出格式（可多选，同一次遍历写出）
+    frame_formats = ttk.Frame(frame_mid)
+    frame_formats.grid(row=7, column=0, columnspan=3, sticky="w", padx=8, pady=(0, 10))
+    ttk.Label(frame_formats, text="字幕格式:").pack(side="left")
+    format_vars = {}
+    def _toggle_formats():
+        model_container['formats'] = [f for f in FORMATS if format_vars[f].get()] or ['srt']
+    for fmt in FORMATS:
+        format_vars[fmt] = tk.BooleanVar(value=(fmt == 'srt'))
+        ttk.Checkbutton(
+            frame_formats,
+            text=fmt.upper(),
+            variable=format_vars[fmt],
+            command=_toggle_formats
+        ).pack(side="left", padx=4)
     
     # 开始处理按钮
     def start_processing():
+        if model_container.get('control') is None:
+            pause_text.set("⏸ 暂停")
         start_batch_processing(
             input_path.get(),
             output_path.get(),
             keep_audio.get(),
-            model_container,
-            progress_var,
-            ui_log
+            model_container,
+            status_var,
+            ui_log
         )
     
+    # 暂停/取消：作用于 model_container['control']（没有运行中的任务时不做任何事）
+    def toggle_pause():
+        control = model_container.get('control')
+        if control is None or control.cancelled:
+            return
+        if control.paused:
+            control.resume()
+            pause_text.set("⏸ 暂停")
+            ui_log("▶ 已继续")
+        else:
+            control.pause()
+            pause_text.set("▶ 继续")
+            ui_log("⏸ 已暂停（ffmpeg 立即挂起；语音识别在当前片段结束后暂停，openai-whisper/ONNX 在当前文件识别完后暂停）")
+            status_var.set("⏸ 已暂停")
+    
+    def cancel_processing():
+        control = model_container.get('control')
+        if control is None or control.cancelled:
+            return
+        pause_text.set("⏸ 暂停")
+        ui_log("⏹ 正在取消...")
+        status_var.set("⏹ 正在取消")
+        control.cancel()
+    
+    frame_run = ttk.Frame(frame_mid)
+    frame_run.grid(row=8, column=0, columnspan=3, pady=12)
     ttk.Button(
-        frame_mid,
+        frame_run,
         text="开始处理",
-        command=start_processing
-    ).grid(row=3, column=0, columnspan=3, pady=12)
+        command=start_processing
+    ).pack(side="left", padx=4)
+    pause_text = tk.StringVar(value="⏸ 暂停")
+    ttk.Button(frame_run, textvariable=pause_text, command=toggle_pause).pack(side="left", padx=4)
+    ttk.Button(frame_run, text="⏹ 取消", command=cancel_processing).pack(side="left", padx=4)
     
     # ========== 底部：状态和日志区域 ==========
     frame_bot = ttk.LabelFrame(root, text="状态 / 日志")
@@ -610,12 +952,11 @@ def main():
     log_text.pack(side="left", fill="both", expand=True)
     log_scrollbar.pack(side="right", fill="y")
     
-    # UI 日志函数
-    def ui_log(msg):
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        log_text.insert("end", f"[{timestamp}] {msg}\n")
-        log_text.see("end")
-        root.update_idletasks()
+    # UI 日志：任意线程调用都只写缓冲区，主线程按批刷新（窗口保留最近的行，完整日志另存磁盘）
+    log_sink = LogSink(log_text, on_status=progress_var.set, name="batch_subtitle", timestamp=True)
+    ui_log = log_sink.write
+    # 工作线程通过 status_var 更新状态行，合并后由主线程写入 progress_var
+    status_var = StatusVar(log_sink)
     
     # 初始说明
     ui_log("=" * 60)
@@ -627,18 +968,19 @@ def main():
     # 绑定按钮事件
     btn_load_model.config(
         command=lambda: load_whisper_model_async(
-            model_var.get(), model_container, progress_var, ui_log
+            model_var.get(), model_container, status_var, ui_log
         )
     )
     
     btn_install_deps.config(
-        command=lambda: install_dependencies_async(progress_var, ui_log)
+        command=lambda: install_dependencies_async(status_var, ui_log)
     )
     
     # 启动后自动检测依赖，并在缺失时自动安装
     def detect_and_auto_install():
         def _post_detect():
             # 检查缺失项提示文本中是否包含 ✗
+            log_sink.flush()
             text = log_text.get("1.0", "end")
             missing = ("✗ Whisper" in text) or ("✗ Faster-Whisper" in text) or ("✗ ffmpeg-python" in text)
             # 仅对 Python 包做自动安装；FFmpeg 仍需用户自行安装
@@ -646,13 +988,13 @@ def main():
                 ui_log("检测到部分依赖缺失，正在自动安装 Python 依赖...")
                 def after_install():
                     ui_log("依赖安装完成，正在自动加载模型...")
-                    load_whisper_model_async(model_var.get(), model_container, progress_var, ui_log)
-                install_dependencies_async(progress_var, ui_log, on_done=after_install)
+                    load_whisper_model_async(model_var.get(), model_container, status_var, ui_log)
+                install_dependencies_async(status_var, ui_log, on_done=after_install)
             else:
                 # 若依赖齐全，直接尝试加载模型
-                load_whisper_model_async(model_var.get(), model_container, progress_var, ui_log)
+                load_whisper_model_async(model_var.get(), model_container, status_var, ui_log)
 
-        auto_detect_dependencies(ui_log, progress_var, model_container, model_var)
+        auto_detect_dependencies(ui_log, status_var, model_container, model_var)
         # 稍等日志刷出后判断并自动安装
         root.after(200, _post_detect)
 